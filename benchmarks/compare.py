@@ -0,0 +1,55 @@
+# benchmarks/compare.py
+# Compares two e2e_bench result files, exits 1 when a metric regressed.
+#   python -m benchmarks.compare base.json head.json [--threshold 10]
+import argparse
+import json
+import sys
+
+# Counts describe the workload, not its speed
+INFORMATIONAL = {"indexed_symbols", "embed_requests", "hunks", "affected_symbols",
+                 "audited_symbols", "audit_requests", "review_comments"}
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+def compare(base: dict, head: dict, threshold: float):
+    # Rows of (metric, base, head, change %, regressed)
+    rows = []
+    for metric, old in base["metrics"].items():
+        new = head["metrics"].get(metric)
+        if new is None or not isinstance(old, (int, float)):
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        worse = -change if higher_is_better(metric) else change
+        regressed = metric not in INFORMATIONAL and worse > threshold
+        rows.append((metric, old, new, change, regressed))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two SentinelPR benchmark results")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    if base.get("params") != head.get("params"):
+        print("Warning: the two runs used different parameters")
+
+    rows = compare(base, head, args.threshold)
+    print(f"{'metric':<24} {base['commit'][:12]:>14} {head['commit'][:12]:>14} {'change':>9}")
+    for metric, old, new, change, regressed in rows:
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{metric:<24} {old:>14} {new:>14} {change:>+8.1f}%{flag}")
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} metrics regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
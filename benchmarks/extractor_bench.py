@@ -0,0 +1,76 @@
+# benchmarks/extractor_bench.py
+# Compares the query and cursor extraction engines on large generated files.
+#   python -m benchmarks.extractor_bench [--classes 400] [--methods 25] [--repeat 5]
+import argparse
+import time
+
+from src.parser.core import ParserEngine
+from src.parser.extractor import SymbolExtractor
+
+def make_python(classes: int, methods: int) -> str:
+    out = []
+    for c in range(classes):
+        out.append(f"class Service{c}:")
+        for m in range(methods):
+            out.append(f"    def method_{m}(self, value):")
+            out.append(f"        total = value * {m}")
+            out.append("        for i in range(3):")
+            out.append("            total += i")
+            out.append("        return total")
+        out.append("")
+        out.append(f"def helper_{c}(x):")
+        out.append("    return x + 1")
+        out.append("")
+    return "\n".join(out)
+
+def make_java(classes: int, methods: int) -> str:
+    out = []
+    for c in range(classes):
+        out.append(f"class Service{c} {{")
+        for m in range(methods):
+            out.append(f"    public int method{m}(int value) {{")
+            out.append(f"        int total = value * {m};")
+            out.append("        for (int i = 0; i < 3; i++) { total += i; }")
+            out.append("        return total;")
+            out.append("    }")
+        out.append("}")
+    return "\n".join(out)
+
+def time_engine(engine: str, code: str, tree, language, repeat: int):
+    best = float("inf")
+    symbols = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        symbols = SymbolExtractor(code, language=language, engine=engine).extract(tree.root_node, "bench")
+        best = min(best, time.perf_counter() - start)
+    return best, symbols
+
+def main():
+    parser = argparse.ArgumentParser(description="SymbolExtractor engine micro-benchmark")
+    parser.add_argument("--classes", type=int, default=400)
+    parser.add_argument("--methods", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = ParserEngine()
+    sources = {
+        "python": make_python(args.classes, args.methods),
+        "java": make_java(args.classes, args.methods)
+    }
+
+    print(f"{'language':<8} {'lines':>8} {'symbols':>8} {'cursor':>10} {'query':>10} {'speedup':>8}")
+    for lang, code in sources.items():
+        tree = engine.parse(lang, code)
+        language = engine.languages[lang]
+
+        cursor_time, cursor_symbols = time_engine("cursor", code, tree, language, args.repeat)
+        query_time, query_symbols = time_engine("query", code, tree, language, args.repeat)
+        assert cursor_symbols == query_symbols, "engines disagree"
+
+        print(
+            f"{lang:<8} {code.count(chr(10)) + 1:>8} {len(query_symbols):>8} "
+            f"{cursor_time * 1000:>8.1f}ms {query_time * 1000:>8.1f}ms {cursor_time / query_time:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
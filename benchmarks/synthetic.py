@@ -0,0 +1,113 @@
+# benchmarks/synthetic.py
+# Deterministic synthetic repositories and PR diffs for the benchmarks.
+import os
+import random
+from typing import List
+
+def _python_file(rng: random.Random, symbols: int, nesting: int, tag: str) -> List[str]:
+    out = ["import os", ""]
+    made = 0
+    group = 0
+    while made < symbols:
+        if nesting == 0:
+            out.append(f"def {tag}_func_{made}(value):")
+            out.extend(_python_body(rng, 1))
+            out.append("")
+            made += 1
+            continue
+
+        # A chain of `nesting` classes with methods at the innermost level
+        for depth in range(nesting):
+            out.append("    " * depth + f"class {tag.title()}Group{group}L{depth}:")
+            made += 1
+        indent = nesting
+        for m in range(min(5, max(1, symbols - made))):
+            out.append("    " * indent + f"def method_{m}(self, value):")
+            out.extend(_python_body(rng, indent + 1))
+            out.append("")
+            made += 1
+        group += 1
+    return out
+
+def _python_body(rng: random.Random, indent: int) -> List[str]:
+    pad = "    " * indent
+    lines = [f"{pad}total = value * {rng.randint(1, 9)}"]
+    for i in range(rng.randint(1, 8)):
+        lines.append(f"{pad}total += len(os.sep) * {i}")
+    lines.append(f"{pad}return total")
+    return lines
+
+def _java_file(rng: random.Random, symbols: int, nesting: int, tag: str) -> List[str]:
+    nesting = max(1, nesting) # Java methods always live in a class
+    out = []
+    made = 0
+    group = 0
+    while made < symbols:
+        for depth in range(nesting):
+            out.append("    " * depth + f"class {tag.title()}Group{group}L{depth} {{")
+            made += 1
+        pad = "    " * nesting
+        for m in range(min(5, max(1, symbols - made))):
+            out.append(f"{pad}public int method{m}(int value) {{")
+            out.append(f"{pad}    int total = value * {rng.randint(1, 9)};")
+            for i in range(rng.randint(1, 8)):
+                out.append(f"{pad}    total += {i};")
+            out.append(f"{pad}    return total;")
+            out.append(f"{pad}}}")
+            made += 1
+        for depth in reversed(range(nesting)):
+            out.append("    " * depth + "}")
+        group += 1
+    return out
+
+def generate_repo(root: str, files: int = 200, symbols_per_file: int = 20, nesting: int = 1,
+                  java_ratio: float = 0.25, seed: int = 0) -> List[str]:
+    # Writes the repo under root, returns the file paths relative to it
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        is_java = rng.random() < java_ratio
+        rel = f"pkg{i // 50}/module_{i}.{'java' if is_java else 'py'}"
+        lines = (_java_file if is_java else _python_file)(rng, symbols_per_file, nesting, f"m{i}")
+
+        full = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        paths.append(rel)
+    return paths
+
+def generate_diff(root: str, paths: List[str], changed_files: int = 20, hunks_per_file: int = 3,
+                  lines_per_hunk: int = 4, context: int = 3, seed: int = 0) -> str:
+    '''
+    A git style diff whose new side is the repo as it is on disk, like a
+    checkout of the PR head. Each hunk rewrites `lines_per_hunk` lines.
+    '''
+    rng = random.Random(seed)
+    out = []
+    for rel in sorted(rng.sample(paths, min(changed_files, len(paths)))):
+        with open(os.path.join(root, rel)) as f:
+            lines = f.read().split("\n")[:-1]
+
+        # Non overlapping windows, context included
+        span = lines_per_hunk + 2 * context
+        slots = max(1, len(lines) // span)
+        picks = sorted(rng.sample(range(slots), min(hunks_per_file, slots)))
+
+        out.append(f"diff --git a/{rel} b/{rel}")
+        out.append("index 1111111..2222222 100644")
+        out.append(f"--- a/{rel}")
+        out.append(f"+++ b/{rel}")
+        for slot in picks:
+            start = slot * span # 0-based first context line
+            changed = range(start + context, min(start + context + lines_per_hunk, len(lines)))
+            after = range(changed.stop, min(changed.stop + context, len(lines)))
+            before = range(start, start + context)
+            count = len(before) + len(changed) + len(after)
+
+            out.append(f"@@ -{start + 1},{count} +{start + 1},{count} @@")
+            out.extend(" " + lines[i] for i in before)
+            out.extend("-" + lines[i] + "  # before" for i in changed)
+            out.extend("+" + lines[i] for i in changed)
+            out.extend(" " + lines[i] for i in after)
+    return "\n".join(out) + "\n"
@@ -1,19 +1,48 @@
 import os
 import json
-import google.generativeai as genai
-from typing import List, Dict
-from src.ai.prompts import AUDITOR_SYSTEM_PROMPT, AUDITOR_USER_TEMPLATE
+from typing import List, Dict, Optional, Tuple
+from src.ai.limiter import RateLimiter
+from src.ai.response_cache import ResponseCache
+from src.orchestrator.context_packer import ContextPacker
+from src.ai.prompts import (
+    AUDITOR_BATCH_SYMBOL_TEMPLATE, AUDITOR_BATCH_SYSTEM_PROMPT, AUDITOR_BATCH_USER_TEMPLATE,
+    AUDITOR_SYSTEM_PROMPT, AUDITOR_USER_TEMPLATE
+)
+from src.telemetry import count, span
 
 class Auditor:
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-flash-latest')
+    def __init__(self, limiter: Optional[RateLimiter] = None, cache: Optional[ResponseCache] = None,
+                 model=None, packer: Optional[ContextPacker] = None):
+        self.model_name = 'gemini-flash-latest'
+        if model is not None:
+            # Anything with generate_content(contents=..., generation_config=...) -> .text
+            self.model = model
+        else:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment")
+
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel(self.model_name)
+
+        # Shared with other workers so throttling backs everyone off
+        self.limiter = limiter or RateLimiter(max_concurrency=1)
+
+        # Optional, identical prompts skip the API entirely when set
+        self.cache = cache
+
+        # Optional, keeps the RAG context inside a token budget when set
+        self.packer = packer
 
     def analyze(self, diff_text: str, affected_symbol: Dict, context_snippets: List[Dict], valid_lines: List[int]) -> List[Dict]:
+        if self.packer:
+            # Snippets are ranked, deduped and trimmed around what the diff touches
+            context_snippets = self.packer.pack(
+                context_snippets, affected_symbol,
+                focus=diff_text or affected_symbol.get('snippet', '')
+            )
+
         # repare the Context String (Flatten the RAG results)
         context_str = "\n".join([
             f"--- Snippet from {c['file_path']} ---\n{c['snippet']}" 
@@ -28,37 +57,156 @@ class Auditor:
             valid_lines=str(valid_lines)
         )
 
-        # Call Gemini
         try:
-            response = self.model.generate_content(
-                contents=[
-                    {"role": "user", "parts": [AUDITOR_SYSTEM_PROMPT, prompt]}
-                ],
-                generation_config={"response_mime_type": "application/json"}
+            reviews = self._generate(AUDITOR_SYSTEM_PROMPT, prompt, symbol=affected_symbol.get('symbol_name'))
+            return self._keep_valid(reviews, affected_symbol, valid_lines)
+
+        except json.JSONDecodeError:
+            print("Auditor produced invalid JSON.")
+            return []
+        except Exception as e:
+            print(f"AI Error: {e}")
+            return []
+
+    def analyze_batch(self, items: List[Tuple[str, Dict, List[Dict], List[int]]]) -> List[List[Dict]]:
+        '''
+        Audits several symbols in one request.
+
+        `items` are (diff_text, affected_symbol, context_snippets, valid_lines),
+        the same arguments analyze() takes. The context is merged and packed
+        once for the whole batch. Every review names the symbol it belongs to
+        and is checked against that symbol's valid lines. Returns one list of
+        reviews per item, in order.
+        '''
+        if len(items) == 1:
+            return [self.analyze(*items[0])]
+        if not items:
+            return []
+
+        symbols = [sym for _, sym, _, _ in items]
+        context_snippets = _merge_context([ctx for _, _, ctx, _ in items])
+        if self.packer:
+            context_snippets = self.packer.pack(
+                context_snippets, symbols[0],
+                focus="\n".join(diff or sym.get('snippet', '') for diff, sym, _, _ in items),
+                exclude=symbols[1:]
             )
-            
-            # Parse JSON
-            result = json.loads(response.text)
-            reviews = result.get("reviews", [])
-            
-            # Filter and Enrich Reviews
-            valid_reviews = []
-            for review in reviews:
-                line = review.get('line')
-                
-                # Hunk Validation: Ensure line is in the valid_lines list
-                if line not in valid_lines:
-                    print(f"Skipping review on invalid line {line}. Valid lines: {valid_lines}")
-                    continue
 
-                review['file_path'] = affected_symbol['file_path']
-                valid_reviews.append(review)
-            
-            return valid_reviews
+        context_str = "\n".join([
+            f"--- Snippet from {c['file_path']} ---\n{c['snippet']}"
+            for c in context_snippets
+        ])
 
+        # Short ids, the model copies them back far more reliably than file::name ids
+        ids = [f"S{i + 1}" for i in range(len(items))]
+        symbols_str = "".join(
+            AUDITOR_BATCH_SYMBOL_TEMPLATE.format(
+                symbol_id=symbol_id,
+                symbol_name=sym.get('symbol_name', 'anonymous'),
+                file_path=sym.get('file_path', ''),
+                symbol_code=sym.get('snippet', 'Code not found'),
+                diff_text=diff_text,
+                valid_lines=str(valid_lines)
+            )
+            for symbol_id, (diff_text, sym, _, valid_lines) in zip(ids, items)
+        )
+        prompt = AUDITOR_BATCH_USER_TEMPLATE.format(
+            context_str=context_str if context_str else "No relevant context found.",
+            symbols_str=symbols_str
+        )
+
+        try:
+            reviews = self._generate(AUDITOR_BATCH_SYSTEM_PROMPT, prompt, symbols=len(items))
         except json.JSONDecodeError:
             print("Auditor produced invalid JSON.")
-            return []
+            return [[] for _ in items]
         except Exception as e:
             print(f"AI Error: {e}")
-            return []
\ No newline at end of file
+            return [[] for _ in items]
+
+        # Route every review back to its symbol
+        by_id = {symbol_id: [] for symbol_id in ids}
+        for review in reviews:
+            symbol_id = review.pop('symbol_id', None)
+            if symbol_id not in by_id:
+                # No usable id: only a line that belongs to exactly one symbol is unambiguous
+                owners = [i for i, (_, _, _, valid_lines) in zip(ids, items) if review.get('line') in valid_lines]
+                if len(owners) != 1:
+                    print(f"Skipping review for unknown symbol {symbol_id!r} on line {review.get('line')}.")
+                    continue
+                symbol_id = owners[0]
+            by_id[symbol_id].append(review)
+
+        return [
+            self._keep_valid(by_id[symbol_id], sym, valid_lines)
+            for symbol_id, (_, sym, _, valid_lines) in zip(ids, items)
+        ]
+
+    def _generate(self, system_prompt: str, prompt: str, **attributes) -> List[Dict]:
+        cache_key = None
+        reviews = None
+        if self.cache:
+            cache_key = ResponseCache.make_key(self.model_name, system_prompt, prompt)
+            reviews = self.cache.get(cache_key)
+
+        if reviews is not None:
+            count("analyze.cache_hits")
+            return reviews
+
+        # Call Gemini
+        with span("analyze", bytes=len(prompt), **attributes) as s:
+            response = self.limiter.call(
+                self.model.generate_content,
+                contents=[
+                    {"role": "user", "parts": [system_prompt, prompt]}
+                ],
+                generation_config={"response_mime_type": "application/json"}
+            )
+            s.set(**_token_usage(response, system_prompt + prompt))
+
+        # Parse JSON
+        result = json.loads(response.text)
+        reviews = result.get("reviews", [])
+
+        # Only successful, parseable responses are worth keeping
+        if self.cache:
+            self.cache.put(cache_key, reviews)
+        return reviews
+
+    def _keep_valid(self, reviews: List[Dict], affected_symbol: Dict, valid_lines: List[int]) -> List[Dict]:
+        # Filter and Enrich Reviews
+        valid_reviews = []
+        for review in reviews:
+            line = review.get('line')
+
+            # Hunk Validation: Ensure line is in the valid_lines list
+            if line not in valid_lines:
+                print(f"Skipping review on invalid line {line}. Valid lines: {valid_lines}")
+                continue
+
+            review['file_path'] = affected_symbol['file_path']
+            valid_reviews.append(review)
+
+        return valid_reviews
+
+def _merge_context(contexts: List[List[Dict]]) -> List[Dict]:
+    # Symbols of one batch often retrieve the same neighbours, keep each once at its best distance
+    merged = {}
+    for snippets in contexts:
+        for snippet in snippets:
+            key = snippet.get('id') or (snippet.get('file_path'), snippet.get('start_line'), snippet.get('snippet'))
+            best = merged.get(key)
+            if best is None or snippet.get('distance', float('inf')) < best.get('distance', float('inf')):
+                merged[key] = snippet
+    return list(merged.values())
+
+def _token_usage(response, prompt: str) -> Dict:
+    # Gemini reports usage on the response, estimate at ~4 chars per token otherwise
+    usage = getattr(response, "usage_metadata", None)
+    tokens_in = getattr(usage, "prompt_token_count", None)
+    tokens_out = getattr(usage, "candidates_token_count", None)
+    if not isinstance(tokens_in, int):
+        tokens_in = len(prompt) // 4
+    if not isinstance(tokens_out, int):
+        tokens_out = len(getattr(response, "text", "") or "") // 4
+    return {"tokens_in": tokens_in, "tokens_out": tokens_out}
@@ -1,31 +1,150 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-load_dotenv()
+import time
+from typing import List, Optional
+from src.ai.embedding_backends import EmbeddingBackend, make_backend
+from src.ai.embedding_cache import EmbeddingCache
+from src.ai.limiter import RateLimiter
+from src.orchestrator.executor import run_ordered
+from src.telemetry import count, span
 
 class Embedder:
-    def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        genai.configure(api_key=self.api_key)
+    '''
+    Embeds snippets through a backend, with caching and retries.
+
+    A batch is split into chunks that fit the backend's request limits, up to
+    `max_in_flight` chunks run at once (rate limits back off through the
+    shared limiter), and chunks that fail are retried on their own with
+    exponential backoff. The result is aligned to the input: a text whose
+    chunk failed for good gets None, never a shifted neighbour's vector.
+    '''
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, cache: Optional[EmbeddingCache] = None,
+                 backend: Optional[EmbeddingBackend] = None, max_in_flight: Optional[int] = None,
+                 chunk_retries: int = 2, retry_delay: float = 2.0):
+        # Gemini unless SENTINEL_EMBED_BACKEND says otherwise
+        self.backend = backend or make_backend()
+        self.limiter = limiter or RateLimiter(max_concurrency=1)
+        self.max_in_flight = max_in_flight or self.limiter.max_concurrency
+        self.chunk_retries = chunk_retries
+        self.retry_delay = retry_delay
+
+        self.model = self.backend.model_id
+        self.task_type = self.backend.task_type
+
+        # Optional, unchanged snippets are served from disk when set
+        self.cache = cache
 
-    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+    @property
+    def backend_id(self) -> str:
+        return self.backend.backend_id
+
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def embed_batch(self, texts: list[str]) -> list[Optional[list[float]]]:
         if not texts:
             return []
 
-        try:
-            # task_type="retrieval_document" optimizes vectors for storage/search
-            result = genai.embed_content(
-                model="models/text-embedding-004",
-                content=texts,
-                task_type="retrieval_document"
+        with span("embed_batch", texts=len(texts)) as s:
+            vectors = self._embed_batch(texts, s)
+        return vectors
+
+    def _embed_batch(self, texts: list[str], s) -> list[Optional[list[float]]]:
+        keys = []
+        cached = {}
+        if self.cache:
+            keys = [EmbeddingCache.make_key(self.model, self.task_type, t) for t in texts]
+            cached = self.cache.get_many(keys)
+
+        vectors = [None] * len(texts)
+        # Only texts we have never embedded go to the backend (deduplicated)
+        missing = {}
+        for i, text in enumerate(texts):
+            if self.cache and keys[i] in cached:
+                vectors[i] = cached[keys[i]]
+            else:
+                missing.setdefault(text, []).append(i)
+
+        hits = len(texts) - sum(len(positions) for positions in missing.values())
+        s.set(cache_hits=hits)
+        count("embed.cache_hits", hits)
+        if not missing:
+            return vectors
+
+        embedded = self._embed_chunked(list(missing))
+
+        fresh = {}
+        for (text, positions), vec in zip(missing.items(), embedded):
+            if vec is None:
+                continue
+            for i in positions:
+                vectors[i] = vec
+            if self.cache:
+                fresh[keys[positions[0]]] = vec
+
+        if fresh:
+            self.cache.put_many(fresh)
+
+        failed = sum(vec is None for vec in embedded)
+        s.set(failed=failed)
+        if failed:
+            print(f"Error generating embeddings: {failed} of {len(embedded)} texts failed")
+        return vectors
+
+    def _chunks(self, texts: List[str]) -> List[List[int]]:
+        # Greedy packing under the backend's size and count limits, as index lists
+        max_size = self.backend.max_batch_size
+        max_chars = self.backend.max_batch_chars
+        chunks, current, chars = [], [], 0
+        for i, text in enumerate(texts):
+            if current and (len(current) >= max_size or (max_chars and chars + len(text) > max_chars)):
+                chunks.append(current)
+                current, chars = [], 0
+            current.append(i)
+            chars += len(text)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        # Embedding APIs report no usage, tokens_in is estimated at ~4 chars per token
+        chars = sum(len(t) for t in texts)
+        with span("embed_request", texts=len(texts), bytes=chars, tokens_in=chars // 4):
+            if self.backend.remote:
+                result = self.limiter.call(self.backend.embed, texts)
+            else:
+                result = self.backend.embed(texts)
+        if len(result) != len(texts):
+            raise RuntimeError(f"got {len(result)} embeddings for {len(texts)} texts")
+        return result
+
+    def _embed_chunked(self, texts: List[str]) -> List[Optional[List[float]]]:
+        vectors = [None] * len(texts)
+        pending = self._chunks(texts)
+
+        for attempt in range(self.chunk_retries + 1):
+            if attempt:
+                # Rate limits were already backed off in the limiter, this covers
+                # timeouts and server errors
+                delay = self.retry_delay * (2 ** (attempt - 1))
+                print(f"Retrying {len(pending)} failed embedding chunks in {delay:.1f}s")
+                time.sleep(delay)
+
+            results = run_ordered(
+                pending, lambda chunk: self._embed_chunk([texts[i] for i in chunk]),
+                max_workers=self.max_in_flight,
+                label=lambda chunk: f"embedding chunk of {len(chunk)} texts"
             )
-            
-            # Return list of vectors
-            return result['embedding']
 
-        except Exception as e:
-            print(f"Error generating embeddings: {e}")
-            return []
\ No newline at end of file
+            failed = []
+            for chunk, result in zip(pending, results):
+                if result is None:
+                    failed.append(chunk)
+                    continue
+                for i, vec in zip(chunk, result):
+                    vectors[i] = vec
+            if not failed:
+                break
+            pending = failed
+
+        return vectors
@@ -0,0 +1,163 @@
+# src/ai/embedding_backends.py
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+# Where chromadb unpacks its bundled all-MiniLM-L6-v2 export (model.onnx + tokenizer.json)
+DEFAULT_ONNX_MODEL_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "chroma", "onnx_models", "all-MiniLM-L6-v2", "onnx"
+)
+
+class EmbeddingBackend(ABC):
+    '''
+    Turns a batch of texts into vectors, aligned to the input.
+
+    `backend_id` names the backend and model and is recorded in the index,
+    `dimension` is the vector size. `remote` backends go through the rate
+    limiter, local ones are called directly.
+    '''
+    name = "base"
+    remote = False
+
+    # Cache keys are built from these, see EmbeddingCache.make_key
+    model_id = ""
+    task_type = ""
+
+    # Largest request the provider accepts, Embedder chunks to these
+    max_batch_size = 100
+    max_batch_chars: Optional[int] = None
+
+    @property
+    def backend_id(self) -> str:
+        return f"{self.name}:{self.model_id}"
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        ...
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+class GeminiBackend(EmbeddingBackend):
+    name = "gemini"
+    remote = True
+    # batchEmbedContents takes at most 100 texts, keep payloads far below the request size cap
+    max_batch_size = 100
+    max_batch_chars = 1_000_000
+
+    def __init__(self, model: str = "models/text-embedding-004", task_type: str = "retrieval_document"):
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        # The SDK takes over half a second to import, only pay for it when Gemini is used
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        self._genai = genai
+
+        self.model_id = model
+        # task_type="retrieval_document" optimizes vectors for storage/search
+        self.task_type = task_type
+
+    @property
+    def dimension(self) -> int:
+        return 768 # fixed for text-embedding-004
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        result = self._genai.embed_content(model=self.model_id, content=texts, task_type=self.task_type)
+        return result['embedding']
+
+class OnnxBackend(EmbeddingBackend):
+    '''
+    Local CPU embeddings from a sentence-transformers style ONNX export.
+
+    `model_dir` holds model.onnx and tokenizer.json. Texts are tokenized in
+    batches (in parallel, by the tokenizers library), similar lengths share a
+    batch to keep padding low, inference runs on `threads` intra-op threads,
+    and token states are mean pooled and L2 normalized.
+    '''
+    name = "onnx"
+    max_batch_size = 256 # batched again internally by batch_size
+
+    def __init__(self, model_dir: Optional[str] = None, threads: int = 0,
+                 batch_size: int = 32, max_length: int = 256):
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The onnx embedding backend needs numpy, onnxruntime and tokenizers") from e
+
+        self._np = np
+        self.model_dir = model_dir or DEFAULT_ONNX_MODEL_DIR
+        model_path = os.path.join(self.model_dir, "model.onnx")
+        tokenizer_path = os.path.join(self.model_dir, "tokenizer.json")
+        for path in (model_path, tokenizer_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"ONNX embedding model incomplete, missing {path}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads # 0 lets onnxruntime use every core
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        if self.tokenizer.padding is None:
+            self.tokenizer.enable_padding()
+
+        self.batch_size = batch_size
+        # ".../all-MiniLM-L6-v2/onnx" -> "all-MiniLM-L6-v2"
+        parts = os.path.normpath(self.model_dir).split(os.sep)
+        self.model_id = parts[-2] if parts[-1] == "onnx" and len(parts) > 1 else parts[-1]
+        self._dimension = None
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            size = self.session.get_outputs()[0].shape[-1]
+            # Symbolic in some exports, ask the model instead
+            self._dimension = size if isinstance(size, int) else len(self.embed(["dimension probe"])[0])
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        np = self._np
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._inputs:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+
+            for i, vec in zip(batch, mean_pool(np, hidden, attention_mask)):
+                vectors[i] = vec.tolist()
+        return vectors
+
+def mean_pool(np, hidden, attention_mask):
+    # Average of the real (non padding) token states, scaled to unit length
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    summed = (hidden * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return pooled / np.clip(norms, 1e-12, None)
+
+def make_backend(name: Optional[str] = None) -> EmbeddingBackend:
+    # SENTINEL_EMBED_BACKEND=gemini (default) | onnx
+    name = (name or os.getenv("SENTINEL_EMBED_BACKEND", "gemini")).lower()
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "onnx":
+        return OnnxBackend(
+            model_dir=os.getenv("SENTINEL_ONNX_MODEL"),
+            threads=int(os.getenv("SENTINEL_ONNX_THREADS", "0"))
+        )
+    raise ValueError(f"Unknown embedding backend: {name}")
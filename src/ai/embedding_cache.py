@@ -0,0 +1,43 @@
+# src/ai/embedding_cache.py
+import hashlib
+from array import array
+from typing import Dict, List
+
+from src.storage.disk_cache import DiskCache
+
+class EmbeddingCache:
+    '''
+    Content addressed cache of embedding vectors.
+
+    Keyed on the embedding model, task type and the exact snippet text, so a
+    symbol whose body did not change is never sent to the API again. Vectors
+    are stored as packed float32 arrays (~3KB for 768 dims).
+    '''
+
+    def __init__(self, path: str = ".sentinel/cache/embeddings.sqlite",
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.store = DiskCache(path, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{task_type}:{digest}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        vectors = {}
+        for key, raw in self.store.get_many(keys).items():
+            packed = array("f")
+            packed.frombytes(raw)
+            vectors[key] = packed.tolist()
+        return vectors
+
+    def put_many(self, items: Dict[str, List[float]]):
+        self.store.set_many([(key, array("f", vec).tobytes()) for key, vec in items.items()])
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
@@ -0,0 +1,72 @@
+# src/ai/limiter.py
+import random
+import threading
+import time
+
+# Substrings Gemini / google-api-core use when a request is throttled
+RATE_LIMIT_MARKERS = ("429", "resource exhausted", "resource_exhausted", "rate limit", "quota")
+
+def is_rate_limit_error(error: Exception) -> bool:
+    try:
+        from google.api_core import exceptions as google_exceptions
+        if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+            return True
+    except ImportError:
+        pass
+
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+class RateLimiter:
+    '''
+    Shared backpressure for calls to a rate limited API.
+
+    Caps the number of in-flight calls. When any caller gets throttled, every
+    caller waits for the same cooldown before sending again, so a burst of
+    workers backs off together instead of hammering the quota.
+    '''
+
+    def __init__(self, max_concurrency: int = 4, max_retries: int = 5,
+                 base_delay: float = 2.0, max_delay: float = 60.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttled = 0 # Number of rate limit responses seen
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def _wait_for_cooldown(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with jitter, shared by all callers
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay *= 0.5 + random.random() / 2
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            self.throttled += 1
+        return delay
+
+    def call(self, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._wait_for_cooldown()
+            with self._slots:
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                        raise
+
+            # Release the slot before sleeping so the cooldown applies to everyone
+            delay = self._backoff(attempt)
+            attempt += 1
+            print(f"Rate limited, backing off {delay:.1f}s (retry {attempt}/{self.max_retries})")
@@ -54,4 +54,40 @@ AUDITOR_USER_TEMPLATE = """
 {valid_lines}
 
 Analyze the Diff. Does it introduce bugs or violate patterns found in Context?
-"""
\ No newline at end of file
+"""
+# Several symbols audited in one request, the system prompt, context and diff are paid for once
+AUDITOR_BATCH_SYSTEM_PROMPT = AUDITOR_SYSTEM_PROMPT.replace(
+    "2. THE SYMBOL: The full function/class context where the change happened.",
+    "2. THE SYMBOLS: Several functions/classes where the change happened, each with an ID,\n"
+    "   its own diff and its own valid line numbers."
+).replace(
+    '   - Only comment on lines listed in the "VALID LINE NUMBERS" section below.',
+    '   - Only comment on lines listed in the "VALID LINE NUMBERS" of the symbol you are reviewing.\n'
+    '   - Every review must carry the "symbol_id" of the symbol it belongs to.'
+).replace(
+    '            "line": <int: ABSOLUTE line number>,',
+    '            "symbol_id": "<string: ID of the symbol, e.g. S1>",\n'
+    '            "line": <int: ABSOLUTE line number>,'
+)
+
+AUDITOR_BATCH_USER_TEMPLATE = """
+### CONTEXT (Similar Patterns in Codebase)
+{context_str}
+
+{symbols_str}
+
+Analyze each symbol's Diff. Does it introduce bugs or violate patterns found in Context?
+"""
+
+AUDITOR_BATCH_SYMBOL_TEMPLATE = """
+## SYMBOL {symbol_id}: {symbol_name} ({file_path})
+
+### AFFECTED SYMBOL (Full Function Scope)
+{symbol_code}
+
+### GIT DIFF (The Change)
+{diff_text}
+
+### VALID LINE NUMBERS (Only comment on these lines)
+{valid_lines}
+"""
@@ -0,0 +1,46 @@
+# src/ai/response_cache.py
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from src.storage.disk_cache import DiskCache
+
+class ResponseCache:
+    '''
+    Content addressed cache of parsed LLM reviews.
+
+    The key is the model name plus a hash of everything that was sent, so any
+    change to the system prompt, context, symbol or diff slice is a miss.
+    '''
+
+    def __init__(self, path: str = ".sentinel/cache/llm.sqlite",
+                 max_bytes: int = 32 * 1024 * 1024, ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        self.store = DiskCache(path, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def make_key(model_name: str, *prompt_parts: str) -> str:
+        sha = hashlib.sha256()
+        for part in prompt_parts:
+            sha.update(part.encode("utf-8"))
+            sha.update(b"\0") # Separator so ("ab", "c") != ("a", "bc")
+        return f"{model_name}:{sha.hexdigest()}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        raw = self.store.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def put(self, key: str, reviews: List[Dict]):
+        self.store.set(key, json.dumps(reviews).encode("utf-8"))
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
@@ -1,11 +1,26 @@
+import io
 import re
-from dataclasses import dataclass
-from typing import List
+import threading
+from fnmatch import fnmatch
+from typing import BinaryIO, Iterable, Iterator, List, Optional
 
 from src.models.diffhunk import DiffHunk
 
+# Generated or vendored churn that no symbol can map to, never worth holding in memory
+DEFAULT_EXCLUDE = (
+    "*.lock", "package-lock.json", "pnpm-lock.yaml", "yarn.lock", "go.sum",
+    "*.min.js", "*.min.css", "*.map", "*.svg", "*.pb.go", "*_pb2.py",
+)
+
+# A single file's section of the diff above this is dropped (lockfile rewrites, dumps)
+DEFAULT_MAX_FILE_BYTES = 8 * 1024 * 1024
+
+def _decode_line(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\n").rstrip("\r")
+
 class DiffParser:
-    def __init__(self):
+    def __init__(self, exclude: Optional[Iterable[str]] = DEFAULT_EXCLUDE,
+                 max_file_bytes: Optional[int] = DEFAULT_MAX_FILE_BYTES):
         # diff --git a/(SOURCE) b/(TARGET) -> Captures filename
         self.file_header_pattern = re.compile(r"diff --git a/.* b/(.*)")
         
@@ -13,61 +28,146 @@ class DiffParser:
         # We only capture the NEW_START (\d+)
         self.hunk_header_pattern = re.compile(r"@@ \-\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
 
+        self.exclude = tuple(exclude or ())
+        self.max_file_bytes = max_file_bytes
+        self.skipped_files: List[str] = []
+
     def parse(self, diff_text: str) -> List[DiffHunk]:
-        hunks = []
+        # In-memory diffs go through the same parser as streamed ones
+        return list(self.parse_stream(io.BytesIO(diff_text.encode("utf-8"))))
+
+    def is_excluded(self, file_path: str) -> bool:
+        name = file_path.rsplit("/", 1)[-1]
+        return any(fnmatch(file_path, p) or fnmatch(name, p) for p in self.exclude)
+
+    def parse_stream(self, fh: BinaryIO, keep_lines: bool = True) -> Iterator[DiffHunk]:
+        '''
+        Yields hunks one at a time from a diff opened in binary mode.
+
+        Each hunk records the byte range of its body in the diff (see
+        HunkReader). With keep_lines=False the body is not kept at all, so
+        memory stays flat however large the diff is. Binary, excluded and
+        oversized files are skipped without decoding their content.
+        '''
+        self.skipped_files = []
+        file_hunks: List[DiffHunk] = [] # held until the file is known to be wanted
         current_file = None
-        current_hunk_lines = []
-        current_start_line = 0
-        
+        skip_file = False
+        file_bytes = 0
+        hunk = None
+
         # Tracker for the line number in the NEW file
         active_line_number = 0
+        offset = 0
+
+        def skip(reason: str):
+            nonlocal skip_file, hunk
+            skip_file = True
+            hunk = None
+            file_hunks.clear()
+            self.skipped_files.append(current_file)
+            print(f"Skipping {current_file} in diff ({reason})")
+
+        def finish_hunk():
+            # Hunks that only remove lines are kept too, a dropped guard is a change worth reviewing
+            nonlocal hunk
+            if hunk is not None and (hunk.changed_ranges or hunk.deleted_at):
+                file_hunks.append(hunk)
+            hunk = None
+
+        for raw in fh:
+            line_start = offset
+            offset += len(raw)
 
-        def flush_hunk():
-            # Helper to save the hunk state and reset
-            nonlocal current_hunk_lines
-            if current_file and current_hunk_lines:
-                hunks.append(DiffHunk(
-                    file_path=current_file,
-                    start_line=current_start_line,
-                    changed_lines=current_hunk_lines
-                ))
-                current_hunk_lines = []
-
-        lines = diff_text.splitlines()
-
-        for line in lines:
-            file_match = self.file_header_pattern.match(line)
-            if file_match:
-                flush_hunk()
-                current_file = file_match.group(1)
+            if raw.startswith(b"diff --git "):
+                finish_hunk()
+                yield from file_hunks
+                file_hunks.clear()
+
+                file_match = self.file_header_pattern.match(_decode_line(raw))
+                current_file = file_match.group(1) if file_match else None
                 active_line_number = 0
+                file_bytes = 0
+                skip_file = False
+                if current_file and self.is_excluded(current_file):
+                    skip("excluded")
                 continue
 
-            # Hunk Header (@@ ... @@)
-            hunk_match = self.hunk_header_pattern.match(line)
-            if hunk_match:
-                flush_hunk()
-
-                if current_file and current_hunk_lines:
-                    hunks.append(DiffHunk(current_file, current_start_line, current_hunk_lines))
-                
-                # Start of new hunk
-                current_start_line = int(hunk_match.group(1))
-                active_line_number = current_start_line
+            if current_file is None or skip_file:
+                continue
+
+            file_bytes += len(raw)
+            if self.max_file_bytes and file_bytes > self.max_file_bytes:
+                skip(f"over {self.max_file_bytes} bytes")
+                continue
+
+            if active_line_number == 0 and raw.startswith((b"Binary files ", b"GIT binary patch")):
+                skip("binary")
                 continue
 
+            # Hunk Header (@@ ... @@)
+            if raw.startswith(b"@@"):
+                line = _decode_line(raw)
+                hunk_match = self.hunk_header_pattern.match(line)
+                if hunk_match:
+                    finish_hunk()
+
+                    # Start of new hunk
+                    active_line_number = int(hunk_match.group(1))
+                    hunk = DiffHunk(
+                        file_path=current_file,
+                        start_line=active_line_number,
+                        header=line,
+                        byte_start=offset,
+                        byte_end=offset
+                    )
+                    continue
+
             # Content Lines
-            if current_file and active_line_number > 0:
-                if line.startswith("+++"):
+            if hunk is not None:
+                if raw.startswith(b"+++"):
                     continue
-                
-                if line.startswith("+"):
-                    current_hunk_lines.append(active_line_number)
+
+                hunk.byte_end = offset
+                if keep_lines:
+                    # Keep the raw body so the diff can be sliced per symbol later
+                    hunk.lines.append(_decode_line(raw))
+
+                if raw.startswith(b"+"):
+                    hunk.add_changed_line(active_line_number)
                     active_line_number += 1
-                
-                if line.startswith(" "):
+
+                if raw.startswith(b" "):
                     active_line_number += 1
 
-                # Deleted lines dont advance the line counter
-        flush_hunk()
-        return hunks
\ No newline at end of file
+                # Deleted lines dont advance the line counter, they sit at the line they precede
+                if raw.startswith(b"-"):
+                    hunk.add_deletion(active_line_number)
+
+        finish_hunk()
+        yield from file_hunks
+
+class HunkReader:
+    '''
+    Reads hunk bodies back out of the raw diff file by byte offset, for hunks
+    parsed with keep_lines=False. Safe to share between threads.
+    '''
+
+    def __init__(self, diff_path: str):
+        self._fh = open(diff_path, 'rb')
+        self._lock = threading.Lock()
+
+    def lines(self, hunk: DiffHunk) -> List[str]:
+        if hunk.lines or hunk.byte_end <= hunk.byte_start:
+            return hunk.lines
+        with self._lock:
+            self._fh.seek(hunk.byte_start)
+            data = self._fh.read(hunk.byte_end - hunk.byte_start)
+        raws = data.split(b"\n")
+        if raws[-1] == b"":
+            raws.pop()
+        # "+++" lines inside a hunk are dropped by the parser too
+        return [_decode_line(raw) for raw in raws if not raw.startswith(b"+++")]
+
+    def close(self):
+        self._fh.close()
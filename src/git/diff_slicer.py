@@ -0,0 +1,117 @@
+import re
+from typing import Dict, List, Optional
+
+from src.git.diff_parser import HunkReader
+from src.models.diffhunk import DiffHunk
+
+TRUNCATION_MARKER = "... [diff truncated to fit size budget]"
+
+class DiffSlicer:
+    '''
+    Cuts the PR diff down to what one symbol needs.
+
+    Only hunks in the symbol's file are kept, and each hunk is trimmed to the
+    symbol's line range plus `context_lines` on either side. The result is
+    capped at `max_chars` so a single call can never carry the whole PR.
+    Hunks parsed without their body are read back through `reader`.
+    '''
+
+    def __init__(self, context_lines: int = 3, max_chars: int = 8000, reader: Optional[HunkReader] = None):
+        self.context_lines = context_lines
+        self.max_chars = max_chars
+        self.reader = reader
+
+        # @@ -OLD_START,OLD_COUNT +NEW_START,NEW_COUNT @@ optional section heading
+        self.hunk_header_pattern = re.compile(r"@@ \-(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@(.*)")
+
+    def slice_for_symbol(self, hunks: List[DiffHunk], symbol: Dict) -> str:
+        file_path = symbol['file_path']
+        low = int(symbol['start_line']) - self.context_lines
+        high = int(symbol['end_line']) + self.context_lines
+
+        parts = []
+        for hunk in hunks:
+            if hunk.file_path != file_path:
+                continue
+            trimmed = self._trim_hunk(hunk, low, high)
+            if trimmed:
+                parts.extend(trimmed)
+
+        if not parts:
+            return ""
+
+        lines = [f"--- a/{file_path}", f"+++ b/{file_path}"] + parts
+        return self._enforce_budget(lines)
+
+    def _trim_hunk(self, hunk: DiffHunk, low: int, high: int) -> List[str]:
+        header_match = self.hunk_header_pattern.match(hunk.header)
+        if not header_match:
+            return []
+
+        old_line = int(header_match.group(1))
+        new_line = int(header_match.group(2))
+        section = header_match.group(3)
+
+        # Walk the hunk tracking both sides, keep the lines whose position in
+        # the new file falls inside [low, high]. Deleted lines sit at the
+        # position of the new line they precede.
+        kept = []
+        first_old = first_new = None
+        old_count = new_count = 0
+        body = self.reader.lines(hunk) if self.reader else hunk.lines
+        for line in body:
+            in_window = low <= new_line <= high
+
+            if line.startswith("\\"):
+                # "\ No newline at end of file" belongs to the previous line
+                if kept:
+                    kept.append(line)
+                continue
+
+            if in_window:
+                if first_old is None:
+                    first_old, first_new = old_line, new_line
+                kept.append(line)
+
+            if line.startswith("+"):
+                new_line += 1
+                new_count += in_window
+            elif line.startswith("-"):
+                old_line += 1
+                old_count += in_window
+            else:
+                old_line += 1
+                new_line += 1
+                old_count += in_window
+                new_count += in_window
+
+        # Nothing but unchanged context in the window is not worth sending
+        if not any(l.startswith(("+", "-")) for l in kept):
+            return []
+
+        # Unified diff convention: an empty side points at the line before it
+        if old_count == 0:
+            first_old -= 1
+        if new_count == 0:
+            first_new -= 1
+
+        header = f"@@ -{first_old},{old_count} +{first_new},{new_count} @@{section}"
+        return [header] + kept
+
+    def _enforce_budget(self, lines: List[str]) -> str:
+        text = "\n".join(lines)
+        if len(text) <= self.max_chars:
+            return text
+
+        # Cut on a line boundary and leave room for the marker
+        budget = self.max_chars - len(TRUNCATION_MARKER) - 1
+        kept = []
+        used = 0
+        for line in lines:
+            if used + len(line) + 1 > budget:
+                break
+            kept.append(line)
+            used += len(line) + 1
+
+        kept.append(TRUNCATION_MARKER)
+        return "\n".join(kept)
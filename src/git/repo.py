@@ -0,0 +1,91 @@
+# src/git/repo.py
+import os
+import subprocess
+from typing import Dict, List, Optional, Set
+
+# Regular files in the git index, symlinks (120000) and submodules (160000) are skipped
+BLOB_MODES = {"100644", "100755"}
+
+def run_git(args: List[str], cwd: str = ".") -> Optional[str]:
+    # stdout of a git command, None when git is missing or the command fails
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True,
+            # Read-only, never take the index lock to refresh stat data
+            env=dict(os.environ, GIT_OPTIONAL_LOCKS="0")
+        )
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+def _paths(output: str) -> Set[str]:
+    return {path for path in output.split("\0") if path}
+
+def is_work_tree(cwd: str = ".") -> bool:
+    return (run_git(["rev-parse", "--is-inside-work-tree"], cwd) or "").strip() == "true"
+
+def head_commit(cwd: str = ".") -> Optional[str]:
+    out = run_git(["rev-parse", "--verify", "-q", "HEAD"], cwd)
+    return out.strip() if out else None
+
+def index_blobs(cwd: str = ".") -> Optional[Dict[str, str]]:
+    '''
+    Blob id of every regular file in the git index, keyed by path relative
+    to `cwd`. Read from .git/index alone, no file is opened. Conflicted
+    paths are left out, they have no single blob.
+    '''
+    out = run_git(["ls-files", "-s", "-z"], cwd)
+    if out is None:
+        return None
+    blobs = {}
+    for record in out.split("\0"):
+        if not record:
+            continue
+        info, path = record.split("\t", 1)
+        mode, blob, stage = info.split(" ")
+        if mode in BLOB_MODES and stage == "0":
+            blobs[path] = blob
+    return blobs
+
+def diff_tree(old: str, new: str, cwd: str = ".") -> Optional[Dict[str, Optional[str]]]:
+    '''
+    Paths that differ between two commits, with their blob id in `new`
+    (None when deleted), straight from the object database. None when
+    either commit is not available, e.g. in a shallow clone.
+    '''
+    out = run_git(["diff-tree", "-r", "-z", "--no-renames", "--relative", old, new], cwd)
+    if out is None:
+        return None
+    changes = {}
+    fields = out.split("\0")
+    # ":<old mode> <new mode> <old blob> <new blob> <status>" then the path
+    for meta, path in zip(fields[0::2], fields[1::2]):
+        if not meta.startswith(":"):
+            continue
+        _, new_mode, _, new_blob, status = meta[1:].split(" ")
+        changes[path] = new_blob if status != "D" and new_mode in BLOB_MODES else None
+    return changes
+
+def worktree_changes(cwd: str = ".", against: Optional[str] = None) -> Optional[Set[str]]:
+    # Paths whose working tree content differs from `against` (a commit), or from the index
+    args = ["diff", "--name-only", "--no-renames", "--no-ext-diff", "--relative", "-z"]
+    out = run_git(args + ([against, "--"] if against else ["--"]), cwd)
+    return _paths(out) if out is not None else None
+
+def untracked_files(cwd: str = ".") -> Optional[Set[str]]:
+    # Untracked files that are not ignored, relative to `cwd`
+    out = run_git(["ls-files", "--others", "--exclude-standard", "-z"], cwd)
+    return _paths(out) if out is not None else None
+
+def changed_since(commit: str, cwd: str = ".") -> Optional[Set[str]]:
+    '''
+    Paths (relative to `cwd`) whose working tree content may differ from
+    `commit`: committed, staged and unstaged changes, renames on both sides,
+    and untracked files that are not ignored. None when the commit is not
+    available, e.g. in a shallow clone.
+    '''
+    changed = worktree_changes(cwd, commit)
+    untracked = untracked_files(cwd)
+    if changed is None or untracked is None:
+        return None
+    return changed | untracked
@@ -1,9 +1,13 @@
+import json
 import os
 import requests
 from typing import List, Dict
+from src.telemetry import span
 
 class GitHubClient:
-    def __init__(self, token: str, repo: str, pr_number: int):
+    def __init__(self, token: str, repo: str, pr_number: int, session=None):
+        # A requests.Session (or anything with .post) can be passed in, plain requests otherwise
+        self.session = session or requests
         self.base_url = f"https://api.github.com/repos/{repo}"
         self.pr_number = pr_number
         self.headers = {
@@ -28,8 +32,9 @@ class GitHubClient:
         }
 
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
-            response.raise_for_status()
+            with span("post_review", comments=len(comments), bytes=len(json.dumps(payload))):
+                response = self.session.post(url, headers=self.headers, json=payload)
+                response.raise_for_status()
             print(f"Posted review with {len(comments)} comments.")
         except requests.exceptions.HTTPError as e:
             print(f"Failed to post review: {e}")
@@ -2,8 +2,8 @@ from typing import List, Dict
 from src.github.client import GitHubClient
 
 class PRCommenter:
-    def __init__(self, repo: str, pr_number: int, token: str):
-        self.client = GitHubClient(token, repo, pr_number)
+    def __init__(self, repo: str, pr_number: int, token: str, session=None):
+        self.client = GitHubClient(token, repo, pr_number, session=session)
 
     def post_comments(self, reviews: List[Dict]):
         # Converts internal review objects into GitHub API comments.
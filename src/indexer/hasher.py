@@ -1,9 +1,33 @@
 # src/indexer/hasher.py
 import hashlib
+import os
 
-def calculate_hash(file_path: str) -> str:
-    sha = hashlib.sha256()
+# Bigger reads mean fewer syscalls on large files
+CHUNK_SIZE = 1024 * 1024
+
+def _new_hasher(algorithm: str):
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake2b":
+        # Noticeably faster than sha256 on 64-bit CPUs, 128-bit digest is plenty for change detection
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == "mmh3":
+        # Non-cryptographic, fastest option. mmh3 ships with chromadb but is optional here
+        try:
+            import mmh3
+        except ImportError:
+            raise ValueError("mmh3 hashing requires the 'mmh3' package")
+        return mmh3.mmh3_x64_128(seed=0)
+    raise ValueError(f"{algorithm} is not a supported hash algorithm.")
+
+def calculate_hash(file_path: str, algorithm: str = "sha256") -> str:
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha.update(chunk)
-        return sha.hexdigest()
\ No newline at end of file
+        if algorithm == "git":
+            # The blob id git gives this content, sha1 over a "blob <size>" header and the bytes
+            hasher = hashlib.sha1()
+            hasher.update(b"blob %d\0" % os.fstat(f.fileno()).st_size)
+        else:
+            hasher = _new_hasher(algorithm)
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+        return hasher.digest().hex()
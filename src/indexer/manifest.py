@@ -0,0 +1,100 @@
+# src/indexer/manifest.py
+import hashlib
+import struct
+from importlib import metadata
+from typing import List, Optional
+
+from src.models.symbol import Symbol
+from src.storage.disk_cache import DiskCache
+
+# Bump when SymbolExtractor starts returning different symbols for the same source
+EXTRACTOR_VERSION = "1"
+
+# type code, start_line, end_line, start_byte, end_byte, name length
+_RECORD = struct.Struct("<BIIIIH")
+_TYPE_CODES = {"function": 0, "class": 1}
+_TYPE_NAMES = {code: name for name, code in _TYPE_CODES.items()}
+
+def grammar_version() -> str:
+    # Any grammar or binding upgrade can change the CST, so it invalidates the manifest
+    versions = [EXTRACTOR_VERSION]
+    for package in ("tree-sitter", "tree-sitter-python", "tree-sitter-java"):
+        try:
+            versions.append(metadata.version(package))
+        except metadata.PackageNotFoundError:
+            versions.append("none")
+    return "-".join(versions)
+
+class SymbolManifest:
+    '''
+    Content hash -> extracted symbols, persisted across runs.
+
+    Identical file contents (branch switches, reverts, vendored copies) skip
+    parsing and extraction entirely: symbol bodies are sliced back out of the
+    source by byte offset. Entries are packed binary records and the cache is
+    size bounded. Keys include the grammar version, so upgrading tree-sitter
+    or a grammar never serves stale symbols.
+    '''
+
+    def __init__(self, path: str = ".sentinel/cache/manifest.sqlite",
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.store = DiskCache(path, max_bytes=max_bytes)
+        self.version = grammar_version()
+
+    def make_key(self, language_id: str, source: bytes) -> str:
+        return f"{self.version}:{language_id}:{hashlib.sha256(source).hexdigest()}"
+
+    @staticmethod
+    def encode(symbols: List[Symbol]) -> bytes:
+        parts = [struct.pack("<I", len(symbols))]
+        for sym in symbols:
+            name = sym.name.encode("utf-8")
+            parts.append(_RECORD.pack(
+                _TYPE_CODES[sym.type], sym.start_line, sym.end_line,
+                sym.start_byte, sym.end_byte, len(name)
+            ))
+            parts.append(name)
+        return b"".join(parts)
+
+    @staticmethod
+    def decode(raw: bytes, source: bytes, file_path: str) -> List[Symbol]:
+        (count,) = struct.unpack_from("<I", raw, 0)
+        offset = 4
+        symbols = []
+        for _ in range(count):
+            type_code, start_line, end_line, start_byte, end_byte, name_len = _RECORD.unpack_from(raw, offset)
+            offset += _RECORD.size
+            name = raw[offset:offset + name_len].decode("utf-8")
+            offset += name_len
+
+            symbols.append(Symbol(
+                name=name,
+                type=_TYPE_NAMES[type_code],
+                content=source[start_byte:end_byte].decode("utf-8"),
+                start_line=start_line,
+                end_line=end_line,
+                file_path=file_path,
+                start_byte=start_byte,
+                end_byte=end_byte
+            ))
+        return symbols
+
+    def get(self, key: str, source: bytes, file_path: str) -> Optional[List[Symbol]]:
+        raw = self.store.get(key)
+        if raw is None:
+            return None
+        try:
+            return self.decode(raw, source, file_path)
+        except (struct.error, KeyError, UnicodeDecodeError):
+            return None # Treat a damaged entry as a miss
+
+    def put(self, key: str, symbols: List[Symbol]):
+        self.store.set(key, self.encode(symbols))
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
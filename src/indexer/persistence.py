@@ -5,13 +5,17 @@ import shutil
 import sqlite3
 
 def verify_db_integrity(db_path: str) -> bool:
-    full_path = os.path.join(db_path, "chroma.sqlite3")
     # Ensure it exists
     os.makedirs(db_path, exist_ok=True)
 
-    if not os.path.exists(full_path):
-        return True
-    
+    # Chroma's database, and the flat store's metadata when that backend is used
+    for name in ("chroma.sqlite3", "flat.sqlite3"):
+        full_path = os.path.join(db_path, name)
+        if os.path.exists(full_path) and not _sqlite_ok(full_path):
+            return False
+    return True
+
+def _sqlite_ok(full_path: str) -> bool:
     try:
         connection = sqlite3.connect(full_path)
         cursor = connection.cursor()
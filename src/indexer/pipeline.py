@@ -0,0 +1,331 @@
+# src/indexer/pipeline.py
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, List, Optional, Tuple
+
+from src.indexer.manifest import SymbolManifest
+from src.models.symbol import Symbol
+from src.parser.core import ParserEngine
+from src.parser.extractor import SymbolExtractor
+from src.telemetry import tracer
+
+LANG_MAP = {
+    ".py": "python",
+    ".java": "java"
+}
+
+# One ParserEngine (and manifest connection) per worker process, grammars are loaded once per worker
+_worker_parser: Optional[ParserEngine] = None
+_worker_manifest: Optional[SymbolManifest] = None
+
+def _init_worker(manifest_path: Optional[str] = None):
+    global _worker_parser, _worker_manifest
+    # Kept across runs, a long-lived process only loads the grammars once
+    if _worker_parser is None:
+        _worker_parser = ParserEngine()
+    _worker_manifest = None
+    if manifest_path:
+        try:
+            _worker_manifest = SymbolManifest(manifest_path)
+        except sqlite3.Error as e:
+            # The manifest only saves parsing, index without it
+            print(f"Symbol manifest unavailable ({e}), parsing every file")
+
+def warm_worker(manifest_path: Optional[str] = None):
+    # Loads the grammars before the first file, forked pool workers inherit them
+    _init_worker(manifest_path)
+
+def read_source(file_path: str) -> bytes:
+    # utf-8 with universal newlines, the same text open(path, 'r') gives us
+    with open(file_path, 'rb') as f:
+        text = f.read().decode("utf-8")
+    return text.replace("\r\n", "\n").replace("\r", "\n").encode("utf-8")
+
+def extract_file(file_path: str) -> Tuple[str, Optional[List[Symbol]], bool]:
+    # Runs inside a worker process, symbols are None for unsupported languages.
+    # The flag tells whether the symbols came from the manifest.
+    if _worker_parser is None:
+        _init_worker()
+
+    lang = LANG_MAP.get(os.path.splitext(file_path)[1])
+    if not lang:
+        return file_path, None, False
+
+    source = read_source(file_path)
+
+    key = None
+    if _worker_manifest:
+        key = _worker_manifest.make_key(lang, source)
+        try:
+            symbols = _worker_manifest.get(key, source, file_path)
+        except sqlite3.Error:
+            symbols = None # a busy cache is a miss, never a failed file
+        if symbols is not None:
+            return file_path, symbols, True
+
+    code = source.decode("utf-8")
+    tree = _worker_parser.parse(lang, code)
+    extractor = SymbolExtractor(code, language=_worker_parser.languages[lang])
+    symbols = extractor.extract(tree.root_node, file_path)
+
+    if _worker_manifest:
+        try:
+            _worker_manifest.put(key, symbols)
+        except sqlite3.Error:
+            pass # the next run parses it again
+    return file_path, symbols, False
+
+def _init_pool_worker(manifest_path: Optional[str] = None):
+    # Forked workers inherit the parent's spans, start clean so drain() only ships new ones
+    tracer.reset()
+    _init_worker(manifest_path)
+
+def _extract_and_drain(file_path: str):
+    # Pool entry point, ships the worker's spans back along with the result
+    return extract_file(file_path), tracer.drain()
+
+def build_records(symbols: List[Symbol]) -> Tuple[List[str], List[Dict]]:
+    ids = []
+    metadata = []
+    seen = set()
+    for sym in symbols:
+        uid = f"{sym.file_path}::{sym.name}"
+        # Same name twice in a file (overloads, methods of different classes):
+        # Chroma rejects duplicate ids in one upsert, so disambiguate by line
+        if uid in seen:
+            uid = f"{uid}@{sym.start_line}"
+        seen.add(uid)
+        ids.append(uid)
+
+        metadata.append({
+            "id": uid,
+            "file_path": sym.file_path,
+            "symbol_name": sym.name,
+            "type": sym.type,
+            "start_line": sym.start_line,
+            "end_line": sym.end_line,
+            "snippet": sym.content,
+            # Lets the next run skip re-embedding symbols whose body did not change
+            "content_hash": hashlib.sha256(sym.content.encode("utf-8")).hexdigest()[:32]
+        })
+    return ids, metadata
+
+class IndexPipeline:
+    '''
+    Staged indexer: parse -> embed -> upsert.
+
+    Files are parsed and symbols extracted on a process pool. Symbols from
+    many files are packed into embedding requests of up to `embed_batch_size`
+    snippets, with `embed_in_flight` requests running at once, and each
+    embedded batch is upserted in bulk. A file is only marked as indexed once
+    every one of its symbols has been stored.
+
+    Re-indexing is incremental per symbol: only new or changed symbols are
+    embedded, symbols that merely moved get their line numbers updated, and
+    symbols that no longer exist are deleted.
+
+    `start_method` picks how pool workers are started (fork, spawn,
+    forkserver), None keeps the platform default. A multi-threaded caller
+    such as the daemon must not fork.
+    '''
+
+    def __init__(self, scanner, store, embedder, workers: Optional[int] = None,
+                 embed_batch_size: int = 100, embed_in_flight: int = 4,
+                 progress_interval: float = 5.0, manifest_path: Optional[str] = None,
+                 start_method: Optional[str] = None):
+        self.scanner = scanner
+        self.store = store
+        self.embedder = embedder
+        self.workers = workers or os.cpu_count() or 1
+        self.embed_batch_size = embed_batch_size
+        self.embed_in_flight = max(1, embed_in_flight)
+        self.progress_interval = progress_interval
+        # Content hash -> symbols cache, lets identical sources skip tree-sitter entirely
+        self.manifest_path = manifest_path
+        self.start_method = start_method
+
+        self.stats = {"files": 0, "indexed": 0, "failed": 0, "symbols": 0,
+                      "unchanged": 0, "moved": 0, "deleted": 0, "manifest_hits": 0}
+
+    def run(self, file_paths: List[str]) -> Dict:
+        self._start = time.monotonic()
+        self._last_report = self._start
+        self._total = len(file_paths)
+
+        # Per-file bookkeeping: symbols still waiting for storage, and failures
+        self._remaining: Dict[str, int] = {}
+        self._failed = set()
+
+        self._buffer_ids: List[str] = []
+        self._buffer_meta: List[Dict] = []
+        self._in_flight: Dict[Future, Tuple[List[str], List[Dict]]] = {}
+
+        # What the store already holds for these files, one bulk lookup
+        self._existing = self.store.get_symbols_for_files(file_paths) if file_paths else {}
+
+        with ThreadPoolExecutor(max_workers=self.embed_in_flight) as embed_pool:
+            self._embed_pool = embed_pool
+            for file_path, symbols, cached, error in self._extract_all(file_paths):
+                self.stats["files"] += 1
+                self.stats["manifest_hits"] += cached
+                if error:
+                    print(f"Failed to index {file_path}: {error}")
+                    self.stats["failed"] += 1
+                elif symbols is not None:
+                    self._add_file(file_path, symbols)
+
+                # Store whatever finished embedding meanwhile, without blocking
+                self._collect([f for f in self._in_flight if f.done()])
+                self._report_progress()
+
+            # Drain the tail
+            self._flush_buffer()
+            while self._in_flight:
+                self._collect(wait(self._in_flight, return_when=FIRST_COMPLETED).done)
+
+        self.scanner.save_state()
+        self._report_progress(final=True)
+        return self.stats
+
+    def _extract_all(self, file_paths: List[str]):
+        # Small change sets are not worth the process pool startup cost
+        if self.workers <= 1 or len(file_paths) < 2 * self.workers:
+            _init_worker(self.manifest_path)
+            for file_path in file_paths:
+                try:
+                    yield (*extract_file(file_path), None)
+                except Exception as e:
+                    yield file_path, None, False, e
+            return
+
+        mp_context = multiprocessing.get_context(self.start_method) if self.start_method else None
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context,
+                                 initializer=_init_pool_worker, initargs=(self.manifest_path,)) as pool:
+            futures = {pool.submit(_extract_and_drain, path): path for path in file_paths}
+            for future in as_completed(futures):
+                try:
+                    result, spans = future.result()
+                    tracer.absorb(spans)
+                    yield (*result, None)
+                except Exception as e:
+                    yield futures[future], None, False, e
+
+    def _add_file(self, file_path: str, symbols: List[Symbol]):
+        ids, metadata = build_records(symbols)
+        stored = {s["id"]: s for s in self._existing.pop(file_path, [])}
+
+        # Symbol level diff against what is already stored
+        changed_ids, changed_meta = [], []
+        moved_ids, moved_meta = [], []
+        for uid, meta in zip(ids, metadata):
+            old = stored.get(uid)
+            if not old or old.get("content_hash") != meta["content_hash"]:
+                changed_ids.append(uid)
+                changed_meta.append(meta)
+            elif (int(old["start_line"]), int(old["end_line"])) != (meta["start_line"], meta["end_line"]):
+                moved_ids.append(uid)
+                moved_meta.append(meta)
+
+        vanished = sorted(set(stored) - set(ids))
+        if vanished:
+            self.store.delete_ids(vanished)
+            self.stats["deleted"] += len(vanished)
+        if moved_ids:
+            self.store.update_metadata(moved_ids, moved_meta)
+            self.stats["moved"] += len(moved_ids)
+        self.stats["unchanged"] += len(ids) - len(changed_ids) - len(moved_ids)
+
+        # If file is valid but empty (or nothing changed), it is still processed
+        if not changed_ids:
+            self._mark_done(file_path)
+            return
+
+        self._remaining[file_path] = len(changed_ids)
+        self._buffer_ids.extend(changed_ids)
+        self._buffer_meta.extend(changed_meta)
+
+        while len(self._buffer_ids) >= self.embed_batch_size:
+            self._flush_buffer(self.embed_batch_size)
+
+    def _flush_buffer(self, size: Optional[int] = None):
+        if not self._buffer_ids:
+            return
+        size = size or len(self._buffer_ids)
+        ids, self._buffer_ids = self._buffer_ids[:size], self._buffer_ids[size:]
+        metadata, self._buffer_meta = self._buffer_meta[:size], self._buffer_meta[size:]
+
+        # Backpressure: never queue more than embed_in_flight requests
+        while len(self._in_flight) >= self.embed_in_flight:
+            self._collect(wait(self._in_flight, return_when=FIRST_COMPLETED).done)
+
+        snippets = [m["snippet"] for m in metadata]
+        future = self._embed_pool.submit(self.embedder.embed_batch, snippets)
+        self._in_flight[future] = (ids, metadata)
+
+    def _collect(self, done):
+        for future in done:
+            ids, metadata = self._in_flight.pop(future)
+            files = [m["file_path"] for m in metadata]
+
+            try:
+                vectors = future.result()
+                if len(vectors) != len(ids):
+                    raise RuntimeError(f"got {len(vectors)} embeddings for {len(ids)} symbols")
+                # Symbols whose embedding failed come back as None, store the rest
+                stored = [vec is not None for vec in vectors]
+                keep = [i for i, ok in enumerate(stored) if ok]
+                if keep:
+                    self.store.upsert(
+                        ids=[ids[i] for i in keep],
+                        vectors=[vectors[i] for i in keep],
+                        metadata=[metadata[i] for i in keep]
+                    )
+                if len(keep) < len(ids):
+                    print(f"Failed to embed {len(ids) - len(keep)} of {len(ids)} symbols")
+            except Exception as e:
+                print(f"Failed to store batch of {len(ids)} symbols: {e}")
+                stored = [False] * len(ids)
+
+            for file_path, ok in zip(files, stored):
+                self._remaining[file_path] -= 1
+                if ok:
+                    self.stats["symbols"] += 1
+                else:
+                    self._failed.add(file_path)
+                if self._remaining[file_path] == 0:
+                    del self._remaining[file_path]
+                    if file_path in self._failed:
+                        # Leave it out of the state so the next run retries it
+                        self._failed.discard(file_path)
+                        self.stats["failed"] += 1
+                        print(f"Failed to index {file_path}")
+                    else:
+                        self._mark_done(file_path)
+
+    def _mark_done(self, file_path: str):
+        self.scanner.update_state(file_path)
+        self.stats["indexed"] += 1
+
+    def _report_progress(self, final: bool = False):
+        now = time.monotonic()
+        if not final and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+
+        elapsed = max(now - self._start, 1e-9)
+        print(
+            f"{'Indexed' if final else 'Progress:'} {self.stats['files']}/{self._total} files, "
+            f"{self.stats['symbols']} symbols in {elapsed:.1f}s "
+            f"({self.stats['files'] / elapsed:.1f} files/s, {self.stats['symbols'] / elapsed:.1f} symbols/s)"
+            + (f", {self.stats['failed']} failed" if self.stats['failed'] else "")
+        )
+        if final:
+            print(
+                f"Symbols: {self.stats['symbols']} embedded, {self.stats['unchanged']} unchanged, "
+                f"{self.stats['moved']} moved, {self.stats['deleted']} deleted "
+                f"({self.stats['manifest_hits']} files served from the symbol manifest)"
+            )
@@ -1,29 +1,195 @@
 # src/indexer/scanner.py
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from .hasher import calculate_hash
+from .state_store import StateStore
+from src.git import repo as git
+from src.telemetry import span
+
+# Change keys in git mode are blob ids, see calculate_hash()
+GIT_ALGORITHM = "git"
 
 class Scanner:
-    def __init__(self, state_path: str = ".sentinel/hashes.json"):
+    IGNORED_DIRS = {".venv", "venv", "__pycache__", "__init__", ".git", ".sentinel", "node_modules"}
+    SUPPORTED_EXTS = {".py", ".java"}
+    IGNORED_FILES = {"__init__.py"}
+
+    def __init__(self, state_path: str = ".sentinel/state.db", hash_algorithm: str = "sha256",
+                 max_workers: int = 8, legacy_state_path: str = ".sentinel/hashes.json",
+                 batch_size: int = 100, use_git: bool = False):
         self.state_path = state_path
-        self.state = self._load_state()
+        self.hash_algorithm = hash_algorithm
+        self.max_workers = max_workers
+        # Inside a git work tree, take change keys from git instead of hashing every file
+        self.use_git = use_git
+        # The algorithm the last scan keyed files with, git blob ids in git mode
+        self.algorithm = hash_algorithm
 
-    def _load_state(self) -> dict:
-        try:
-            with open(self.state_path, 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            print("JSON file not found.")
-            return {}
+        # SQLite backed, imports the old hashes.json on first use
+        self.store = StateStore(state_path, legacy_json_path=legacy_state_path, batch_size=batch_size)
+        self.state = self.store.load()
+
+        # Hash and stat data captured during scan(), used by update_state()
+        self.scanned = {}
+        # Files that disappeared since the last run, see forget_deleted()
+        self.deleted_files = []
+        # Counts from the last scan()
+        self.last_scan = {}
+        # (HEAD, paths to re-check) recorded by close() after a git scan
+        self._git_scan = None
+        # Changed files not yet passed to update_state()
+        self._pending = set()
+
+    @staticmethod
+    def _stat_key(st: os.stat_result) -> dict:
+        return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "inode": st.st_ino}
+
+    def _is_unchanged_on_disk(self, entry: dict, st: os.stat_result) -> bool:
+        # Same algorithm and identical mtime/size/inode -> trust the stored hash without reading
+        if not entry or entry.get("algo") != self.algorithm:
+            return False
+        return (entry.get("mtime_ns") == st.st_mtime_ns
+                and entry.get("size") == st.st_size
+                and entry.get("inode") == st.st_ino)
 
     def scan(self, directory: str) -> list[str]:
-        ignored_dirs = {".venv", "venv", "__pycache__", "__init__", ".git", ".sentinel", "node_modules"}
-        supported_exts = {".py", ".java"}
-        ignored_files = {"__init__.py"}
+        with span("scan") as s:
+            changed_files = self._scan_git(directory) if self.use_git and git.is_work_tree(directory) else None
+            if changed_files is None:
+                # Not a git checkout (or git failed), walk and hash
+                changed_files = self._scan(directory)
+            s.set(**self.last_scan)
+        self._pending = set(changed_files)
+        return changed_files
+
+    def _indexable(self, directory: str, full_path: str) -> bool:
+        # The walk's filters, applied to a path under `directory`
+        parts = os.path.relpath(full_path, directory).split(os.sep)
+        return (parts[-1] not in self.IGNORED_FILES
+                and os.path.splitext(parts[-1])[1] in self.SUPPORTED_EXTS
+                and not self.IGNORED_DIRS.intersection(parts[:-1]))
+
+    def _scan_git(self, directory: str) -> Optional[list[str]]:
+        '''
+        Change detection from git, returns None when git can't answer.
+
+        Tracked files are keyed by their blob id, taken from git rather than
+        computed. With the commit of the last scan on record, only the paths
+        `git diff-tree` reports between it and HEAD are looked at, plus
+        anything that differed from HEAD last time. Otherwise every blob id
+        in the git index is compared with the state, still without reading
+        a file. Files that differ from HEAD in the working tree, and
+        untracked files, are hashed like in walk mode.
+        '''
+        head = git.head_commit(directory)
+        last = self.store.get_meta("last_indexed_commit")
+        recheck = json.loads(self.store.get_meta("recheck_paths") or "null")
+
+        dirty = git.worktree_changes(directory, head)
+        untracked = git.untracked_files(directory)
+        if dirty is None or untracked is None:
+            return None
+
+        committed = git.diff_tree(last, head, directory) if head and last and recheck is not None else None
+        if committed is not None:
+            # Only what moved since the last scan
+            blobs = {path: blob for path, blob in committed.items() if blob}
+            candidates = set(committed) | dirty | untracked
+            candidates = {self._state_key(directory, path) for path in candidates} | set(recheck)
+            mode = "git-diff"
+        else:
+            blobs = git.index_blobs(directory)
+            if blobs is None:
+                return None
+            candidates = {self._state_key(directory, path) for path in set(blobs) | untracked}
+            # Paths gone from both the index and the disk are found through the state
+            candidates |= set(self.state)
+            mode = "git-index"
+
+        blobs = {self._state_key(directory, path): blob for path, blob in blobs.items()}
+        hash_locally = {self._state_key(directory, path) for path in dirty | untracked}
+
+        self.algorithm = GIT_ALGORITHM
+        changed_files = []
+        seen_files = set()
+        to_hash = []
+        for full_path in sorted(candidates):
+            if not self._indexable(directory, full_path):
+                continue
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            seen_files.add(full_path)
+            entry = self.state.get(full_path)
+
+            if full_path in blobs and full_path not in hash_locally:
+                self._compare(full_path, entry, blobs[full_path], st, changed_files)
+            elif not self._is_unchanged_on_disk(entry, st):
+                to_hash.append((full_path, st))
+
+        with span("hash", files=len(to_hash), bytes=sum(st.st_size for _, st in to_hash)):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                hashes = list(pool.map(lambda item: calculate_hash(item[0], GIT_ALGORITHM), to_hash))
+        for (full_path, st), blob in zip(to_hash, hashes):
+            self._compare(full_path, self.state.get(full_path), blob, st, changed_files, hashed=True)
+
+        # Candidates that no longer exist, kept until forget_deleted() like in walk mode
+        self.deleted_files = sorted(path for path in candidates if path in self.state and path not in seen_files)
+        for path in self.deleted_files:
+            del self.state[path]
+
+        # Whatever differs from HEAD now has to be looked at again next time, even once it is gone
+        recheck = {path for path in hash_locally if self._indexable(directory, path)}
+        self._git_scan = (head, recheck)
+        self.last_scan = {"files": len(seen_files), "hashed": len(to_hash), "changed": len(changed_files),
+                          "deleted": len(self.deleted_files), "mode": mode}
+        return sorted(changed_files)
+
+    @staticmethod
+    def _state_key(directory: str, rel_path: str) -> str:
+        return os.path.normpath(os.path.join(directory, rel_path))
+
+    def _compare(self, full_path: str, entry: Optional[dict], blob: str, st: os.stat_result,
+                 changed_files: list, hashed: bool = False):
+        scanned = {"hash": blob, "algo": GIT_ALGORITHM, **self._stat_key(st)}
+        self.scanned[full_path] = scanned
+        if entry and entry.get("algo") == GIT_ALGORITHM:
+            if entry.get("hash") != blob:
+                changed_files.append(full_path)
+            elif hashed and not self._is_unchanged_on_disk(entry, st):
+                # Read for nothing, refresh stat data so the next scan skips it
+                self.state[full_path] = scanned
+                self.store.put(full_path, scanned)
+            return
+        if entry and self._same_content(full_path, entry, st):
+            # Keyed by another algorithm before, adopt the blob id without re-indexing
+            self.state[full_path] = scanned
+            self.store.put(full_path, scanned)
+            return
+        changed_files.append(full_path)
+
+    def _same_content(self, full_path: str, entry: dict, st: os.stat_result) -> bool:
+        if (entry.get("mtime_ns"), entry.get("size"), entry.get("inode")) == tuple(self._stat_key(st).values()):
+            return True
+        try:
+            return calculate_hash(full_path, entry.get("algo", "sha256")) == entry.get("hash")
+        except (OSError, ValueError):
+            return False
+
+    def _scan(self, directory: str) -> list[str]:
+        ignored_dirs = self.IGNORED_DIRS
+        supported_exts = self.SUPPORTED_EXTS
+        ignored_files = self.IGNORED_FILES
+        self.algorithm = self.hash_algorithm
+        self._git_scan = None
 
         # Returns a list of file paths that have changed or are new
         changed_files = []
         seen_files = set() # Track files currently on disk
+        to_hash = [] # (path, stat) for files whose stat data no longer matches
 
         for (root,dirs,files) in os.walk(directory, topdown=True):
             # Modify dirs so that it ignores things that should never be indexed
@@ -39,24 +205,80 @@ class Scanner:
                     full_path = os.path.normpath(os.path.join(root, file))
                     seen_files.add(full_path)
 
-                    hash = calculate_hash(full_path)
+                    try:
+                        st = os.stat(full_path)
+                    except OSError:
+                        continue
+
+                    if not self._is_unchanged_on_disk(self.state.get(full_path), st):
+                        to_hash.append((full_path, st))
+
+        # Only files whose stat data moved get read, and those are hashed in parallel
+        with span("hash", files=len(to_hash), bytes=sum(st.st_size for _, st in to_hash)):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                hashes = list(pool.map(
+                    lambda item: calculate_hash(item[0], self.hash_algorithm),
+                    to_hash
+                ))
+
+        for (full_path, st), hash in zip(to_hash, hashes):
+            entry = self.state.get(full_path)
+            self.scanned[full_path] = {"hash": hash, "algo": self.hash_algorithm, **self._stat_key(st)}
 
-                    # Since the hash changed, we can add it to the list of changed_files
-                    if hash!= self.state.get(full_path):
-                        changed_files.append(full_path)
+            # Since the hash changed, we can add it to the list of changed_files
+            if not entry or hash != entry.get("hash") or entry.get("algo") != self.hash_algorithm:
+                changed_files.append(full_path)
+            else:
+                # Touched but identical content, refresh stat data so the next scan skips it
+                self.state[full_path] = self.scanned[full_path]
+                self.store.put(full_path, self.scanned[full_path])
 
-        # Deletion cleanup- remove files from state if they do not exist
-        deleted_files = set(self.state.keys()) - seen_files
-        for path in deleted_files:
+        # Deletion cleanup- remove files from state if they do not exist.
+        # They stay in the store until forget_deleted(), so a crash before their
+        # vectors are purged reports them again on the next scan.
+        self.deleted_files = sorted(set(self.state.keys()) - seen_files)
+        for path in self.deleted_files:
             del self.state[path]
 
-        return changed_files
+        self.last_scan = {"files": len(seen_files), "hashed": len(to_hash),
+                          "changed": len(changed_files), "deleted": len(self.deleted_files)}
+        return sorted(changed_files)
+
+    def update_state(self, file_path: str, new_hash: str = None):
+        # Prefer the hash + stat captured at scan time, so an edit made while
+        # indexing changes the stat data and is picked up by the next scan
+        entry = self.scanned.get(file_path)
+        if entry is None or (new_hash is not None and new_hash != entry["hash"]):
+            st = os.stat(file_path)
+            entry = {
+                "hash": new_hash or calculate_hash(file_path, self.algorithm),
+                "algo": self.algorithm,
+                **self._stat_key(st)
+            }
+
+        # Update in memory dict, the store commits in batches
+        self.state[file_path] = entry
+        self.store.put(file_path, entry)
+        self._pending.discard(file_path)
+
+    def forget_deleted(self):
+        for path in self.deleted_files:
+            self.store.delete(path)
+        self.deleted_files = []
+        # Counts from the last scan()
+        self.last_scan = {}
 
-    def update_state(self, file_path: str, new_hash: str):
-        # Update in memory dict & ensure it actually exists
-        self.state[file_path] = new_hash
-        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+    def save_state(self):
+        # Flush any staged updates in one transaction
+        self.store.commit()
 
-        # Write back to the JSON file
-        with open(self.state_path, 'w') as f:
-            json.dump(self.state, f, indent=4)
\ No newline at end of file
+    def close(self):
+        if self._git_scan is not None:
+            head, recheck = self._git_scan
+            # Files that failed to index and deletions not purged yet are retried next time
+            recheck = sorted(recheck | self._pending | set(self.deleted_files))
+            self.store.commit()
+            self.store.set_meta("recheck_paths", json.dumps(recheck))
+            if head:
+                self.store.set_meta("last_indexed_commit", head)
+        self.store.close()
@@ -0,0 +1,235 @@
+# src/indexer/snapshot.py
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from typing import Dict, Optional
+
+from src.git.repo import changed_since, head_commit
+from src.indexer.scanner import Scanner
+from src.indexer.state_store import StateStore
+
+SNAPSHOT_FORMAT = "sentinelpr-index"
+# Bump when the layout changes, older readers refuse newer snapshots
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "snapshot.json"
+
+SQLITE_SUFFIXES = (".sqlite3", ".sqlite", ".db")
+
+class SnapshotError(Exception):
+    pass
+
+def snapshot_key(commit: str, backend_id: str) -> str:
+    # Cache key / file stem, e.g. sentinelpr-index-v1-gemini-models-text-embedding-004-<sha>
+    model = re.sub(r"[^A-Za-z0-9.]+", "-", backend_id).strip("-")
+    return f"{SNAPSHOT_FORMAT}-v{SNAPSHOT_VERSION}-{model}-{commit}"
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _copy(src: str, dst: str):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if src.endswith(SQLITE_SUFFIXES):
+        # Online backup, a consistent copy even with a WAL that was never checkpointed
+        source = sqlite3.connect(src)
+        target = sqlite3.connect(dst)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    else:
+        shutil.copy2(src, dst)
+
+def _remove(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    else:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+def export_snapshot(out_path: str, store, store_name: str, persist_dir: str = ".sentinel/db",
+                    state_path: str = ".sentinel/state.db",
+                    manifest_path: Optional[str] = ".sentinel/cache/manifest.sqlite") -> Dict:
+    '''
+    Packs the vector store, the scanner state and the symbol manifest into
+    one gzipped tarball at `out_path`.
+
+    `snapshot.json` comes first in the archive. It records the commit the
+    index was built from, the embedding model, and a sha256 for every other
+    member. Files that differed from that commit at export time are listed
+    too, so an import re-checks them. Returns the manifest.
+    '''
+    commit = head_commit()
+    if commit is None:
+        raise SnapshotError("Snapshots are keyed by commit, run the export inside a git checkout")
+    backend_id, dimension = store.embedding_backend()
+    if backend_id is None:
+        raise SnapshotError(f"Nothing to export, the index in {persist_dir} is empty")
+    if not os.path.exists(state_path):
+        raise SnapshotError(f"Nothing to export, {state_path} does not exist")
+
+    sources = {}
+    for root, _, files in os.walk(persist_dir):
+        for name in files:
+            if name.endswith(("-wal", "-shm", ".lock")):
+                continue
+            full_path = os.path.join(root, name)
+            sources["db/" + os.path.relpath(full_path, persist_dir).replace(os.sep, "/")] = full_path
+    sources["state.db"] = state_path
+    if manifest_path and os.path.exists(manifest_path):
+        sources["cache/manifest.sqlite"] = manifest_path
+
+    state = StateStore(state_path, legacy_json_path=None)
+    indexed = set(state.load())
+    state.close()
+    dirty = changed_since(commit)
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=out_dir)
+    try:
+        # Copied first, the checksums have to cover exactly what gets archived
+        for name, src in sources.items():
+            _copy(src, os.path.join(staging, name))
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "key": snapshot_key(commit, backend_id),
+            "commit": commit,
+            "embedding_backend": backend_id,
+            "embedding_dimension": dimension,
+            "store": store_name,
+            "symbols": store.count(),
+            "created": time.time(),
+            # None when git could not tell, every file is re-checked then
+            "dirty_files": sorted(dirty & indexed) if dirty is not None else None,
+            "files": {
+                name: {"sha256": _sha256(os.path.join(staging, name)),
+                       "size": os.path.getsize(os.path.join(staging, name))}
+                for name in sorted(sources)
+            }
+        }
+        manifest_file = os.path.join(staging, MANIFEST_NAME)
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        tmp_path = out_path + ".tmp"
+        with tarfile.open(tmp_path, "w:gz", compresslevel=6) as tar:
+            tar.add(manifest_file, arcname=MANIFEST_NAME)
+            for name in manifest["files"]:
+                tar.add(os.path.join(staging, name), arcname=name)
+        os.replace(tmp_path, out_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return manifest
+
+def read_manifest(tar: tarfile.TarFile) -> Dict:
+    member = tar.next()
+    if member is None or member.name != MANIFEST_NAME:
+        raise SnapshotError(f"Not a SentinelPR snapshot, {MANIFEST_NAME} is missing")
+    try:
+        manifest = json.load(tar.extractfile(member))
+    except ValueError as e:
+        raise SnapshotError(f"Unreadable {MANIFEST_NAME}: {e}")
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Not a SentinelPR snapshot: {manifest.get('format')}")
+    if manifest.get("version", 0) > SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot version {manifest['version']} is newer than this SentinelPR supports")
+    return manifest
+
+def import_snapshot(path: str, persist_dir: str = ".sentinel/db", state_path: str = ".sentinel/state.db",
+                    manifest_path: Optional[str] = ".sentinel/cache/manifest.sqlite",
+                    backend_id: Optional[str] = None, store_name: Optional[str] = None) -> Dict:
+    '''
+    Restores a snapshot written by export_snapshot(), replacing the current
+    index, state and symbol manifest, and returns its manifest.
+
+    Every member is checked against its sha256 before anything is replaced.
+    Then, for each file that git says is identical to the snapshot's
+    commit, the stored stat data is refreshed, so the next scan trusts the
+    stored hash without reading the file. Only files that differ from that
+    commit are re-hashed and re-indexed.
+    '''
+    sentinel_dir = os.path.dirname(os.path.abspath(state_path))
+    os.makedirs(sentinel_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=sentinel_dir)
+    try:
+        try:
+            with tarfile.open(path, "r:gz") as tar:
+                manifest = read_manifest(tar)
+                if backend_id and manifest["embedding_backend"] != backend_id:
+                    raise SnapshotError(
+                        f"Snapshot was embedded with {manifest['embedding_backend']}, not {backend_id}"
+                    )
+                if store_name and manifest["store"] != store_name:
+                    raise SnapshotError(f"Snapshot holds a {manifest['store']} store, not {store_name}")
+
+                expected = manifest["files"]
+                for member in tar:
+                    if member.name == MANIFEST_NAME:
+                        continue
+                    if member.name not in expected or not member.isfile():
+                        raise SnapshotError(f"Unexpected member in snapshot: {member.name}")
+                    tar.extract(member, staging, filter="data")
+        except (OSError, tarfile.TarError, EOFError) as e:
+            raise SnapshotError(f"Cannot read snapshot {path}: {e}")
+
+        for name, entry in expected.items():
+            staged = os.path.join(staging, name)
+            if not os.path.exists(staged):
+                raise SnapshotError(f"Snapshot is missing {name}")
+            if _sha256(staged) != entry["sha256"]:
+                raise SnapshotError(f"Checksum mismatch for {name}, the snapshot is corrupted")
+
+        # Everything checked out, swap it in
+        _remove(persist_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(persist_dir)), exist_ok=True)
+        shutil.move(os.path.join(staging, "db"), persist_dir)
+        _remove(state_path)
+        os.replace(os.path.join(staging, "state.db"), state_path)
+        if manifest_path:
+            _remove(manifest_path)
+            if "cache/manifest.sqlite" in expected:
+                os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+                os.replace(os.path.join(staging, "cache/manifest.sqlite"), manifest_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    manifest["trusted_files"] = _trust_unchanged(manifest, state_path)
+    return manifest
+
+def _trust_unchanged(manifest: Dict, state_path: str) -> int:
+    # Refreshes stat data for files identical to the snapshot's commit, returns how many
+    changed = changed_since(manifest["commit"])
+    if changed is None or manifest.get("dirty_files") is None:
+        print(f"Commit {manifest['commit'][:12]} is not available here, every file will be re-hashed.")
+        return 0
+    changed.update(manifest["dirty_files"])
+
+    state = StateStore(state_path, legacy_json_path=None)
+    trusted = 0
+    for path, entry in state.load().items():
+        if path in changed:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue # deleted, the next scan purges it
+        state.put(path, {**entry, **Scanner._stat_key(st)})
+        trusted += 1
+    state.set_meta("snapshot_commit", manifest["commit"])
+    state.close()
+    return trusted
@@ -0,0 +1,127 @@
+# src/indexer/state_store.py
+import json
+import os
+import sqlite3
+from typing import Dict, Optional
+
+class StateStore:
+    '''
+    Crash-safe, transactional storage for the scanner's per-file state.
+
+    Backed by SQLite in WAL mode. Updates are staged in memory and written in
+    batched transactions, so indexing N files no longer rewrites the whole
+    state N times, and a crash only loses the uncommitted batch.
+    '''
+
+    def __init__(self, path: str = ".sentinel/state.db",
+                 legacy_json_path: Optional[str] = ".sentinel/hashes.json",
+                 batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = {} # path -> entry, or None for a deletion
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            self._conn = self._open()
+        except sqlite3.DatabaseError as e:
+            # Losing the state only costs a re-index, never block the run on it
+            print(f"State DB corrupted ({e}), starting fresh: {path}")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            self._conn = self._open()
+
+        if legacy_json_path:
+            self._migrate_from_json(legacy_json_path)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, hash TEXT NOT NULL, algo TEXT NOT NULL, "
+            "mtime_ns INTEGER, size INTEGER, inode INTEGER)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("PRAGMA quick_check").fetchone()
+        return conn
+
+    def _migrate_from_json(self, json_path: str):
+        if self.get_meta("migrated_from_json") or not os.path.exists(json_path):
+            return
+
+        try:
+            with open(json_path, 'r') as f:
+                legacy = json.load(f)
+        except (ValueError, OSError) as e:
+            # A half-written hashes.json is exactly what this store replaces
+            print(f"Ignoring unreadable legacy state {json_path}: {e}")
+            legacy = {}
+
+        for path, entry in legacy.items():
+            # Oldest format maps path -> sha256 hex digest
+            if isinstance(entry, str):
+                entry = {"hash": entry, "algo": "sha256"}
+            self._pending[path] = entry
+
+        # Mark as migrated only once the entries are committed
+        self.commit()
+        self.set_meta("migrated_from_json", json_path)
+        print(f"Migrated {len(legacy)} entries from {json_path}")
+
+    def load(self) -> Dict[str, dict]:
+        state = {}
+        for path, hash, algo, mtime_ns, size, inode in self._conn.execute(
+            "SELECT path, hash, algo, mtime_ns, size, inode FROM files"
+        ):
+            state[path] = {"hash": hash, "algo": algo, "mtime_ns": mtime_ns, "size": size, "inode": inode}
+        return state
+
+    def put(self, path: str, entry: dict):
+        self._pending[path] = entry
+        if len(self._pending) >= self.batch_size:
+            self.commit()
+
+    def delete(self, path: str):
+        self._pending[path] = None
+        if len(self._pending) >= self.batch_size:
+            self.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def commit(self):
+        if not self._pending:
+            return
+
+        upserts = [
+            (path, e["hash"], e.get("algo", "sha256"), e.get("mtime_ns"), e.get("size"), e.get("inode"))
+            for path, e in self._pending.items() if e is not None
+        ]
+        deletes = [(path,) for path, e in self._pending.items() if e is None]
+
+        # One transaction per batch, all or nothing
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, hash, algo, mtime_ns, size, inode) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                upserts
+            )
+            self._conn.executemany("DELETE FROM files WHERE path = ?", deletes)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+
+    def close(self):
+        self.commit()
+        # Fold the WAL back into the main file so caching .sentinel/state.db alone is enough
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
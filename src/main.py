@@ -3,150 +3,337 @@ import sys
 import argparse
 import traceback
 import json
+from typing import TYPE_CHECKING
 
-# --- Core Modules ---
-from src.indexer.scanner import Scanner
-from src.parser.core import ParserEngine
-from src.parser.extractor import SymbolExtractor
-from src.indexer.hasher import calculate_hash
-from src.indexer.persistence import verify_db_integrity, reset_db
-from src.storage.vector_store import VectorStore
-from src.ai.embedder import Embedder
-
-# --- Audit Modules ---
-from src.git.diff_parser import DiffParser
-from src.orchestrator.mapper import Mapper
-from src.orchestrator.retriever import ContextRetriever
-from src.ai.auditor import Auditor
-from src.github.commenter import PRCommenter
-from src.validator.schema_guard import SchemaGuard
-
-def run_indexer():
-    print("---|| SentinelPR Indexer Started ||---")
-    if not verify_db_integrity(".sentinel/db"):
-        reset_db(".sentinel/db")
+# Everything else is imported by the command that needs it. chromadb, the
+# Gemini SDK and requests take about a second to load, `--help`, `stats` or
+# an index run with nothing to do never pay for them.
+from src.telemetry import tracer
 
-    LANG_MAP = {
-        ".py": "python", 
-        ".java": "java"
-    }
+if TYPE_CHECKING:
+    from src.orchestrator.workspace import Workspace
+
+COMMANDS = ("index", "audit", "stats", "compact", "serve", "export", "import")
 
-    # Initialize the components
-    scanner = Scanner()
-    parser = ParserEngine()
-    store = VectorStore()
-    embedder = Embedder()
+# Tunables: setting -> (environment variable, default). Read when used, never at
+# import, so a bad value is a usage error rather than a traceback on --help
+SETTINGS = {
+    "workers": ("SENTINEL_INDEX_WORKERS", str(os.cpu_count() or 1)),
+    "embed_in_flight": ("SENTINEL_EMBED_IN_FLIGHT", "4"),
+    "concurrency": ("SENTINEL_CONCURRENCY", "4"),
+    "diff_context": ("SENTINEL_DIFF_CONTEXT", "3"),
+    "diff_budget": ("SENTINEL_DIFF_BUDGET", "8000"),
+    "context_budget": ("SENTINEL_CONTEXT_TOKENS", "2000"),
+    "batch_symbols": ("SENTINEL_BATCH_SYMBOLS", "8"),
+    "batch_tokens": ("SENTINEL_BATCH_TOKENS", "6000"),
+    "port": ("SENTINEL_PORT", "8750"),
+}
+
+def env_default(setting: str) -> str:
+    # The raw string, argparse converts it with the option's type and reports a bad one
+    variable, default = SETTINGS[setting]
+    return os.getenv(variable, default)
+
+def setting(value, name: str) -> int:
+    # An explicit value wins, the environment covers callers that bypass argparse
+    if value is not None:
+        return value
+    raw = env_default(name)
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{SETTINGS[name][0]} must be an integer, got {raw!r}")
+
+def run_indexer(use_cache: bool = True, workers: int = None,
+                embed_in_flight: int = None, workspace: "Workspace" = None,
+                start_method: str = None) -> dict:
+    from src.indexer.scanner import Scanner
+    from src.orchestrator.workspace import Workspace
+
+    print("---|| SentinelPR Indexer Started ||---")
+    # Initialize the components, the daemon passes in warm ones. The store
+    # and the embedder are only built once there is something to do with them.
+    workspace = workspace or Workspace(use_cache=use_cache, embed_in_flight=setting(embed_in_flight, "embed_in_flight"),
+                                       verify_store=True)
+    # Git blob ids are the change keys inside a checkout, SENTINEL_SCANNER=walk hashes every file instead.
+    # SENTINEL_HASH=blake2b|mmh3 trades sha256 for a faster hash where files are hashed.
+    scanner = Scanner(
+        hash_algorithm=os.getenv("SENTINEL_HASH", "sha256"),
+        use_git=os.getenv("SENTINEL_SCANNER", "git").lower() == "git"
+    )
     
     print("Scanning for changes...")
     changed_files = scanner.scan(".")
+
+    # Vectors go first, the state only forgets a file once its symbols are gone
+    if scanner.deleted_files:
+        print(f"Purging {len(scanner.deleted_files)} deleted files from the index...")
+        workspace.store.delete_files(scanner.deleted_files)
+        scanner.forget_deleted()
     
     if not changed_files:
+        # Still persist refreshed stat data and deletions
+        scanner.close()
         print("No files changed. Skipping index.")
-        return
+        return {"files": 0}
 
     print(f"Found {len(changed_files)} files to process.")
 
-    for file_path in changed_files:
-        try:
-            # Filter by language
-            ext = os.path.splitext(file_path)[1]
-            lang = LANG_MAP.get(ext)
-            if not lang:
-                continue
+    from src.indexer.pipeline import IndexPipeline
+    pipeline = IndexPipeline(
+        scanner, workspace.store, workspace.embedder,
+        workers=setting(workers, "workers"),
+        embed_in_flight=workspace.embed_in_flight,
+        manifest_path=workspace.manifest_path,
+        start_method=start_method
+    )
+    stats = pipeline.run(changed_files)
 
-            with open(file_path, 'r') as f:
-                code = f.read()
-            
-            # Parse tree
-            tree = parser.parse(lang, code)
-            extractor = SymbolExtractor(code)
-            symbols = extractor.extract(tree.root_node, file_path)
-
-            # If file is valid but empty, it is still processed
-            if not symbols:
-                scanner.update_state(file_path, calculate_hash(file_path))
-                continue
-            
-            # Snippets to directly map content
-            snippets = [s.content for s in symbols]
-            vectors = embedder.embed_batch(snippets)
-
-            # Prepare metadata
-            ids = []
-            metadata = []
-            for sym, vec in zip(symbols, vectors):
-                uid = f"{sym.file_path}::{sym.name}"
-                ids.append(uid)
-
-                metadata.append({
-                    "id": uid,
-                    "file_path": sym.file_path,
-                    "symbol_name": sym.name,
-                    "type": sym.type,
-                    "start_line": sym.start_line,
-                    "end_line": sym.end_line,
-                    "snippet": sym.content
-                })
-
-            store.upsert(ids=ids, vectors=vectors, metadata=metadata)
-            scanner.update_state(file_path, calculate_hash(file_path))
-            print(f"Indexed {file_path}")
-
-        except Exception as e:
-            print(f"Failed to index {file_path}: {e}")
-            continue # Move onto the next file
+    scanner.close()
+    if workspace.embedding_cache:
+        print(f"Embedding cache: {workspace.embedding_cache.hits} hits, {workspace.embedding_cache.misses} misses.")
     print("---|| SentinelPR Indexer Complete ||---")
+    return stats
 
-def run_auditor(diff_path: str, repo: str = None, pr: int = None, token: str = None):
-    print("---|| SentinelPR Auditor Started ||---")
+def run_compact():
+    from src.storage.vector_store import make_store
+
+    print("---|| SentinelPR Compaction Started ||---")
+    store = make_store()
+
+    # Anything whose file is gone from disk is stale, whatever the scanner state says
+    orphans = sorted(p for p in store.list_file_paths() if not os.path.exists(p))
+    if orphans:
+        print(f"Purging {len(orphans)} files that no longer exist...")
+        store.delete_files(orphans)
+
+    before = _dir_size(store.persist_dir)
+    store.compact()
+    after = _dir_size(store.persist_dir)
+    print(f"Index size: {before / 1e6:.1f}MB -> {after / 1e6:.1f}MB")
+    print("---|| SentinelPR Compaction Complete ||---")
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def run_stats(as_json: bool = False, persist_dir: str = ".sentinel/db", state_path: str = ".sentinel/state.db") -> dict:
+    # Reads what is on disk, never creates an index that isn't there
+    stats = {
+        "store": os.getenv("SENTINEL_VECTOR_STORE", "chroma").lower(),
+        "files": 0,
+        "symbols": 0,
+        "index_bytes": _dir_size(persist_dir),
+        "cache_bytes": _dir_size(".sentinel/cache")
+    }
+    if os.path.exists(state_path):
+        from src.indexer.state_store import StateStore
+        state = StateStore(state_path, legacy_json_path=None)
+        stats["files"] = len(state.load())
+        state.close()
+    if os.path.isdir(persist_dir):
+        from src.storage.vector_store import make_store
+        store = make_store(stats["store"], persist_dir=persist_dir)
+        stats["symbols"] = store.count()
+        if hasattr(store, "close"):
+            store.close()
+
+    if as_json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(f"Vector store: {stats['store']} ({stats['index_bytes'] / 1e6:.1f}MB)")
+        print(f"Indexed: {stats['symbols']} symbols from {stats['files']} files")
+        print(f"Caches: {stats['cache_bytes'] / 1e6:.1f}MB")
+    return stats
+
+DEFAULT_SNAPSHOT = os.getenv("SENTINEL_SNAPSHOT", "sentinel-index.tar.gz")
+
+def run_export(out_path: str = DEFAULT_SNAPSHOT) -> bool:
+    from src.indexer.snapshot import SnapshotError, export_snapshot
+    from src.storage.vector_store import make_store
+
+    print("---|| SentinelPR Snapshot Export Started ||---")
+    store_name = os.getenv("SENTINEL_VECTOR_STORE", "chroma").lower()
+    store = make_store(store_name)
+    try:
+        manifest = export_snapshot(out_path, store, store_name)
+    except SnapshotError as e:
+        print(f"Snapshot not exported: {e}")
+        return False
+    finally:
+        if hasattr(store, "close"):
+            store.close()
+
+    print(f"Exported {manifest['symbols']} symbols at {manifest['commit'][:12]} "
+          f"({manifest['embedding_backend']}) to {out_path} ({os.path.getsize(out_path) / 1e6:.1f}MB)")
+    print(f"Key: {manifest['key']}")
+    return True
+
+def run_import(snapshot_path: str = DEFAULT_SNAPSHOT, index: bool = True, use_cache: bool = True,
+               workers: int = None, embed_in_flight: int = None) -> bool:
+    from src.indexer.snapshot import SnapshotError, import_snapshot
+
+    print("---|| SentinelPR Snapshot Import Started ||---")
     try:
-        # Read the Diff
-        with open(diff_path, 'r') as f:
-            diff_text = f.read()
+        manifest = import_snapshot(
+            snapshot_path,
+            backend_id=_configured_backend_id(),
+            store_name=os.getenv("SENTINEL_VECTOR_STORE", "chroma").lower()
+        )
+        print(f"Restored {manifest['symbols']} symbols from {manifest['commit'][:12]}, "
+              f"{manifest['trusted_files']} files unchanged since.")
+        restored = True
+    except SnapshotError as e:
+        # A missing or unusable snapshot only means a full index
+        print(f"Snapshot not restored: {e}")
+        restored = False
 
+    if index:
+        # Only what differs from the snapshot's commit gets parsed and embedded
+        run_indexer(use_cache=use_cache, workers=workers, embed_in_flight=embed_in_flight)
+    return restored
+
+def _configured_backend_id():
+    # The embedder the next index run will use, None when it cannot be built here
+    from src.ai.embedding_backends import make_backend
+    try:
+        return make_backend().backend_id
+    except (ValueError, ImportError, OSError) as e:
+        print(f"Skipping the embedding model check: {e}")
+        return None
+
+def run_auditor(diff_path: str, repo: str = None, pr: int = None, token: str = None,
+                concurrency: int = None,
+                diff_context: int = None,
+                diff_budget: int = None,
+                use_cache: bool = True,
+                context_budget: int = None,
+                batch_symbols: int = None,
+                batch_tokens: int = None):
+    from src.orchestrator.workspace import Workspace
+
+    print("---|| SentinelPR Auditor Started ||---")
+    try:
         # nit Components
-        store = VectorStore()
-        embedder = Embedder()
-        parser = DiffParser()
-        mapper = Mapper(store)
-        retriever = ContextRetriever(store, embedder)
-        auditor = Auditor()
+        workspace = Workspace(use_cache=use_cache, concurrency=setting(concurrency, "concurrency"),
+                              context_budget=setting(context_budget, "context_budget"))
+        audit_diff(
+            workspace, diff_path, repo, pr, token,
+            diff_context=diff_context,
+            diff_budget=diff_budget,
+            batch_symbols=batch_symbols,
+            batch_tokens=batch_tokens
+        )
+
+    except Exception as e:
+        print(f"Audit Failure: {e}")
+        traceback.print_exc()
+        sys.exit(0)
+
+def audit_diff(workspace: "Workspace", diff_path: str, repo: str = None, pr: int = None, token: str = None,
+               diff_context: int = None,
+               diff_budget: int = None,
+               batch_symbols: int = None,
+               batch_tokens: int = None) -> list:
+    # Audits one diff with the workspace's components, returns the validated reviews
+    from src.git.diff_parser import DiffParser, HunkReader
+    from src.git.diff_slicer import DiffSlicer
+    from src.orchestrator.batcher import plan_batches
+    from src.orchestrator.changed_line_index import ChangedLineIndex
+    from src.orchestrator.executor import run_ordered
+    from src.orchestrator.mapper import Mapper
+    from src.orchestrator.retriever import ContextRetriever
+    from src.validator.schema_guard import SchemaGuard
+
+    diff_context = setting(diff_context, "diff_context")
+    diff_budget = setting(diff_budget, "diff_budget")
+    batch_symbols = setting(batch_symbols, "batch_symbols")
+    batch_tokens = setting(batch_tokens, "batch_tokens")
+    concurrency = workspace.concurrency
+    # One limiter for every Gemini call so a 429 on any worker slows them all down
+    limiter = workspace.limiter
+    throttled = limiter.throttled
+    store = workspace.store
+    parser = DiffParser()
+    # Hunk bodies stay on disk, the slicer reads back only the ones it needs
+    reader = HunkReader(diff_path)
+    slicer = DiffSlicer(context_lines=diff_context, max_chars=diff_budget, reader=reader)
+    mapper = Mapper(store)
 
+    try:
         # Parse & Map
         print("Parsing Diff...")
-        hunks = parser.parse(diff_text)
-        affected_symbols = mapper.map_diffs_to_symbols(hunks)
+        with tracer.span("map") as s:
+            with open(diff_path, 'rb') as f:
+                hunks = list(parser.parse_stream(f, keep_lines=False))
+            # Enclosing scopes (e.g. the class around a changed method) are already
+            # covered by auditing the innermost symbol that holds the change
+            affected_symbols, enclosing_symbols = mapper.map_diffs_to_scopes(hunks)
+            s.set(hunks=len(hunks), symbols=len(affected_symbols))
 
         if not affected_symbols:
             print("No symbols affected by this change.")
-            return
+            return []
 
-        print(f"Found {len(affected_symbols)} affected symbols.")
+        print(f"Found {len(affected_symbols)} affected symbols ({len(enclosing_symbols)} enclosing scopes skipped).")
 
-        # udit Loop
-        all_reviews = []
+        # Calculate valid lines for each symbol (Intersection of Hunk & Symbol)
+        changed_by_file = ChangedLineIndex.by_file(hunks, with_deletions=True)
+        jobs = []
         for sym in affected_symbols:
-            print(f"Auditing {sym['symbol_name']}...")
-            
-            # Calculate valid lines for this symbol (Intersection of Hunk & Symbol)
-            symbol_range = range(int(sym['start_line']), int(sym['end_line']) + 1)
-            valid_lines = []
-            for h in hunks:
-                if h.file_path == sym['file_path']:
-                    valid_lines.extend([line for line in h.changed_lines if line in symbol_range])
-            
-            valid_lines = sorted(list(set(valid_lines)))
+            changed = changed_by_file.get(sym['file_path'])
+            valid_lines = changed.lines_in(int(sym['start_line']), int(sym['end_line'])) if changed else []
 
             if not valid_lines:
                 print(f"Skipping {sym['symbol_name']} - No changed lines within symbol range.")
                 continue
+            jobs.append((sym, valid_lines))
+
+        # The Gemini clients are only set up once there is something to audit
+        auditor = workspace.auditor
+        retriever = ContextRetriever(store, workspace.embedder)
+
+        # RAG, one bulk lookup + query for every symbol instead of one per symbol
+        with tracer.span("retrieve", symbols=len(jobs)):
+            contexts = retriever.retrieve_context_bulk([sym for sym, _ in jobs])
+
+        # Only the hunks touching a symbol go into its prompt
+        diffs = [slicer.slice_for_symbol(hunks, sym) for sym, _ in jobs]
+        items = [
+            (diff_slice, sym, context, valid_lines)
+            for (sym, valid_lines), diff_slice, context in zip(jobs, diffs, contexts)
+        ]
+
+        # Symbols of the same file (then neighbouring files) share one request
+        batches = plan_batches([sym for sym, _ in jobs], diffs, max_tokens=batch_tokens, max_symbols=batch_symbols)
+        print(f"Auditing {len(items)} symbols in {len(batches)} requests...")
+
+        # udit Loop
+        def audit_batch(batch):
+            print(f"Auditing {', '.join(items[i][1]['symbol_name'] for i in batch)}...")
 
-            # RAG
-            context = retriever.retrieve_context(sym)
-            
             # AI Generate Review
-            reviews = auditor.analyze(diff_text, sym, context, valid_lines)
-            all_reviews.extend(reviews)
+            return auditor.analyze_batch([items[i] for i in batch])
+
+        # Batches are audited in parallel, results are kept in affected_symbols order
+        results = [None] * len(items)
+        with tracer.span("audit", symbols=len(items)):
+            batch_results = run_ordered(
+                batches, audit_batch,
+                max_workers=concurrency,
+                label=lambda batch: ", ".join(items[i][1]['symbol_name'] for i in batch)
+            )
+        for batch, reviews in zip(batches, batch_results):
+            for i, symbol_reviews in zip(batch, reviews or []):
+                results[i] = symbol_reviews
+        all_reviews = [review for reviews in results if reviews for review in reviews]
+
+        if limiter.throttled > throttled:
+            print(f"Rate limited {limiter.throttled - throttled} times during audit.")
+        workspace.cache_report()
 
         # --- NEW: VALIDATION & POSTING ---
         # 1. Validate
@@ -157,31 +344,228 @@ def run_auditor(diff_path: str, repo: str = None, pr: int = None, token: str = N
         # 2. Post or Print
         if token and repo and pr:
             print(f"🚀 Posting {len(valid_reviews)} reviews to {repo} PR #{pr}...")
-            commenter = PRCommenter(repo, pr, token)
+            from src.github.commenter import PRCommenter
+            commenter = PRCommenter(repo, pr, token, session=workspace.session)
             commenter.post_comments(valid_reviews)
         else:
             print("No issues found." if not valid_reviews else "\nDETECTED ISSUES:")
             if valid_reviews:
                 print(json.dumps(valid_reviews, indent=2))
+        return valid_reviews
 
-    except Exception as e:
-        print(f"Audit Failure: {e}")
-        traceback.print_exc()
-        sys.exit(0)
+    finally:
+        reader.close()
 
-def main():
-    parser = argparse.ArgumentParser(description="SentinelPR: AI Code Auditor")
-    parser.add_argument("--diff", help="Path to a git diff file to audit")
+def _add_cache_options(parser):
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call the Gemini APIs, ignoring .sentinel/cache")
+
+def _add_index_options(parser):
+    parser.add_argument("--workers", type=int, default=env_default("workers"),
+                        help="Parser processes used by the indexer (default: $SENTINEL_INDEX_WORKERS or CPU count)")
+    parser.add_argument("--embed-in-flight", type=int, default=env_default("embed_in_flight"),
+                        help="Concurrent embedding requests while indexing (default: $SENTINEL_EMBED_IN_FLIGHT or 4)")
+
+def _add_audit_options(parser):
+    parser.add_argument("--concurrency", type=int, default=env_default("concurrency"),
+                        help="Max audit requests in parallel (default: $SENTINEL_CONCURRENCY or 4)")
+    parser.add_argument("--diff-context", type=int, default=env_default("diff_context"),
+                        help="Diff lines kept around each symbol (default: $SENTINEL_DIFF_CONTEXT or 3)")
+    parser.add_argument("--diff-budget", type=int, default=env_default("diff_budget"),
+                        help="Max characters of diff sent per symbol (default: $SENTINEL_DIFF_BUDGET or 8000)")
+    parser.add_argument("--context-budget", type=int, default=env_default("context_budget"),
+                        help="Estimated tokens of RAG context sent per request (default: $SENTINEL_CONTEXT_TOKENS or 2000)")
+    parser.add_argument("--batch-symbols", type=int, default=env_default("batch_symbols"),
+                        help="Max symbols audited in one request, 1 disables batching (default: $SENTINEL_BATCH_SYMBOLS or 8)")
+    parser.add_argument("--batch-tokens", type=int, default=env_default("batch_tokens"),
+                        help="Estimated tokens of symbol code and diff per batched request (default: $SENTINEL_BATCH_TOKENS or 6000)")
+
+def _add_github_options(parser):
     parser.add_argument("--repo", help="Full repository name (owner/repo)")
     parser.add_argument("--pr", type=int, help="Pull request number")
     parser.add_argument("--token", help="GitHub token")
-    
-    args = parser.parse_args()
-    
-    if args.diff:
-        run_auditor(args.diff, args.repo, args.pr, args.token)
+
+def _add_serve_options(parser):
+    parser.add_argument("--socket", default=os.getenv("SENTINEL_SOCKET"),
+                        help="Unix socket the daemon listens on, instead of --host/--port (default: $SENTINEL_SOCKET)")
+    parser.add_argument("--host", default="127.0.0.1", help="Daemon HTTP address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=env_default("port"),
+                        help="Daemon HTTP port (default: $SENTINEL_PORT or 8750)")
+    parser.add_argument("--max-jobs-per-repo", type=int, default=1,
+                        help="Daemon jobs run at once per checkout, index jobs always run alone (default: 1)")
+    parser.add_argument("--allow-repo", action="append", metavar="DIR",
+                        help="Also take jobs for checkouts under DIR, repeatable (default: only the current directory)")
+    parser.add_argument("--auth-token", default=os.getenv("SENTINEL_DAEMON_TOKEN"),
+                        help="Bearer token daemon clients must send (default: $SENTINEL_DAEMON_TOKEN, "
+                             "over TCP a new one is written to .sentinel/daemon.token)")
+
+def _add_run_options(parser):
+    parser.add_argument("--trace", default=os.getenv("SENTINEL_TRACE"),
+                        help="Write a JSON trace of every stage here (default: $SENTINEL_TRACE)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report the time spent importing each module, then exit with the command's status")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="SentinelPR: AI Code Auditor")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="{" + ",".join(COMMANDS) + "}")
+
+    index = commands.add_parser("index", help="Index the changed files of the current checkout")
+    _add_index_options(index)
+    _add_cache_options(index)
+    _add_run_options(index)
+
+    audit = commands.add_parser("audit", help="Audit a git diff and post the findings")
+    audit.add_argument("diff", help="Path to a git diff file to audit")
+    _add_github_options(audit)
+    _add_audit_options(audit)
+    _add_cache_options(audit)
+    _add_run_options(audit)
+
+    stats = commands.add_parser("stats", help="Show what the index in .sentinel holds")
+    stats.add_argument("--json", action="store_true", help="Print the numbers as JSON")
+    _add_run_options(stats)
+
+    compact = commands.add_parser("compact", help="Purge stale symbols and reclaim space in .sentinel/db")
+    _add_run_options(compact)
+
+    export = commands.add_parser("export", help="Pack the index into a snapshot keyed by commit and embedding model")
+    export.add_argument("snapshot", nargs="?", default=DEFAULT_SNAPSHOT,
+                        help="Snapshot file to write (default: $SENTINEL_SNAPSHOT or sentinel-index.tar.gz)")
+    _add_run_options(export)
+
+    restore = commands.add_parser("import", help="Restore a snapshot, then index what changed since its commit")
+    restore.add_argument("snapshot", nargs="?", default=DEFAULT_SNAPSHOT,
+                         help="Snapshot file to restore (default: $SENTINEL_SNAPSHOT or sentinel-index.tar.gz)")
+    restore.add_argument("--no-index", action="store_true", help="Only restore, skip the incremental index run")
+    _add_index_options(restore)
+    _add_cache_options(restore)
+    _add_run_options(restore)
+
+    serve = commands.add_parser("serve", help="Run as a daemon that keeps components warm and takes index/audit jobs over HTTP")
+    _add_serve_options(serve)
+    _add_index_options(serve)
+    _add_audit_options(serve)
+    _add_cache_options(serve)
+    _add_run_options(serve)
+    return parser
+
+def build_legacy_parser() -> argparse.ArgumentParser:
+    # The flag-only interface the action and existing scripts use, still supported
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="SentinelPR: AI Code Auditor",
+        epilog=f"Commands: {', '.join(COMMANDS)}. Run `main.py <command> --help` for the options of each."
+    )
+    parser.add_argument("--diff", help="Path to a git diff file to audit")
+    _add_github_options(parser)
+    _add_audit_options(parser)
+    _add_index_options(parser)
+    parser.add_argument("--compact", action="store_true",
+                        help="Purge stale symbols and reclaim space in .sentinel/db")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a daemon that keeps components warm and takes index/audit jobs over HTTP")
+    _add_serve_options(parser)
+    _add_cache_options(parser)
+    _add_run_options(parser)
+    return parser
+
+def parse_args(argv=None) -> argparse.Namespace:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return build_parser().parse_args(argv)
+
+    args = build_legacy_parser().parse_args(argv)
+    args.command = ("serve" if args.serve else "audit" if args.diff
+                    else "compact" if args.compact else "index")
+    return args
+
+TRACE_TITLES = {
+    "index": "SentinelPR indexer",
+    "audit": "SentinelPR audit",
+    "stats": "SentinelPR stats",
+    "compact": "SentinelPR compaction",
+    "serve": "SentinelPR daemon",
+    "export": "SentinelPR snapshot export",
+    "import": "SentinelPR snapshot import"
+}
+
+def main():
+    args = parse_args()
+
+    if args.profile_startup:
+        # Runs the command again in a child that reports its imports
+        from src.telemetry.startup import run_profiled
+        argv = [arg for arg in sys.argv[1:] if arg != "--profile-startup"]
+        sys.exit(run_profiled(os.path.abspath(__file__), argv))
+
+    # GEMINI_API_KEY and friends from a local .env, already-set variables win
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    try:
+        run_mode(args)
+    finally:
+        # Trace file, GitHub step summary and OTLP (when OTEL_EXPORTER_OTLP_ENDPOINT is set)
+        tracer.export(TRACE_TITLES[args.command], json_path=args.trace)
+
+def serve_options(args) -> dict:
+    # serve() keyword arguments from the `serve` options
+    return {
+        "socket_path": args.socket, "host": args.host, "port": args.port,
+        "max_jobs_per_repo": args.max_jobs_per_repo,
+        "allowed_repos": args.allow_repo,
+        "auth_token": args.auth_token,
+        "workers": args.workers,
+        # Workspace settings, fixed for the life of a repo worker
+        "options": {
+            "use_cache": not args.no_cache,
+            "concurrency": args.concurrency,
+            "embed_in_flight": args.embed_in_flight,
+            "context_budget": args.context_budget
+        },
+        # Per-job audit settings, a job may override them
+        "audit_defaults": {
+            "diff_context": args.diff_context,
+            "diff_budget": args.diff_budget,
+            "batch_symbols": args.batch_symbols,
+            "batch_tokens": args.batch_tokens
+        }
+    }
+
+def run_mode(args):
+    if args.command == "serve":
+        from src.server.daemon import serve
+        serve(**serve_options(args))
+    elif args.command == "audit":
+        run_auditor(
+            args.diff, args.repo, args.pr, args.token,
+            concurrency=args.concurrency,
+            diff_context=args.diff_context,
+            diff_budget=args.diff_budget,
+            use_cache=not args.no_cache,
+            context_budget=args.context_budget,
+            batch_symbols=args.batch_symbols,
+            batch_tokens=args.batch_tokens
+        )
+    elif args.command == "compact":
+        run_compact()
+    elif args.command == "stats":
+        run_stats(as_json=args.json)
+    elif args.command == "export":
+        run_export(args.snapshot)
+    elif args.command == "import":
+        run_import(
+            args.snapshot,
+            index=not args.no_index,
+            use_cache=not args.no_cache,
+            workers=args.workers,
+            embed_in_flight=args.embed_in_flight
+        )
     else:
-        run_indexer()
+        run_indexer(
+            use_cache=not args.no_cache,
+            workers=args.workers,
+            embed_in_flight=args.embed_in_flight
+        )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,71 @@
 # src/models/diffhunk.py
-from dataclasses import dataclass
-from typing import List
+from typing import Iterable, List, Optional, Tuple
+
+def to_ranges(lines: Iterable[int]) -> List[Tuple[int, int]]:
+    # Sorted, merged, inclusive (start, end) runs
+    ranges = []
+    for line in sorted(set(lines)):
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], line)
+        else:
+            ranges.append((line, line))
+    return ranges
 
-@dataclass
 class DiffHunk:
-    file_path: str
-    start_line: int
-    changed_lines: List[int] # line numbers that were added/modified
\ No newline at end of file
+    '''
+    One hunk of the PR diff. Added/modified lines are held as sorted
+    run-length ranges, a 10k line addition is a single (start, end) pair.
+    `changed_lines` expands them back into line numbers for old callers.
+    Removed lines have no line in the new file, `deleted_at` anchors each run
+    of them to the new line it precedes.
+    '''
+    __slots__ = ("file_path", "start_line", "changed_ranges", "deleted_at", "header", "lines",
+                 "byte_start", "byte_end")
+
+    def __init__(self, file_path: str, start_line: int, changed_lines: Optional[Iterable[int]] = None,
+                 header: str = "", lines: Optional[List[str]] = None,
+                 byte_start: int = 0, byte_end: int = 0,
+                 changed_ranges: Optional[List[Tuple[int, int]]] = None,
+                 deleted_at: Optional[List[int]] = None):
+        self.file_path = file_path
+        self.start_line = start_line
+        self.changed_ranges: List[Tuple[int, int]] = list(changed_ranges) if changed_ranges else to_ranges(changed_lines or ())
+        self.deleted_at: List[int] = list(deleted_at) if deleted_at else []
+        self.header = header # the raw '@@ -a,b +c,d @@' line
+        self.lines = lines if lines is not None else [] # raw hunk body (' ', '+', '-' prefixed)
+        # body's byte range in the raw diff, lets HunkReader read it back on demand
+        self.byte_start = byte_start
+        self.byte_end = byte_end
+
+    @property
+    def changed_lines(self) -> List[int]:
+        # line numbers that were added/modified (a fresh list, use add_changed_line to extend)
+        return [line for start, end in self.changed_ranges for line in range(start, end + 1)]
+
+    @changed_lines.setter
+    def changed_lines(self, lines: Iterable[int]):
+        self.changed_ranges = to_ranges(lines)
+
+    def add_changed_line(self, line: int):
+        # Lines arrive in ascending order while parsing, extend the last run when contiguous
+        ranges = self.changed_ranges
+        if not ranges or line > ranges[-1][1] + 1:
+            ranges.append((line, line))
+        elif line >= ranges[-1][0]:
+            ranges[-1] = (ranges[-1][0], max(line, ranges[-1][1]))
+        else:
+            self.changed_ranges = to_ranges(self.changed_lines + [line]) # out of order, rebuild
+
+    def add_deletion(self, line: int):
+        # Consecutive removed lines share one anchor
+        if not self.deleted_at or self.deleted_at[-1] != line:
+            self.deleted_at.append(line)
+
+    def __eq__(self, other):
+        if not isinstance(other, DiffHunk):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"DiffHunk(file_path={self.file_path!r}, start_line={self.start_line}, "
+                f"changed_ranges={self.changed_ranges!r}, deleted_at={self.deleted_at!r}, header={self.header!r})")
@@ -9,4 +9,6 @@ class Symbol:
     content: str
     start_line: int
     end_line: int
-    file_path: str
\ No newline at end of file
+    file_path: str
+    start_byte: int = 0 # offsets into the utf-8 source, used to re-slice content
+    end_byte: int = 0
@@ -0,0 +1,53 @@
+from typing import Dict, List
+
+from src.orchestrator.context_packer import estimate_tokens
+
+def plan_batches(symbols: List[Dict], diffs: List[str], max_tokens: int = 6000,
+                 max_symbols: int = 8) -> List[List[int]]:
+    '''
+    Groups symbols into audit requests, returns lists of indices into `symbols`.
+
+    Symbols of one file are taken in line order and packed together while
+    their code plus diff fits `max_tokens` and the batch holds at most
+    `max_symbols`. Small batches of neighbouring files (sorted by path, so
+    the same directory first) are then merged under the same limits. A
+    symbol that alone exceeds the budget gets a request of its own.
+    '''
+    if max_symbols <= 1:
+        return [[i] for i in range(len(symbols))]
+
+    costs = [
+        estimate_tokens(sym.get('snippet', '')) + estimate_tokens(diff or '')
+        for sym, diff in zip(symbols, diffs)
+    ]
+    order = sorted(range(len(symbols)), key=lambda i: (
+        symbols[i].get('file_path', ''), int(symbols[i].get('start_line', 0))
+    ))
+
+    def fits(batch, cost, extra, extra_cost):
+        return len(batch) + extra <= max_symbols and cost + extra_cost <= max_tokens
+
+    # By file first
+    file_batches = [] # (file_path, indices, cost)
+    for i in order:
+        file_path = symbols[i].get('file_path', '')
+        if file_batches:
+            last_path, batch, cost = file_batches[-1]
+            if last_path == file_path and fits(batch, cost, 1, costs[i]):
+                batch.append(i)
+                file_batches[-1] = (last_path, batch, cost + costs[i])
+                continue
+        file_batches.append((file_path, [i], costs[i]))
+
+    # Then by proximity, without ever splitting a file's batch
+    batches = []
+    batch, cost = [], 0
+    for _, indices, indices_cost in file_batches:
+        if batch and not fits(batch, cost, len(indices), indices_cost):
+            batches.append(batch)
+            batch, cost = [], 0
+        batch = batch + indices
+        cost += indices_cost
+    if batch:
+        batches.append(batch)
+    return batches
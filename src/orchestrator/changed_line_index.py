@@ -0,0 +1,51 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+from src.models.diffhunk import DiffHunk, to_ranges
+
+class ChangedLineIndex:
+    '''
+    Every changed line of one file, as merged sorted ranges.
+
+    Intersecting with a symbol's [start, end] is two binary searches over
+    the range starts/ends, not a scan of every hunk and line.
+    '''
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]]):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        self.ranges = merged
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    @classmethod
+    def by_file(cls, hunks: List[DiffHunk], with_deletions: bool = False) -> Dict[str, "ChangedLineIndex"]:
+        # with_deletions adds the line after each run of removed lines, a
+        # context line of the diff where a review of the removal can go
+        ranges_by_file: Dict[str, List[Tuple[int, int]]] = {}
+        for hunk in hunks:
+            ranges = ranges_by_file.setdefault(hunk.file_path, [])
+            ranges.extend(hunk.changed_ranges)
+            if with_deletions:
+                ranges.extend((line, line) for line in hunk.deleted_at)
+        return {path: cls(ranges) for path, ranges in ranges_by_file.items()}
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[int]) -> "ChangedLineIndex":
+        return cls(to_ranges(lines))
+
+    def ranges_in(self, start: int, end: int) -> List[Tuple[int, int]]:
+        # Changed ranges clipped to [start, end]
+        first = bisect_left(self._ends, start)
+        last = bisect_right(self._starts, end)
+        return [(max(s, start), min(e, end)) for s, e in self.ranges[first:last]]
+
+    def lines_in(self, start: int, end: int) -> List[int]:
+        return [line for s, e in self.ranges_in(start, end) for line in range(s, e + 1)]
+
+    def any_in(self, start: int, end: int) -> bool:
+        return bisect_left(self._ends, start) < bisect_right(self._starts, end)
@@ -0,0 +1,109 @@
+import re
+from typing import Dict, List, Optional
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+ELISION = "    ..."
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for code, close enough to budget with
+    return max(1, (len(text) + 3) // 4)
+
+class ContextPacker:
+    '''
+    Fits retrieved snippets into a token budget.
+
+    Snippets are ranked by distance. Exact duplicates and snippets that
+    overlap (or nest in) a better ranked one from the same file, or the
+    audited symbol itself (and any `exclude` symbols sharing the prompt),
+    are dropped. A snippet over `max_snippet_tokens` is cut down to its
+    signature plus the window of lines sharing the most identifiers with the
+    change. Packing stops once `max_tokens` is spent.
+    '''
+
+    def __init__(self, max_tokens: int = 2000, max_snippet_tokens: int = 600,
+                 signature_lines: int = 2, min_tokens: int = 40):
+        self.max_tokens = max_tokens
+        self.max_snippet_tokens = max_snippet_tokens
+        self.signature_lines = signature_lines
+        self.min_tokens = min_tokens # smaller leftovers are not worth a snippet
+
+    def pack(self, snippets: List[Dict], symbol: Optional[Dict] = None, focus: str = "",
+             exclude: Optional[List[Dict]] = None) -> List[Dict]:
+        focus_words = set(IDENTIFIER.findall(focus))
+        ranked = sorted(snippets, key=lambda s: s.get("distance", float("inf")))
+
+        kept = []
+        ranges = {} # file_path -> [(start, end)] already covered
+        seen_text = set()
+        # The audited symbol(s) are already in the prompt
+        for sym in [symbol] + (exclude or []):
+            if sym and _line_range(sym):
+                ranges.setdefault(sym.get("file_path"), []).append(_line_range(sym))
+
+        budget = self.max_tokens
+        for snippet in ranked:
+            text = snippet.get("snippet") or ""
+            if not text or text in seen_text:
+                continue
+
+            span = _line_range(snippet)
+            covered = ranges.get(snippet.get("file_path"), [])
+            if span and any(span[0] <= end and start <= span[1] for start, end in covered):
+                continue
+
+            limit = min(self.max_snippet_tokens, budget)
+            if limit < self.min_tokens:
+                break
+            packed = text if estimate_tokens(text) <= limit else self.trim(text, limit, focus_words)
+
+            seen_text.add(text)
+            if span:
+                ranges.setdefault(snippet.get("file_path"), []).append(span)
+            budget -= estimate_tokens(packed)
+            kept.append({**snippet, "snippet": packed, "trimmed": packed != text})
+        return kept
+
+    def trim(self, text: str, max_tokens: int, focus_words: set) -> str:
+        lines = text.split("\n")
+        signature = lines[:self.signature_lines]
+        body = lines[self.signature_lines:]
+
+        budget = max_tokens - estimate_tokens("\n".join(signature + [ELISION, ELISION]))
+        if budget <= 0 or not body:
+            return _cut("\n".join(signature), max_tokens)
+
+        # Sliding window over the body: the most focus identifiers that fit the budget
+        scores = [len(focus_words.intersection(IDENTIFIER.findall(line))) for line in body]
+        costs = [estimate_tokens(line + "\n") for line in body]
+
+        # Ties go to the longer, then the earlier window
+        best_start, best_end, best = 0, 0, (-1, 0)
+        start = 0
+        score = cost = 0
+        for end in range(len(body)):
+            score += scores[end]
+            cost += costs[end]
+            while cost > budget and start <= end:
+                score -= scores[start]
+                cost -= costs[start]
+                start += 1
+            if start <= end and (score, end + 1 - start) > best:
+                best_start, best_end, best = start, end + 1, (score, end + 1 - start)
+
+        region = body[best_start:best_end]
+        parts = signature[:]
+        if best_start > 0:
+            parts.append(ELISION)
+        parts.extend(region)
+        if best_end < len(body):
+            parts.append(ELISION)
+        return "\n".join(parts)
+
+def _line_range(snippet: Dict):
+    try:
+        return int(snippet["start_line"]), int(snippet["end_line"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _cut(text: str, max_tokens: int) -> str:
+    return text[:max_tokens * 4]
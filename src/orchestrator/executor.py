@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+def run_ordered(items: List, fn: Callable, max_workers: int = 4,
+                label: Optional[Callable] = None) -> List:
+    '''
+    Run fn over items on a bounded thread pool.
+
+    Results come back in the same order as items. If fn raises for an item,
+    the error is printed and that slot holds None, the other items still run.
+    '''
+    label = label or str
+
+    def guarded(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            print(f"Failed on {label(item)}: {e}")
+            return None
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [guarded(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        # map() preserves input order regardless of completion order
+        return list(pool.map(guarded, items))
@@ -0,0 +1,51 @@
+from bisect import bisect_right
+from typing import Dict, List
+
+class IntervalIndex:
+    '''
+    Line range lookup over the symbols of one file.
+
+    Symbols are sorted by start line with a running maximum of end lines, so
+    an overlap query is a binary search plus a walk over actual candidates
+    instead of a scan of every symbol.
+    '''
+
+    def __init__(self, symbols: List[Dict]):
+        # Convert once, Chroma metadata may hand line numbers back as strings/floats
+        items = sorted(
+            ((int(s['start_line']), int(s['end_line']), s) for s in symbols),
+            key=lambda item: (item[0], -item[1])
+        )
+        self._starts = [start for start, _, _ in items]
+        self._ends = [end for _, end, _ in items]
+        self._symbols = [sym for _, _, sym in items]
+
+        # _max_end[i] = largest end line among items[0..i]
+        self._max_end = []
+        running = float("-inf")
+        for end in self._ends:
+            running = max(running, end)
+            self._max_end.append(running)
+
+    def overlapping(self, low: int, high: int) -> List[Dict]:
+        # Every symbol whose [start, end] intersects [low, high], innermost first
+        hits = []
+        i = bisect_right(self._starts, high) - 1
+        while i >= 0 and self._max_end[i] >= low:
+            if self._ends[i] >= low:
+                hits.append(self._symbols[i])
+            i -= 1
+        return hits
+
+    def innermost(self, line: int):
+        # Smallest symbol containing the line, None if the line is outside every symbol
+        best = None
+        best_span = None
+        i = bisect_right(self._starts, line) - 1
+        while i >= 0 and self._max_end[i] >= line:
+            if self._ends[i] >= line:
+                span = self._ends[i] - self._starts[i]
+                if best is None or span < best_span:
+                    best, best_span = self._symbols[i], span
+            i -= 1
+        return best
@@ -1,5 +1,7 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from src.models.diffhunk import DiffHunk
+from src.orchestrator.changed_line_index import ChangedLineIndex
+from src.orchestrator.interval_index import IntervalIndex
 from src.storage.vector_store import VectorStore
 
 class Mapper:
@@ -7,22 +9,73 @@ class Mapper:
         self.store = vector_store
 
     def map_diffs_to_symbols(self, hunks: List[DiffHunk]) -> List[Dict]:
-        affected_symbols = []
-        processed_ids = set() # To avoid duplicates
+        # Every affected symbol, ordered by file (diff order) then position
+        innermost, enclosing = self.map_diffs_to_scopes(hunks)
+        file_order = self._file_order(hunks)
+        return sorted(innermost + enclosing, key=lambda s: (file_order[s["file_path"]], int(s["start_line"])))
 
+    @staticmethod
+    def _file_order(hunks: List[DiffHunk]) -> Dict[str, int]:
+        order = {}
         for hunk in hunks:
-            # Returns a list of dicts
-            symbols = self.store.get_symbols_for_file(hunk.file_path)
-            
-            for sym in symbols:
-                start = int(sym['start_line'])
-                end = int(sym['end_line'])
-
-                # Check if any falls within the range
-                hit =  any(start <= line <= end for line in hunk.changed_lines)
-                if hit:
-                    if sym["id"] not in processed_ids:
-                        processed_ids.add(sym["id"])
-                        affected_symbols.append(sym)
+            order.setdefault(hunk.file_path, len(order))
+        return order
+
+    def map_diffs_to_scopes(self, hunks: List[DiffHunk]) -> Tuple[List[Dict], List[Dict]]:
+        '''
+        Split the symbols touched by the diff into two lists.
+
+        innermost: the smallest symbol around at least one changed or removed line
+        enclosing: symbols that contain changed lines only through a nested
+                   symbol (e.g. the class around a changed method)
+        '''
+        # One bulk query for every touched file instead of one per hunk
+        file_order = self._file_order(hunks)
+        symbols_by_file = self.store.get_symbols_for_files(list(file_order))
+        indexes = {path: IntervalIndex(syms) for path, syms in symbols_by_file.items()}
+
+        innermost = {}
+        affected = {}
+        for path, changed in ChangedLineIndex.by_file(hunks).items():
+            index = indexes.get(path)
+            if index is None:
+                continue
+
+            for low, high in changed.ranges:
+                overlapping = index.overlapping(low, high)
+                for sym in overlapping:
+                    if sym["id"] not in affected:
+                        affected[sym["id"]] = sym
                         print(f"Match found: {sym['symbol_name']}")
-        return affected_symbols
\ No newline at end of file
+
+                # The innermost symbol can only change where a symbol starts or
+                # ends, so query once per segment instead of once per line
+                cuts = {low}
+                for sym in overlapping:
+                    cuts.update((int(sym["start_line"]), int(sym["end_line"]) + 1))
+                for line in sorted(c for c in cuts if low <= c <= high):
+                    inner = index.innermost(line)
+                    if inner is not None:
+                        innermost.setdefault(inner["id"], inner)
+
+        # Removed lines sit between two new-file lines, they belong to the
+        # symbols that hold both (a dropped guard inside a function)
+        for hunk in hunks:
+            index = indexes.get(hunk.file_path)
+            if index is None:
+                continue
+            for anchor in hunk.deleted_at:
+                holding = [sym for sym in index.overlapping(anchor - 1, anchor)
+                           if int(sym["start_line"]) < anchor <= int(sym["end_line"])]
+                if not holding:
+                    continue
+                inner = min(holding, key=lambda sym: int(sym["end_line"]) - int(sym["start_line"]))
+                innermost.setdefault(inner["id"], inner)
+                for sym in holding:
+                    if sym["id"] not in affected:
+                        affected[sym["id"]] = sym
+                        print(f"Match found: {sym['symbol_name']}")
+
+        order = lambda s: (file_order[s["file_path"]], int(s["start_line"]))
+        enclosing = [sym for uid, sym in affected.items() if uid not in innermost]
+        return sorted(innermost.values(), key=order), sorted(enclosing, key=order)
@@ -14,7 +14,7 @@ class ContextRetriever:
 
         # Embed the modified code
         vectors = self.embedder.embed_batch([snippet])
-        if not vectors:
+        if not vectors or vectors[0] is None:
             return []
         
         # earch DB
@@ -28,4 +28,32 @@ class ContextRetriever:
                 continue
             context_snippets.append(res)
             
-        return context_snippets[:limit]
\ No newline at end of file
+        return context_snippets[:limit]
+
+    def retrieve_context_bulk(self, symbols: List[Dict], limit: int = 3) -> List[List[Dict]]:
+        # Context for many symbols at once, one result list per symbol in order.
+        # Indexed symbols reuse their stored vectors, only unknown ones are embedded.
+        contexts = [[] for _ in symbols]
+
+        stored = self.store.get_embeddings([s["id"] for s in symbols if s.get("id")])
+
+        query_vectors = [stored.get(s.get("id")) for s in symbols]
+        missing = [i for i, vec in enumerate(query_vectors) if vec is None and symbols[i].get("snippet")]
+        if missing:
+            print(f"Embedding {len(missing)} symbols missing from the index...")
+            fallback = self.embedder.embed_batch([symbols[i]["snippet"] for i in missing])
+            # A failed embedding stays None, that symbol just gets no context
+            for i, vec in zip(missing, fallback):
+                query_vectors[i] = vec
+
+        queried = [i for i, vec in enumerate(query_vectors) if vec is not None]
+        if not queried:
+            return contexts
+
+        # Single multi-vector query, limit + 1 leaves room for the self match
+        results = self.store.search_many([query_vectors[i] for i in queried], limit=limit + 1)
+
+        for i, matches in zip(queried, results):
+            own_id = symbols[i].get("id")
+            contexts[i] = [m for m in matches if m.get("id") != own_id][:limit]
+        return contexts
\ No newline at end of file
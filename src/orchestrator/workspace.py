@@ -0,0 +1,90 @@
+from typing import Optional
+
+from src.ai.embedder import Embedder
+from src.ai.embedding_cache import EmbeddingCache
+from src.ai.limiter import RateLimiter
+from src.ai.response_cache import ResponseCache
+from src.indexer.persistence import reset_db, verify_db_integrity
+from src.orchestrator.context_packer import ContextPacker
+from src.storage.vector_store import make_store
+
+class Workspace:
+    '''
+    The expensive components of one repository checkout, built on first use.
+
+    A CLI run builds one and throws it away. The daemon keeps one per
+    checkout, so the store, the embedding and LLM clients, their caches and
+    rate limiters, the tree-sitter grammars and the GitHub session are set
+    up once and then shared by every job. Paths are relative to the
+    checkout, which must be the working directory.
+    '''
+
+    def __init__(self, use_cache: bool = True, concurrency: int = 4, embed_in_flight: int = 4,
+                 context_budget: int = 2000, verify_store: bool = False, persist_dir: str = ".sentinel/db"):
+        self.use_cache = use_cache
+        self.concurrency = concurrency
+        self.embed_in_flight = embed_in_flight
+        self.context_budget = context_budget
+        self.verify_store = verify_store
+        self.persist_dir = persist_dir
+
+        # One limiter for every Gemini generation call, throttling on any job backs them all off
+        self.limiter = RateLimiter(max_concurrency=concurrency)
+        # Embedding requests have their own quota
+        self.embed_limiter = RateLimiter(max_concurrency=embed_in_flight)
+        self.manifest_path = ".sentinel/cache/manifest.sqlite" if use_cache else None
+
+        self._store = None
+        self._embedder = None
+        self._auditor = None
+        self._session = None
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        self.response_cache: Optional[ResponseCache] = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            if self.verify_store and not verify_db_integrity(self.persist_dir):
+                reset_db(self.persist_dir)
+            self._store = make_store(persist_dir=self.persist_dir)
+        return self._store
+
+    @property
+    def embedder(self) -> Embedder:
+        if self._embedder is None:
+            # Same on-disk cache for indexing and auditing, unchanged symbols are never re-embedded
+            self.embedding_cache = EmbeddingCache() if self.use_cache else None
+            self._embedder = Embedder(limiter=self.embed_limiter, cache=self.embedding_cache)
+            self.store.bind_embedder(self._embedder.backend_id, self._embedder.dimension)
+        return self._embedder
+
+    @property
+    def auditor(self):
+        if self._auditor is None:
+            from src.ai.auditor import Auditor
+            self.response_cache = ResponseCache() if self.use_cache else None
+            self._auditor = Auditor(limiter=self.limiter, cache=self.response_cache,
+                                    packer=ContextPacker(max_tokens=self.context_budget))
+        return self._auditor
+
+    @property
+    def session(self):
+        # Pooled connections to the GitHub API, reused across reviews
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def warm_up(self):
+        # Everything a job would otherwise pay for on its first call
+        self.embedder
+        self.auditor
+        self.session
+        from src.indexer import pipeline
+        pipeline.warm_worker(self.manifest_path)
+
+    def cache_report(self):
+        if self.response_cache:
+            print(f"LLM cache: {self.response_cache.hits} hits, {self.response_cache.misses} misses.")
+        if self.embedding_cache:
+            print(f"Embedding cache: {self.embedding_cache.hits} hits, {self.embedding_cache.misses} misses.")
@@ -2,6 +2,7 @@
 from tree_sitter import Language, Parser
 import tree_sitter_python as tspython
 import tree_sitter_java as tsjava
+from src.telemetry import span
 
 class ParserEngine:
     '''
@@ -35,4 +36,6 @@ class ParserEngine:
 
         # Set the parsers active language
         self._parser.language = self.languages[language_id]
-        return self._parser.parse(bytes(source_code, "utf-8"))
\ No newline at end of file
+        source = bytes(source_code, "utf-8")
+        with span("parse", language=language_id, bytes=len(source)):
+            return self._parser.parse(source)
\ No newline at end of file
@@ -1,44 +1,109 @@
 # src.parser.extractor.py
+from typing import Dict, Optional
+from tree_sitter import Language, Query, QueryCursor
 from src.models.symbol import Symbol
+from src.telemetry import span
+
+# Raw CST types -> Symbol types, per grammar (queries reject unknown node types)
+LANGUAGE_TARGETS: Dict[str, Dict[str, str]] = {
+    "python": {
+        "function_definition": "function",
+        "class_definition": "class"
+    },
+    "java": {
+        "method_declaration": "function",
+        "class_declaration": "class"
+    }
+}
+
+# Compiled once per grammar, compiling a query is far more expensive than running it
+_QUERY_CACHE: Dict[str, Query] = {}
+
+def _symbol_query(language: Language) -> Optional[Query]:
+    targets = LANGUAGE_TARGETS.get(language.name)
+    if not targets:
+        return None
+
+    if language.name not in _QUERY_CACHE:
+        alternatives = " ".join(f"({node_type})" for node_type in targets)
+        _QUERY_CACHE[language.name] = Query(language, f"[{alternatives}] @symbol")
+    return _QUERY_CACHE[language.name]
 
 class SymbolExtractor:
-    def __init__(self, source_code: str):
+    '''
+    Pulls functions and classes out of a CST.
+
+    With a `language` the extraction runs as a precompiled tree-sitter query
+    (the walk happens in C). Without one, or with engine="cursor", it falls
+    back to an iterative TreeCursor walk. Both return the same symbols in the
+    same pre-order, and neither recurses in Python, so deeply nested code
+    cannot hit the recursion limit.
+    '''
+
+    def __init__(self, source_code: str, language: Optional[Language] = None, engine: str = "auto"):
         # We need src code as bytes to slice out names of functions
         self.source_bytes = bytes(source_code, "utf-8")
+        self.language = language
+        self.engine = engine
 
         # Map raw CST types to Symbol types
-        self.target_types = {
-            "function_definition": "function", # Python
-            "class_definition": "class",       # Python
-            "method_declaration": "function",  # Java
-            "class_declaration": "class"       # Java
-        }
+        if language is not None and language.name in LANGUAGE_TARGETS:
+            self.target_types = LANGUAGE_TARGETS[language.name]
+        else:
+            self.target_types = {
+                node_type: symbol_type
+                for targets in LANGUAGE_TARGETS.values()
+                for node_type, symbol_type in targets.items()
+            }
 
     def extract(self, node, file_path: str) -> list[Symbol]:
+        query = _symbol_query(self.language) if self.language is not None and self.engine != "cursor" else None
+        with span("extract", bytes=len(self.source_bytes)) as s:
+            if query is not None:
+                symbols = self._extract_with_query(query, node, file_path)
+            else:
+                symbols = self._extract_with_cursor(node, file_path)
+            s.set(symbols=len(symbols))
+        return symbols
+
+    def _extract_with_query(self, query: Query, node, file_path: str) -> list[Symbol]:
+        captures = QueryCursor(query).captures(node).get("symbol", [])
+
+        # Document pre-order: outer symbols before the ones nested inside them
+        captures.sort(key=lambda n: (n.start_byte, -n.end_byte))
+        return [self._make_symbol(n, file_path) for n in captures]
+
+    def _extract_with_cursor(self, node, file_path: str) -> list[Symbol]:
         symbols = []
+        cursor = node.walk()
+
+        # Pre-order walk without recursion: down, then across, then back up
+        while True:
+            current = cursor.node
+            if current.type in self.target_types:
+                symbols.append(self._make_symbol(current, file_path))
+
+            if cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return symbols
+
+    def _make_symbol(self, node, file_path: str) -> Symbol:
+        # Get node's name and slice the source bytes by start and end bytes of the name_node we got
+        name_node = node.child_by_field_name("name")
+        name_text = self.source_bytes[name_node.start_byte:name_node.end_byte].decode("utf-8") if name_node else "anonymous"
+
+        # Get the full content of the symbol body
+        symbol_content = self.source_bytes[node.start_byte:node.end_byte].decode("utf-8")
 
-        # Process current node
-        if node.type in self.target_types:
-            # Get node's name and slice the source bytes by start and end bytes of the name_node we got
-            name_node = node.child_by_field_name("name")
-            name_text = self.source_bytes[name_node.start_byte:name_node.end_byte].decode("utf-8") if name_node else "anonymous"
-
-            # Get the full content of the symbol body
-            symbol_content = self.source_bytes[node.start_byte:node.end_byte].decode("utf-8")
-
-            # Create Symbol object and append to symbols
-            symbols.append(Symbol(
-                name=name_text, 
-                type=self.target_types[node.type], # Clean map name
-                content=symbol_content,
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                file_path=file_path
-            ))
-        
-        # Recursively call for each child to ensure we find methods inside classes
-        for child in node.children:
-            child_symbols = self.extract(child, file_path)
-            symbols.extend(child_symbols)
-        
-        return symbols
\ No newline at end of file
+        return Symbol(
+            name=name_text,
+            type=self.target_types[node.type], # Clean map name
+            content=symbol_content,
+            start_line=node.start_point[0] + 1,
+            end_line=node.end_point[0] + 1,
+            file_path=file_path,
+            start_byte=node.start_byte,
+            end_byte=node.end_byte
+        )
@@ -0,0 +1,456 @@
+# src/server/daemon.py
+import hmac
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import secrets
+import signal
+import socketserver
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+JOB_KINDS = ("index", "audit")
+# Per-job knobs an audit request may override, everything else comes from the daemon
+AUDIT_OPTIONS = ("diff_context", "diff_budget", "batch_symbols", "batch_tokens")
+# Written when a TCP daemon is started without --auth-token
+TOKEN_PATH = os.path.join(".sentinel", "daemon.token")
+
+class ReadWriteLock:
+    '''
+    Audits share the checkout, an index job has it to itself. A queued
+    index job holds back new audits, a steady stream of them cannot
+    starve it.
+    '''
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writer and not self._writers_waiting)
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+def execute_job(job: Dict, workspace, lock: ReadWriteLock, workers: int = 1):
+    '''
+    Runs one job against a warm workspace, returns (ok, result or error).
+    Runs inside the repo worker, whose working directory is the checkout.
+    '''
+    from src.main import audit_diff, run_indexer
+
+    diff_file = None
+    try:
+        if job["kind"] == "index":
+            lock.acquire_write()
+            try:
+                # Other jobs run on threads here, forking now could copy a held lock
+                return True, run_indexer(workers=workers, workspace=workspace, start_method="spawn")
+            finally:
+                lock.release_write()
+
+        diff_path = job.get("diff")
+        if not diff_path:
+            # Diff sent inline, the audit reads it from disk like any other
+            with tempfile.NamedTemporaryFile("w", suffix=".diff", delete=False, encoding="utf-8") as f:
+                f.write(job.get("diff_text", ""))
+            diff_path = diff_file = f.name
+
+        options = {k: job[k] for k in AUDIT_OPTIONS if k in job}
+        lock.acquire_read()
+        try:
+            reviews = audit_diff(workspace, diff_path, job.get("repo"), job.get("pr"), job.get("token"), **options)
+        finally:
+            lock.release_read()
+        return True, {"reviews": reviews}
+
+    except BaseException as e: # SystemExit included, a job never takes the worker down
+        traceback.print_exc()
+        return False, f"{type(e).__name__}: {e}"
+    finally:
+        if diff_file:
+            os.remove(diff_file)
+
+def _worker_main(repo_dir: str, max_jobs: int, workers: int, options: Dict, inbox, outbox):
+    # Entry point of a repo worker process
+    os.chdir(repo_dir)
+    from src.orchestrator.workspace import Workspace
+
+    workspace = Workspace(verify_store=True, **options)
+    try:
+        workspace.warm_up()
+    except Exception as e:
+        # e.g. no GEMINI_API_KEY yet, the job that needs it reports the error
+        print(f"[{repo_dir}] Warm-up incomplete: {e}")
+    lock = ReadWriteLock()
+
+    def run(job):
+        outbox.put(("started", job["id"], None))
+        ok, result = execute_job(job, workspace, lock, workers)
+        outbox.put(("done", job["id"], (ok, result)))
+
+    parent = os.getppid()
+    with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+        while True:
+            try:
+                job = inbox.get(timeout=5)
+            except queue.Empty:
+                if os.getppid() != parent:
+                    break # The daemon died without stopping us
+                continue
+            if job is None:
+                break
+            pool.submit(run, job)
+
+class RepoWorker:
+    '''
+    A process per checkout that keeps its Workspace warm.
+
+    Jobs are queued on `inbox` and run up to `max_jobs` at a time. Progress
+    comes back on `outbox` and is handed to `on_event` from a reader thread.
+    Spawned rather than forked, the daemon is multi-threaded by then.
+    '''
+
+    def __init__(self, repo_dir: str, max_jobs: int, workers: int, options: Dict, on_event):
+        context = multiprocessing.get_context("spawn")
+        self.repo_dir = repo_dir
+        self.inbox = context.Queue()
+        self.outbox = context.Queue()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(repo_dir, max_jobs, workers, options, self.inbox, self.outbox),
+            name=f"sentinel-worker:{os.path.basename(repo_dir)}"
+        )
+        self.process.start()
+        self._reader = threading.Thread(target=self._read, args=(on_event,), daemon=True)
+        self._reader.start()
+
+    def _read(self, on_event):
+        for event in iter(self.outbox.get, None):
+            on_event(*event)
+
+    def submit(self, job: Dict):
+        self.inbox.put(job)
+
+    def stop(self):
+        self.inbox.put(None)
+        self.process.join()
+        self.outbox.put(None)
+        self._reader.join()
+
+class LatencyStats:
+    '''Rolling latency window for one kind of job.'''
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.failed = 0
+        self.queue_s = deque(maxlen=window)
+        self.run_s = deque(maxlen=window)
+
+    def add(self, queued: float, ran: float, ok: bool):
+        self.count += 1
+        self.failed += not ok
+        self.queue_s.append(queued)
+        self.run_s.append(ran)
+
+    def summary(self) -> Dict:
+        return {
+            "jobs": self.count,
+            "failed": self.failed,
+            "queue_s": _percentiles(self.queue_s),
+            "run_s": _percentiles(self.run_s),
+        }
+
+def _percentiles(values) -> Dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1], 4)}
+
+class Daemon:
+    '''
+    Accepts index and audit jobs, routes them to one warm worker per checkout.
+
+    Workers are started on the first job for a checkout. Job records keep
+    their timings (queued, started, finished) and result, the most recent
+    `keep_jobs` of them stay queryable. Latency is tracked per job kind and
+    per checkout. `audit_defaults` holds the AUDIT_OPTIONS an audit job
+    gets when its request does not set them. Jobs may only name checkouts
+    and diff files under `default_repo` or one of `allowed_repos`.
+    '''
+
+    def __init__(self, max_jobs_per_repo: int = 1, workers: int = 1, options: Optional[Dict] = None,
+                 default_repo: str = ".", keep_jobs: int = 1000, worker_factory=RepoWorker,
+                 audit_defaults: Optional[Dict] = None, allowed_repos: Optional[List[str]] = None):
+        self.max_jobs_per_repo = max_jobs_per_repo
+        self.workers = workers
+        self.options = options or {}
+        self.audit_defaults = {k: v for k, v in (audit_defaults or {}).items() if k in AUDIT_OPTIONS and v is not None}
+        self.default_repo = os.path.realpath(default_repo)
+        self.allowed_repos = [os.path.realpath(p) for p in [default_repo, *(allowed_repos or [])]]
+        self.keep_jobs = keep_jobs
+        self.worker_factory = worker_factory
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._done: Dict[str, threading.Event] = {}
+        self._repos: Dict[str, RepoWorker] = {}
+        self._stats: Dict[str, LatencyStats] = {}
+        self.started_at = time.time()
+
+    def submit(self, request: Dict) -> Dict:
+        kind = request.get("kind")
+        if kind not in JOB_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(JOB_KINDS)}")
+        if kind == "audit" and not (request.get("diff") or request.get("diff_text")):
+            raise ValueError("audit jobs need 'diff' (a path) or 'diff_text'")
+
+        repo_dir = self._allowed_path(request.get("repo_dir") or self.default_repo, "repo_dir")
+        if not os.path.isdir(repo_dir):
+            raise ValueError(f"No such checkout: {repo_dir}")
+        if request.get("diff"):
+            # Relative to the checkout, the worker runs there
+            request = {**request, "diff": self._allowed_path(os.path.join(repo_dir, request["diff"]), "diff")}
+
+        with self._lock:
+            job_id = str(next(self._ids))
+            # The request's own audit options win over the daemon's
+            job = {**self.audit_defaults, **request, "id": job_id, "kind": kind, "repo_dir": repo_dir}
+            # What GET /jobs/<id> shows, never the token
+            record = {"id": job_id, "kind": kind, "repo_dir": repo_dir, "status": "queued",
+                      "queued_at": time.time(), "started_at": None, "finished_at": None}
+            self._jobs[job_id] = record
+            self._done[job_id] = threading.Event()
+            while len(self._jobs) > self.keep_jobs:
+                old_id, _ = self._jobs.popitem(last=False)
+                self._done.pop(old_id, None)
+
+            worker = self._repos.get(repo_dir)
+            if worker is None:
+                print(f"Starting worker for {repo_dir}")
+                worker = self._repos[repo_dir] = self.worker_factory(
+                    repo_dir, self.max_jobs_per_repo, self.workers, self.options, self._on_event
+                )
+        worker.submit(job)
+        return dict(record)
+
+    def _allowed_path(self, path: str, field: str) -> str:
+        # Symlinks resolved first, they cannot point a job outside the roots
+        path = os.path.realpath(path)
+        for root in self.allowed_repos:
+            if os.path.commonpath([root, path]) == root:
+                return path
+        raise ValueError(f"{field} must be under the served checkout or an --allow-repo directory: {path}")
+
+    def _on_event(self, kind: str, job_id: str, payload):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return
+            now = time.time()
+            if kind == "started":
+                record.update(status="running", started_at=now)
+                return
+
+            ok, result = payload
+            record["started_at"] = record["started_at"] or now
+            record.update(status="done" if ok else "failed", finished_at=now)
+            record["result" if ok else "error"] = result
+
+            queued = record["started_at"] - record["queued_at"]
+            ran = now - record["started_at"]
+            for key in (record["kind"], f"{record['kind']}:{record['repo_dir']}"):
+                self._stats.setdefault(key, LatencyStats()).add(queued, ran, ok)
+            event = self._done.get(job_id)
+        print(f"Job {job_id} ({record['kind']}) {record['status']} in {ran:.2f}s after {queued:.2f}s queued")
+        if event:
+            event.set()
+
+    def get(self, job_id: str, wait: Optional[float] = None) -> Optional[Dict]:
+        event = self._done.get(job_id)
+        if wait and event:
+            event.wait(wait)
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record) if record else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+            by_kind = {k: s.summary() for k, s in self._stats.items() if ":" not in k}
+            by_repo = {}
+            for key, s in self._stats.items():
+                if ":" in key:
+                    kind, repo_dir = key.split(":", 1)
+                    by_repo.setdefault(repo_dir, {})[kind] = s.summary()
+            return {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "repos": sorted(self._repos),
+                "jobs": by_kind,
+                "by_repo": by_repo,
+            }
+
+    def stop(self):
+        with self._lock:
+            workers = list(self._repos.values())
+            self._repos.clear()
+        for worker in workers:
+            worker.stop()
+
+class _Handler(BaseHTTPRequestHandler):
+    '''
+    POST /jobs[?wait=SECONDS]  {"kind": "index"|"audit", "repo_dir": ..., "diff" | "diff_text", "repo", "pr", "token"}
+    GET  /jobs/<id>[?wait=SECONDS]
+    GET  /stats
+    GET  /health
+
+    Everything but /health needs `Authorization: Bearer <auth_token>` when
+    the daemon has one, POST bodies must be sent as application/json.
+    '''
+
+    daemon: Daemon = None
+    auth_token: Optional[str] = None
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/jobs":
+            return self._send(404, {"error": "not found"})
+        if not self._authorized():
+            return self._send(401, {"error": "missing or wrong bearer token"})
+        # A browser sends a cross-site form or text/plain POST without a preflight, never JSON
+        if self.headers.get_content_type() != "application/json":
+            return self._send(415, {"error": "Content-Type must be application/json"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            record = self.daemon.submit(request)
+        except (ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e)})
+
+        wait = _wait_param(url)
+        if wait:
+            record = self.daemon.get(record["id"], wait=wait)
+        self._send(202 if record["status"] in ("queued", "running") else 200, record)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send(200, {"ok": True})
+        if not self._authorized():
+            return self._send(401, {"error": "missing or wrong bearer token"})
+        if url.path == "/stats":
+            return self._send(200, self.daemon.stats())
+        if url.path.startswith("/jobs/"):
+            record = self.daemon.get(url.path[len("/jobs/"):], wait=_wait_param(url))
+            if record is None:
+                return self._send(404, {"error": "unknown job"})
+            return self._send(200, record)
+        self._send(404, {"error": "not found"})
+
+    def _authorized(self) -> bool:
+        if not self.auth_token:
+            return True
+        given = self.headers.get("Authorization", "")
+        return hmac.compare_digest(given.encode("utf-8"), f"Bearer {self.auth_token}".encode("utf-8"))
+
+    def _send(self, status: int, body: Dict):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+def _wait_param(url) -> Optional[float]:
+    values = parse_qs(url.query).get("wait")
+    return float(values[0]) if values else None
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_server(daemon: Daemon, socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 8750,
+                auth_token: Optional[str] = None):
+    handler = type("Handler", (_Handler,), {"daemon": daemon, "auth_token": auth_token})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path) # Left behind by a previous daemon
+        server = UnixHTTPServer(socket_path, handler)
+        os.chmod(socket_path, 0o600) # Only our user may connect
+        return server
+    return ThreadingHTTPServer((host, port), handler)
+
+def write_token(path: str = TOKEN_PATH) -> str:
+    # A fresh random token only our user can read
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token + "\n")
+    return token
+
+def serve(socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 8750,
+          max_jobs_per_repo: int = 1, workers: int = 1, options: Optional[Dict] = None,
+          audit_defaults: Optional[Dict] = None, allowed_repos: Optional[List[str]] = None,
+          auth_token: Optional[str] = None):
+    if not socket_path and not auth_token:
+        # Any local process can reach a TCP port, clients must prove they can read the token file
+        auth_token = write_token()
+        print(f"Auth token written to {TOKEN_PATH}")
+    daemon = Daemon(max_jobs_per_repo=max_jobs_per_repo, workers=workers, options=options,
+                    audit_defaults=audit_defaults, allowed_repos=allowed_repos)
+    server = make_server(daemon, socket_path, host, port, auth_token)
+    where = socket_path or f"http://{host}:{server.server_address[1]}"
+    print(f"---|| SentinelPR Daemon listening on {where} ||---")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    # Service managers stop us with SIGTERM, shut the workers down the same way as Ctrl-C
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("---|| SentinelPR Daemon Stopped ||---")
@@ -0,0 +1,187 @@
+# src/storage/disk_cache.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BUSY_TIMEOUT_SECONDS = 30.0
+
+class DiskCache:
+    '''
+    Small persistent key/value cache backed by a single SQLite file.
+
+    Values are raw bytes, callers decide the encoding. Entries expire after
+    `ttl_seconds` (if set) and the least recently used ones are evicted once
+    the cache grows past `max_bytes` or `max_entries`.
+    '''
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024,
+                 max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # Hit/miss counters for end of run reporting
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._last_stamp = 0.0
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        try:
+            self._conn = self._open()
+        except sqlite3.OperationalError:
+            # Locked or unreadable, not corrupted, another process may be using it
+            raise
+        except sqlite3.DatabaseError as e:
+            # A cache is disposable, start over rather than failing the run
+            print(f"Cache corrupted ({e}), resetting: {path}")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            self._conn = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        # isolation_level=None -> autocommit, we open transactions explicitly.
+        # Several processes may share the file, wait for a writer instead of failing.
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+
+        self._total_bytes, self._count = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries"
+        ).fetchone()
+        return conn
+
+    def _stamp(self) -> float:
+        # Strictly increasing access time so LRU order survives clock granularity
+        self._last_stamp = max(time.time(), self._last_stamp + 1e-6)
+        return self._last_stamp
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        expired = []
+
+        with self._lock:
+            now = self._stamp()
+            # Stay well under SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM entries WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self._expired(created_at, now):
+                        expired.append(key)
+                    else:
+                        found[key] = value
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+            if expired:
+                self._delete(expired)
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: bytes):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: List[Tuple[str, bytes]]):
+        if not items:
+            return
+        items = list(dict(items).items()) # Last write wins for repeated keys
+
+        with self._lock:
+            now = self._stamp()
+            # Take the write lock up front, a deferred transaction that upgrades
+            # later fails immediately instead of waiting out the busy timeout
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Replacing a key must not double count its size
+                self._delete([key for key, _ in items])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(key, value, len(value), now, now) for key, value in items]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._total_bytes, self._count = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries"
+                ).fetchone()
+                raise
+
+            self._total_bytes += sum(len(value) for _, value in items)
+            self._count += len(items)
+            self._evict()
+
+    def _delete(self, keys: List[str]):
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            size, count = self._conn.execute(
+                f"SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries WHERE key IN ({placeholders})",
+                chunk
+            ).fetchone()
+            if count:
+                self._conn.execute(f"DELETE FROM entries WHERE key IN ({placeholders})", chunk)
+                self._total_bytes -= size
+                self._count -= count
+
+    def _over_limit(self, slack: float = 1.0) -> bool:
+        if self.max_bytes is not None and self._total_bytes > self.max_bytes * slack:
+            return True
+        return self.max_entries is not None and self._count > self.max_entries
+
+    def _evict(self):
+        if not self._over_limit():
+            return
+
+        # Evict down to 90% of max_bytes so we don't pay for eviction on every insert
+        victims = []
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC")
+        for key, size in cursor:
+            if not self._over_limit(slack=0.9):
+                break
+            victims.append(key)
+            self._total_bytes -= size
+            self._count -= 1
+        cursor.close()
+
+        for i in range(0, len(victims), 500):
+            chunk = victims[i:i + 500]
+            self._conn.execute(f"DELETE FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
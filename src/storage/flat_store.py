@@ -0,0 +1,420 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.storage.vector_store import LEGACY_EMBEDDING_BACKEND, QUERY_CHUNK, EmbeddingMismatchError
+from src.telemetry import span
+
+INDEX_FILE = "flat.sqlite3"
+
+# Metadata fields with a column of their own, anything else goes to `extra` as JSON
+COLUMNS = ("file_path", "symbol_name", "type", "start_line", "end_line", "content_hash", "snippet")
+
+# Rows and queries per distance block, bounds the scratch matrix to a few MB
+ROW_BLOCK = 16384
+QUERY_BLOCK = 64
+
+class FlatVectorStore:
+    '''
+    Brute-force vector index: a memory-mapped float32 matrix plus SQLite metadata.
+
+    Same methods as VectorStore, without Chroma. Vectors are rows of one
+    contiguous file, symbol metadata lives in a table keyed by id (with an
+    index on file_path) that points at its row. Opening only connects to
+    SQLite and maps the file. Search computes squared L2 distances, like
+    Chroma's default, for a block of queries at a time with one matrix
+    product per block of rows.
+
+    Writes append rows, deleted and replaced rows stay in the matrix until
+    compact(). The matrix is written before the metadata transaction that
+    references it commits, so a crash never leaves metadata pointing at a
+    missing vector.
+    '''
+
+    def __init__(self, persist_dir: str = ".sentinel/db"):
+        self.persist_dir = persist_dir
+        os.makedirs(persist_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(persist_dir, INDEX_FILE), isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS symbols ("
+            "id TEXT PRIMARY KEY, row INTEGER NOT NULL, file_path TEXT, symbol_name TEXT, type TEXT, "
+            "start_line INTEGER, end_line INTEGER, content_hash TEXT, snippet TEXT, extra TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS symbols_by_file ON symbols (file_path)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        self.dimension = int(self._get_meta("dimension") or 0)
+        self._rows = int(self._get_meta("rows") or 0) # rows used in the matrix, live or not
+        self._matrix = None
+        self._live = None # bool per row, built on the first search
+        self._norms = None # squared row norms, built on the first search
+        # Concurrent audits share one store, writes and the search caches change under this
+        self._lock = threading.RLock()
+
+    # --- Metadata ---
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+    def embedding_backend(self) -> Tuple[Optional[str], Optional[int]]:
+        stored = self._get_meta("embedding_backend")
+        if stored is not None:
+            return stored, int(self._get_meta("embedding_dimension"))
+        if self.count():
+            return LEGACY_EMBEDDING_BACKEND
+        return None, None
+
+    def bind_embedder(self, backend_id: str, dimension: int):
+        '''
+        Record which embedder builds this index, and refuse a different one,
+        see VectorStore.bind_embedder().
+        '''
+        stored, stored_dim = self.embedding_backend()
+
+        if stored is None:
+            self._set_meta("embedding_backend", backend_id)
+            self._set_meta("embedding_dimension", dimension)
+            return
+
+        if stored != backend_id or int(stored_dim) != dimension:
+            raise EmbeddingMismatchError(
+                f"Index in {self.persist_dir} was built with {stored} ({stored_dim} dims), "
+                f"not {backend_id} ({dimension} dims). Use the same SENTINEL_EMBED_BACKEND "
+                f"or delete the index to rebuild it."
+            )
+
+    # --- Vector file ---
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.persist_dir, f"flat-{generation}.f32")
+
+    def _generation(self) -> int:
+        return int(self._get_meta("generation") or 0)
+
+    def _open_matrix(self, min_rows: int = 0):
+        # Mapped read-write, grown by doubling so appends rarely remap
+        if self._matrix is not None and len(self._matrix) >= min_rows:
+            return self._matrix
+
+        path = self._vectors_path(self._generation())
+        capacity = os.path.getsize(path) // (4 * self.dimension) if os.path.exists(path) else 0
+        if capacity < min_rows:
+            capacity = max(min_rows, 2 * capacity, 1024)
+            with open(path, "ab") as f:
+                f.truncate(capacity * 4 * self.dimension)
+        if capacity == 0:
+            return None
+        self._matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        return self._matrix
+
+    # --- Writes ---
+
+    def upsert(self, ids: list[str], vectors: list[list[float]], metadata: list[dict]):
+        if not ids:
+            return
+        with span("store.upsert", symbols=len(ids)), self._lock:
+            block = np.asarray(vectors, dtype=np.float32)
+            if not self.dimension:
+                self.dimension = block.shape[1]
+                self._set_meta("dimension", self.dimension)
+            if block.shape != (len(ids), self.dimension):
+                raise ValueError(f"Expected {len(ids)} vectors of {self.dimension} dims, got {block.shape}")
+
+            # Last write wins for an id repeated in one call
+            latest = {uid: i for i, uid in enumerate(ids)}
+            order = sorted(latest.values())
+
+            # Vectors first: rows past `rows` are invisible until the metadata commits
+            start = self._rows
+            matrix = self._open_matrix(start + len(order))
+            matrix[start:start + len(order)] = block[order]
+            matrix.flush()
+
+            records = []
+            for offset, i in enumerate(order):
+                records.append((ids[i], start + offset, *self._columns(metadata[i])))
+
+            replaced = self._rows_for_ids([ids[i] for i in order])
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO symbols "
+                    "(id, row, file_path, symbol_name, type, start_line, end_line, content_hash, snippet, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    records
+                )
+                self._set_meta("rows", start + len(order))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._rows = start + len(order)
+
+            if self._live is not None:
+                self._live = np.concatenate([self._live, np.ones(len(order), dtype=bool)])
+                self._live[replaced] = False
+                self._norms = np.concatenate([self._norms, np.einsum("ij,ij->i", block[order], block[order])])
+
+    def update_metadata(self, ids: list[str], metadata: list[dict]):
+        # Metadata only (e.g. shifted line numbers), the stored vectors are kept
+        with span("store.update_metadata", symbols=len(ids)), self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "UPDATE symbols SET file_path = ?, symbol_name = ?, type = ?, start_line = ?, "
+                    "end_line = ?, content_hash = ?, snippet = ?, extra = ? WHERE id = ?",
+                    [(*self._columns(meta), uid) for uid, meta in zip(ids, metadata)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, file_path: str):
+        self.delete_files([file_path])
+
+    def delete_ids(self, ids: list[str]):
+        with span("store.delete_ids", symbols=len(ids)), self._lock:
+            self._delete("id", ids)
+
+    def delete_files(self, file_paths: list[str]):
+        # Bulk purge of every symbol belonging to these files
+        with span("store.delete_files", files=len(file_paths)), self._lock:
+            self._delete("file_path", file_paths)
+
+    def _delete(self, column: str, values: list[str]):
+        for i in range(0, len(values), QUERY_CHUNK):
+            chunk = values[i:i + QUERY_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = [r for (r,) in self._conn.execute(
+                f"SELECT row FROM symbols WHERE {column} IN ({marks})", chunk
+            )]
+            self._conn.execute(f"DELETE FROM symbols WHERE {column} IN ({marks})", chunk)
+            if self._live is not None and rows:
+                self._live[rows] = False
+
+    # --- Reads ---
+
+    def get_symbols_for_file(self, file_path: str):
+        return self.get_symbols_for_files([file_path])[file_path]
+
+    def get_symbols_for_files(self, file_paths: list[str]) -> dict:
+        # file_path -> list of symbols, served by the file_path index
+        symbols = {path: [] for path in file_paths}
+        paths = list(symbols)
+
+        for i in range(0, len(paths), QUERY_CHUNK):
+            chunk = paths[i:i + QUERY_CHUNK]
+            with span("store.get_symbols_for_files", files=len(chunk)):
+                cursor = self._conn.execute(
+                    f"SELECT {self._select} FROM symbols WHERE file_path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for record in cursor:
+                    meta = self._metadata(record)
+                    symbols[meta['file_path']].append(meta)
+
+        return symbols
+
+    def get_embeddings(self, ids: list[str]) -> dict:
+        # Stored vectors by id, ids that are not in the index are left out
+        if not ids:
+            return {}
+
+        with span("store.get_embeddings", symbols=len(ids)), self._lock:
+            found = self._rows_by_id(ids)
+            matrix = self._open_matrix()
+            return {uid: [float(v) for v in matrix[row]] for uid, row in found.items()}
+
+    def list_file_paths(self) -> set:
+        return {path for (path,) in self._conn.execute("SELECT DISTINCT file_path FROM symbols")}
+
+    def search(self, query_vector: list, limit: int = 5):
+        return self.search_many([query_vector], limit=limit)[0]
+
+    def search_many(self, query_vectors: list, limit: int = 5) -> list:
+        # One pass over the matrix per block of queries, returns one match list per query vector
+        if not query_vectors:
+            return []
+
+        with span("store.search_many", queries=len(query_vectors)):
+            queries = np.asarray(query_vectors, dtype=np.float32)
+            top_rows, top_dist = self._top_k(queries, limit)
+
+            needed = sorted({int(r) for rows in top_rows for r in rows})
+            by_row = {}
+            for i in range(0, len(needed), QUERY_CHUNK):
+                chunk = needed[i:i + QUERY_CHUNK]
+                for record in self._conn.execute(
+                    f"SELECT {self._select}, row FROM symbols WHERE row IN ({','.join('?' * len(chunk))})", chunk
+                ):
+                    by_row[record[-1]] = record[:-1]
+
+        all_matches = []
+        for rows, dists in zip(top_rows, top_dist):
+            matches = []
+            for row, dist in zip(rows, dists):
+                if int(row) in by_row:
+                    match_data = self._metadata(by_row[int(row)])
+                    match_data['distance'] = float(dist)
+                    matches.append(match_data)
+            all_matches.append(matches)
+        return all_matches
+
+    def _top_k(self, queries, limit: int):
+        with self._lock:
+            n = self._rows
+            if n == 0 or not self.dimension or limit <= 0:
+                return [[] for _ in queries], [[] for _ in queries]
+            if queries.shape[1] != self.dimension:
+                raise ValueError(f"Query has {queries.shape[1]} dims, the index has {self.dimension}")
+
+            matrix = self._open_matrix()
+            if self._live is None:
+                # Rows of deleted or replaced symbols are still in the matrix, mask them out
+                live = np.zeros(n, dtype=bool)
+                live_rows = [r for (r,) in self._conn.execute("SELECT row FROM symbols")]
+                live[live_rows] = True
+                norms = np.empty(n, dtype=np.float32)
+                for start in range(0, n, ROW_BLOCK):
+                    rows = np.asarray(matrix[start:min(start + ROW_BLOCK, n)])
+                    norms[start:start + len(rows)] = np.einsum("ij,ij->i", rows, rows)
+                self._live, self._norms = live, norms
+
+            # A consistent snapshot, deletes flip _live in place while we search
+            live, norms = self._live.copy(), self._norms
+
+        k = min(limit, int(live.sum()))
+        if k == 0:
+            return [[] for _ in queries], [[] for _ in queries]
+
+        top_rows, top_dist = [], []
+        for q in range(0, len(queries), QUERY_BLOCK):
+            block = queries[q:q + QUERY_BLOCK]
+            q_norms = np.einsum("ij,ij->i", block, block)[:, None]
+
+            best_dist = np.full((len(block), 0), np.inf, dtype=np.float32)
+            best_rows = np.zeros((len(block), 0), dtype=np.int64)
+            for start in range(0, n, ROW_BLOCK):
+                end = min(start + ROW_BLOCK, n)
+                # |q - v|^2 = |q|^2 + |v|^2 - 2 q.v
+                dist = q_norms + norms[start:end] - 2.0 * (block @ np.asarray(matrix[start:end]).T)
+                dist[:, ~live[start:end]] = np.inf
+
+                best_dist = np.concatenate([best_dist, dist], axis=1)
+                best_rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, end), dist.shape)], axis=1)
+                if best_dist.shape[1] > k:
+                    keep = np.argpartition(best_dist, k - 1, axis=1)[:, :k]
+                    best_dist = np.take_along_axis(best_dist, keep, axis=1)
+                    best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+            order = np.argsort(best_dist, axis=1, kind="stable")
+            best_dist = np.maximum(np.take_along_axis(best_dist, order, axis=1), 0.0)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+            for rows, dists in zip(best_rows, best_dist):
+                alive = np.isfinite(dists)
+                top_rows.append(rows[alive])
+                top_dist.append(dists[alive])
+        return top_rows, top_dist
+
+    # --- Maintenance ---
+
+    def compact(self):
+        '''
+        Rewrite the matrix with live rows only, then vacuum the metadata.
+
+        The new matrix goes to a new generation file, the metadata switches
+        to it in one transaction, and only then is the old file removed.
+        '''
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        old_generation = self._generation()
+        new_generation = old_generation + 1
+        live = self._conn.execute("SELECT id, row FROM symbols ORDER BY row").fetchall()
+
+        new_path = self._vectors_path(new_generation)
+        if self.dimension and live:
+            source = self._open_matrix()
+            target = np.memmap(new_path, dtype=np.float32, mode="w+", shape=(len(live), self.dimension))
+            for start in range(0, len(live), ROW_BLOCK):
+                rows = [row for _, row in live[start:start + ROW_BLOCK]]
+                target[start:start + len(rows)] = source[rows]
+            target.flush()
+            del target
+
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany("UPDATE symbols SET row = ? WHERE id = ?",
+                                   [(new_row, uid) for new_row, (uid, _) in enumerate(live)])
+            self._set_meta("rows", len(live))
+            self._set_meta("generation", new_generation)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            if os.path.exists(new_path):
+                os.remove(new_path)
+            raise
+
+        self._matrix = None
+        self._live = None
+        self._norms = None
+        self._rows = len(live)
+        if os.path.exists(self._vectors_path(old_generation)):
+            os.remove(self._vectors_path(old_generation))
+        self._conn.execute("VACUUM")
+
+    def close(self):
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        # Fold the WAL back into the main file so caching the directory alone is enough
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+
+    # --- Helpers ---
+
+    _select = "id, " + ", ".join(COLUMNS) + ", extra"
+
+    @staticmethod
+    def _columns(meta: dict) -> tuple:
+        extra = {k: v for k, v in meta.items() if k not in COLUMNS and k != "id"}
+        return (*(meta.get(c) for c in COLUMNS), json.dumps(extra) if extra else None)
+
+    @staticmethod
+    def _metadata(record) -> Dict:
+        uid, *values, extra = record
+        # Like Chroma, only the fields that were stored come back
+        meta = {c: v for c, v in zip(COLUMNS, values) if v is not None}
+        if extra:
+            meta.update(json.loads(extra))
+        meta['id'] = uid
+        return meta
+
+    def _rows_by_id(self, ids: List[str]) -> Dict[str, int]:
+        found = {}
+        for i in range(0, len(ids), QUERY_CHUNK):
+            chunk = ids[i:i + QUERY_CHUNK]
+            found.update(self._conn.execute(
+                f"SELECT id, row FROM symbols WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return found
+
+    def _rows_for_ids(self, ids: List[str]) -> List[int]:
+        return list(self._rows_by_id(ids).values())
@@ -1,19 +1,99 @@
 import os
-import chromadb
-from chromadb.config import Settings
+import sqlite3
+from typing import Optional, Tuple
+from src.telemetry import span
+
+COLLECTION_NAME = "sentinel_symbols"
+# compact() builds the copy under the first name and parks the old collection under the second
+COMPACTING_NAME = f"{COLLECTION_NAME}_compacting"
+RETIRED_NAME = f"{COLLECTION_NAME}_retired"
+
+# Keep $in filters and bulk writes well below Chroma's limits
+QUERY_CHUNK = 500
+WRITE_CHUNK = 1000
+
+# Indexes built before the backend was recorded all came from Gemini
+LEGACY_EMBEDDING_BACKEND = ("gemini:models/text-embedding-004", 768)
+
+class EmbeddingMismatchError(ValueError):
+    pass
 
 class VectorStore:
     def __init__(self, persist_dir: str = ".sentinel/db"):
+        # Chroma is slow to import, only pay for it when this backend is used
+        import chromadb
+
+        self.persist_dir = persist_dir
         self.client = chromadb.PersistentClient(path=persist_dir) 
-        self.collection = self.client.get_or_create_collection(name="sentinel_symbols")
+        self._recover_compaction()
+        self.collection = self.client.get_or_create_collection(name=COLLECTION_NAME)
+
+    def _recover_compaction(self):
+        '''
+        Finishes or rolls back a compaction that was interrupted. Whatever
+        the crash point, one complete copy of the index survives: the live
+        collection, the retired one, or a finished copy.
+        '''
+        names = {c.name for c in self.client.list_collections()}
+        if COLLECTION_NAME not in names:
+            # The retired collection is the original, a copy is only complete once it is parked
+            for name in (RETIRED_NAME, COMPACTING_NAME):
+                if name in names:
+                    print(f"Restoring the index from an interrupted compaction ({name})")
+                    self.client.get_collection(name).modify(name=COLLECTION_NAME)
+                    names = (names - {name}) | {COLLECTION_NAME}
+                    break
+
+        # Only leftovers remain, the live collection is complete
+        for name in (COMPACTING_NAME, RETIRED_NAME):
+            if name in names and COLLECTION_NAME in names:
+                self.client.delete_collection(name)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def embedding_backend(self) -> Tuple[Optional[str], Optional[int]]:
+        # (backend_id, dimension) of the embedder that built this index, (None, None) while empty
+        meta = self.collection.metadata or {}
+        if meta.get("embedding_backend") is not None:
+            return meta["embedding_backend"], int(meta["embedding_dimension"])
+        if self.collection.count():
+            return LEGACY_EMBEDDING_BACKEND
+        return None, None
+
+    def bind_embedder(self, backend_id: str, dimension: int):
+        '''
+        Record which embedder builds this index, and refuse a different one:
+        vectors from two models are not comparable, search would silently
+        return garbage.
+        '''
+        meta = dict(self.collection.metadata or {})
+        stored, stored_dim = self.embedding_backend()
+
+        if stored is None:
+            meta.update({"embedding_backend": backend_id, "embedding_dimension": dimension})
+            self.collection.modify(metadata=meta)
+            return
+
+        if stored != backend_id or int(stored_dim) != dimension:
+            raise EmbeddingMismatchError(
+                f"Index in {self.persist_dir} was built with {stored} ({stored_dim} dims), "
+                f"not {backend_id} ({dimension} dims). Use the same SENTINEL_EMBED_BACKEND "
+                f"or delete the index to rebuild it."
+            )
+
+        if "embedding_backend" not in meta:
+            meta.update({"embedding_backend": stored, "embedding_dimension": stored_dim})
+            self.collection.modify(metadata=meta)
 
     def upsert(self, ids: list[str], vectors: list[list[float]], metadata: list[dict]):
-        self.collection.upsert(
-            ids=ids,
-            embeddings=vectors,
-            metadatas=metadata,
-            documents=[m['snippet'] for m in metadata]
-        )
+        with span("store.upsert", symbols=len(ids)):
+            self.collection.upsert(
+                ids=ids,
+                embeddings=vectors,
+                metadatas=metadata,
+                documents=[m['snippet'] for m in metadata]
+            )
 
     def get_symbols_for_file(self, file_path: str):
         result = self.collection.get(
@@ -29,26 +109,151 @@ class VectorStore:
                 
         return symbols
 
+    def get_symbols_for_files(self, file_paths: list[str]) -> dict:
+        # Bulk version of get_symbols_for_file, file_path -> list of symbols
+        symbols = {path: [] for path in file_paths}
+        paths = list(symbols)
+
+        for i in range(0, len(paths), QUERY_CHUNK):
+            chunk = paths[i:i + QUERY_CHUNK]
+            with span("store.get_symbols_for_files", files=len(chunk)):
+                result = self.collection.get(
+                    where={"file_path": {"$in": chunk}},
+                    include=["metadatas"]
+                )
+            if result['ids'] and result['metadatas']:
+                for id, meta in zip(result['ids'], result['metadatas']):
+                    meta['id'] = id
+                    symbols[meta['file_path']].append(meta)
+
+        return symbols
+
+    def update_metadata(self, ids: list[str], metadata: list[dict]):
+        # Metadata only (e.g. shifted line numbers), the stored vectors are kept
+        for i in range(0, len(ids), WRITE_CHUNK):
+            with span("store.update_metadata", symbols=len(ids[i:i + WRITE_CHUNK])):
+                self.collection.update(
+                    ids=ids[i:i + WRITE_CHUNK],
+                    metadatas=metadata[i:i + WRITE_CHUNK],
+                    documents=[m['snippet'] for m in metadata[i:i + WRITE_CHUNK]]
+                )
+
+    def get_embeddings(self, ids: list[str]) -> dict:
+        # Stored vectors by id, ids that are not in the collection are left out
+        if not ids:
+            return {}
+
+        with span("store.get_embeddings", symbols=len(ids)):
+            result = self.collection.get(ids=ids, include=["embeddings"])
+
+        embeddings = {}
+        if result['ids'] and result['embeddings'] is not None:
+            for id, vec in zip(result['ids'], result['embeddings']):
+                embeddings[id] = [float(v) for v in vec]
+        return embeddings
+
     def search(self, query_vector: list, limit: int = 5):
-        results = self.collection.query(
-            query_embeddings=[query_vector],
-            n_results=limit,
-            include=["metadatas", "documents", "distances"]
-        )
+        return self.search_many([query_vector], limit=limit)[0]
+
+    def search_many(self, query_vectors: list, limit: int = 5) -> list:
+        # One round trip for every query, returns one match list per query vector
+        if not query_vectors:
+            return []
+
+        with span("store.search_many", queries=len(query_vectors)):
+            results = self.collection.query(
+                query_embeddings=query_vectors,
+                n_results=limit,
+                include=["metadatas", "documents", "distances"]
+            )
         
-        matches = []
-        if results['ids']:
-            for i in range(len(results['ids'][0])):
-                match_data = results['metadatas'][0][i]
-                
-                match_data['id'] = results['ids'][0][i]
-                match_data['snippet'] = results['documents'][0][i]
-                match_data['distance'] = results['distances'][0][i]
-                
-                matches.append(match_data)
-        return matches
+        all_matches = []
+        for q in range(len(query_vectors)):
+            matches = []
+            if results['ids'] and q < len(results['ids']):
+                for i in range(len(results['ids'][q])):
+                    match_data = results['metadatas'][q][i]
+                    
+                    match_data['id'] = results['ids'][q][i]
+                    match_data['snippet'] = results['documents'][q][i]
+                    match_data['distance'] = results['distances'][q][i]
+                    
+                    matches.append(match_data)
+            all_matches.append(matches)
+        return all_matches
 
     def delete(self, file_path: str):
         self.collection.delete(
             where={"file_path": file_path}
-        )
\ No newline at end of file
+        )
+
+    def delete_ids(self, ids: list[str]):
+        for i in range(0, len(ids), WRITE_CHUNK):
+            with span("store.delete_ids", symbols=len(ids[i:i + WRITE_CHUNK])):
+                self.collection.delete(ids=ids[i:i + WRITE_CHUNK])
+
+    def delete_files(self, file_paths: list[str]):
+        # Bulk purge of every symbol belonging to these files
+        for i in range(0, len(file_paths), QUERY_CHUNK):
+            with span("store.delete_files", files=len(file_paths[i:i + QUERY_CHUNK])):
+                self.collection.delete(
+                    where={"file_path": {"$in": file_paths[i:i + QUERY_CHUNK]}}
+                )
+
+    def list_file_paths(self) -> set:
+        paths = set()
+        total = self.collection.count()
+        for offset in range(0, total, WRITE_CHUNK):
+            result = self.collection.get(limit=WRITE_CHUNK, offset=offset, include=["metadatas"])
+            paths.update(m['file_path'] for m in result['metadatas'] or [])
+        return paths
+
+    def compact(self):
+        '''
+        Rebuild the collection so space held by deleted vectors is released.
+
+        Live records are copied into a fresh collection, which then replaces
+        the old one, and the SQLite file is vacuumed. The old collection is
+        renamed aside, not deleted, until the copy has taken its name.
+        '''
+        self._recover_compaction() # Leftover from an interrupted compaction
+
+        # Keeps the embedding backend stamp, see bind_embedder()
+        fresh = self.client.create_collection(name=COMPACTING_NAME, metadata=self.collection.metadata or None)
+        total = self.collection.count()
+        for offset in range(0, total, WRITE_CHUNK):
+            page = self.collection.get(
+                limit=WRITE_CHUNK, offset=offset,
+                include=["embeddings", "metadatas", "documents"]
+            )
+            if page['ids']:
+                fresh.add(
+                    ids=page['ids'],
+                    embeddings=page['embeddings'],
+                    metadatas=page['metadatas'],
+                    documents=page['documents']
+                )
+
+        # Renames only until the copy is live, the old collection is dropped last.
+        # A crash in between is repaired by _recover_compaction() on the next open.
+        self.collection.modify(name=RETIRED_NAME)
+        fresh.modify(name=COLLECTION_NAME)
+        self.collection = self.client.get_collection(COLLECTION_NAME)
+        self.client.delete_collection(RETIRED_NAME)
+
+        try:
+            connection = sqlite3.connect(os.path.join(self.persist_dir, "chroma.sqlite3"))
+            connection.execute("VACUUM")
+            connection.close()
+        except sqlite3.Error as e:
+            print(f"Skipped VACUUM: {e}")
+
+def make_store(name: Optional[str] = None, persist_dir: str = ".sentinel/db"):
+    # SENTINEL_VECTOR_STORE=chroma (default) | flat
+    name = (name or os.getenv("SENTINEL_VECTOR_STORE", "chroma")).lower()
+    if name == "chroma":
+        return VectorStore(persist_dir)
+    if name == "flat":
+        from src.storage.flat_store import FlatVectorStore
+        return FlatVectorStore(persist_dir)
+    raise ValueError(f"Unknown vector store: {name}")
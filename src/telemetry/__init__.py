@@ -0,0 +1,9 @@
+# src/telemetry/__init__.py
+from src.telemetry.tracer import Span, Tracer
+
+# Process wide tracer, everything records into this one
+tracer = Tracer()
+span = tracer.span
+count = tracer.count
+
+__all__ = ["Span", "Tracer", "tracer", "span", "count"]
@@ -0,0 +1,77 @@
+# src/telemetry/startup.py
+import os
+import subprocess
+import sys
+import threading
+from typing import Dict, List
+
+IMPORTTIME_PREFIX = "import time:"
+
+def parse_importtime(lines: List[str]) -> List[Dict]:
+    '''
+    Parses `python -X importtime` output into one record per module.
+
+    Each record has the module name, its `depth` (0 for imports made by the
+    program itself, deeper for imports made by other modules while they
+    load), and its `self_us` and `cumulative_us` import times.
+    '''
+    records = []
+    for line in lines:
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(IMPORTTIME_PREFIX):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue # the header line
+        name = fields[2].rstrip()
+        records.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1])
+        })
+    return records
+
+def format_report(records: List[Dict], top: int = 15) -> str:
+    # Top level imports add up to the total, nested ones are already inside them
+    outer = sorted((r for r in records if r["depth"] == 0), key=lambda r: -r["cumulative_us"])
+    total_us = sum(r["cumulative_us"] for r in outer)
+    lines = [
+        f"---|| Startup imports: {total_us / 1000:.1f}ms over {len(records)} modules ||---",
+        f"{'cumulative':>12} {'self':>9}  module"
+    ]
+    for r in outer[:top]:
+        lines.append(f"{r['cumulative_us'] / 1000:>10.1f}ms {r['self_us'] / 1000:>7.1f}ms  {r['module']}")
+    if len(outer) > top:
+        lines.append(f"... {len(outer) - top} more top level imports")
+    return "\n".join(lines)
+
+def run_profiled(script: str, argv: List[str], top: int = 15) -> int:
+    '''
+    Runs `script argv` again under `-X importtime` and prints which modules
+    it imported and what each one cost, lazy imports included. Everything
+    else the command writes passes straight through. Returns its exit code.
+    '''
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", script, *argv],
+        stderr=subprocess.PIPE, text=True, env=dict(os.environ, PYTHONUNBUFFERED="1")
+    )
+    timings = []
+
+    def read_stderr():
+        for line in process.stderr:
+            if line.startswith(IMPORTTIME_PREFIX):
+                timings.append(line)
+            else:
+                sys.stderr.write(line)
+
+    reader = threading.Thread(target=read_stderr, daemon=True)
+    reader.start()
+    try:
+        returncode = process.wait()
+    except KeyboardInterrupt:
+        # The child got the same SIGINT, let it finish cleaning up
+        returncode = process.wait()
+    reader.join()
+
+    print(format_report(parse_importtime(timings), top=top))
+    return returncode
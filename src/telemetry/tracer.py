@@ -0,0 +1,221 @@
+# src/telemetry/tracer.py
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Numeric span attributes that get summed into the per-stage summary
+SUMMED_ATTRIBUTES = ("bytes", "symbols", "tokens_in", "tokens_out")
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "id", "parent", "start", "_t0", "error")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.id, self.parent = self.tracer._push()
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._pop(self, duration)
+        return False
+
+class Tracer:
+    '''
+    In-process spans and counters, no dependencies.
+
+    Finished spans are kept as plain records (up to `max_spans`, the
+    per-stage summary keeps counting past that) so worker processes can ship
+    theirs back with drain()/absorb(). Export happens once at the end of a
+    run: a Chrome trace event JSON file, OTLP when OpenTelemetry and an
+    endpoint are available, and a markdown table for the GitHub step summary.
+    '''
+
+    def __init__(self, max_spans: int = 200_000):
+        self.max_spans = max_spans
+        self.spans: List[Dict] = []
+        self.summary: Dict[str, Dict] = {}
+        self.counters: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _push(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # pid keeps ids unique when worker records are absorbed
+        span_id = f"{os.getpid()}-{next(self._ids)}"
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        return span_id, parent
+
+    def _pop(self, span: Span, duration: float):
+        self._local.stack.pop()
+        record = {
+            "name": span.name, "id": span.id, "parent": span.parent,
+            "start": span.start, "duration": duration,
+            "pid": os.getpid(), "tid": threading.get_ident(), "attrs": span.attrs
+        }
+        if span.error:
+            record["error"] = span.error
+        with self._lock:
+            self._record(record)
+
+    def _record(self, record: Dict):
+        stats = self.summary.get(record["name"])
+        if stats is None:
+            stats = self.summary[record["name"]] = {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0}
+        stats["calls"] += 1
+        stats["errors"] += "error" in record
+        stats["total"] += record["duration"]
+        stats["max"] = max(stats["max"], record["duration"])
+        for key in SUMMED_ATTRIBUTES:
+            value = record["attrs"].get(key)
+            if isinstance(value, (int, float)):
+                stats[key] = stats.get(key, 0) + value
+
+        if len(self.spans) < self.max_spans:
+            self.spans.append(record)
+
+    def drain(self) -> Dict:
+        # Hand this process' spans and counters over (to the parent process)
+        with self._lock:
+            spans, counters = self.spans, self.counters
+            self.spans, self.counters, self.summary = [], {}, {}
+        return {"spans": spans, "counters": counters}
+
+    def absorb(self, drained: Optional[Dict]):
+        if not drained:
+            return
+        with self._lock:
+            for record in drained["spans"]:
+                self._record(record)
+            for name, value in drained["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.spans, self.summary, self.counters = [], {}, {}
+
+    # --- Export ---
+
+    def write_json(self, path: str):
+        # Chrome trace event format, opens in Perfetto or chrome://tracing
+        events = []
+        for record in self.spans:
+            args = dict(record["attrs"])
+            if "error" in record:
+                args["error"] = record["error"]
+            events.append({
+                "name": record["name"], "ph": "X", "pid": record["pid"], "tid": record["tid"],
+                "ts": int(record["start"] * 1e6), "dur": int(record["duration"] * 1e6), "args": args
+            })
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "summary": self.summary,
+                "counters": self.counters
+            }, f)
+
+    def summary_markdown(self, title: str) -> str:
+        lines = [
+            f"### {title}", "",
+            "| Stage | Calls | Total (s) | Mean (ms) | Max (ms) | Bytes | Symbols | Tokens in | Tokens out |",
+            "|---|---:|---:|---:|---:|---:|---:|---:|---:|"
+        ]
+        for name, stats in sorted(self.summary.items(), key=lambda item: -item[1]["total"]):
+            mean = stats["total"] / stats["calls"] * 1000
+            extra = " | ".join(f"{int(stats[key]):,}" if key in stats else "" for key in SUMMED_ATTRIBUTES)
+            errors = f" ({stats['errors']} failed)" if stats["errors"] else ""
+            lines.append(
+                f"| {name} | {stats['calls']:,}{errors} | {stats['total']:.2f} | {mean:.1f} | "
+                f"{stats['max'] * 1000:.1f} | {extra} |"
+            )
+        if self.counters:
+            lines += ["", "| Counter | Value |", "|---|---:|"]
+            lines += [f"| {name} | {value:,} |" for name, value in sorted(self.counters.items())]
+        return "\n".join(lines) + "\n"
+
+    def write_step_summary(self, title: str, path: Optional[str] = None):
+        path = path or os.getenv("GITHUB_STEP_SUMMARY")
+        if not path or not self.summary:
+            return
+        with open(path, "a") as f:
+            f.write(self.summary_markdown(title) + "\n")
+
+    def export_otlp(self, service_name: str = "sentinelpr") -> bool:
+        '''
+        Replays the recorded spans through the OpenTelemetry SDK with an
+        OTLP exporter. Needs OTEL_EXPORTER_OTLP_ENDPOINT and the SDK, a
+        missing package only skips the export.
+        '''
+        if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") or not self.spans:
+            return False
+        try:
+            from opentelemetry import trace
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        except ImportError as e:
+            print(f"Skipping OTLP export, OpenTelemetry is not installed: {e}")
+            return False
+
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        otel_tracer = provider.get_tracer("sentinelpr")
+
+        # Parents start before their children, so replay in start order
+        started = {}
+        for record in sorted(self.spans, key=lambda r: r["start"]):
+            parent = started.get(record["parent"])
+            context = trace.set_span_in_context(parent) if parent is not None else None
+            start_ns = int(record["start"] * 1e9)
+            otel_span = otel_tracer.start_span(
+                record["name"], context=context, start_time=start_ns,
+                attributes={k: v for k, v in record["attrs"].items() if isinstance(v, (str, bool, int, float))}
+            )
+            if "error" in record:
+                otel_span.set_status(trace.Status(trace.StatusCode.ERROR, record["error"]))
+            otel_span.end(end_time=start_ns + int(record["duration"] * 1e9))
+            started[record["id"]] = otel_span
+
+        provider.shutdown() # flushes the batch processor
+        return True
+
+    def export(self, title: str, json_path: Optional[str] = None):
+        # Everything configured for this run, never fails the run itself
+        try:
+            json_path = json_path or os.getenv("SENTINEL_TRACE")
+            if json_path:
+                self.write_json(json_path)
+                print(f"Trace written to {json_path}")
+            self.write_step_summary(title)
+            self.export_otlp()
+        except Exception as e:
+            print(f"Telemetry export failed: {e}")
@@ -0,0 +1,110 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+from src.ai.auditor import Auditor
+from src.orchestrator.batcher import plan_batches
+from src.orchestrator.context_packer import ContextPacker
+
+def symbol(file_path, start, end, name="f", size=40):
+    return {"file_path": file_path, "start_line": start, "end_line": end,
+            "symbol_name": name, "snippet": "x" * size}
+
+class TestPlanBatches(unittest.TestCase):
+    def test_groups_by_file_in_line_order(self):
+        symbols = [symbol("b.py", 1, 5), symbol("a.py", 20, 30), symbol("a.py", 1, 10)]
+
+        batches = plan_batches(symbols, ["", "", ""], max_tokens=1000, max_symbols=2)
+
+        self.assertEqual(batches, [[2, 1], [0]])
+
+    def test_neighbouring_files_share_a_batch_without_splitting_a_file(self):
+        symbols = [symbol("a.py", 1, 5), symbol("b.py", 1, 5), symbol("b.py", 10, 15), symbol("c.py", 1, 5)]
+
+        batches = plan_batches(symbols, [""] * 4, max_tokens=1000, max_symbols=3)
+
+        self.assertEqual(batches, [[0, 1, 2], [3]])
+
+    def test_token_budget_and_oversized_symbols(self):
+        symbols = [symbol("a.py", 1, 5, size=400), symbol("a.py", 10, 15, size=4000), symbol("a.py", 20, 25, size=400)]
+
+        batches = plan_batches(symbols, [""] * 3, max_tokens=500, max_symbols=8)
+
+        self.assertEqual(batches, [[0], [1], [2]])
+
+    def test_one_symbol_disables_batching(self):
+        symbols = [symbol("a.py", 1, 5), symbol("a.py", 10, 15)]
+
+        self.assertEqual(plan_batches(symbols, ["", ""], max_symbols=1), [[0], [1]])
+
+class TestAnalyzeBatch(unittest.TestCase):
+    def setUp(self):
+        self.model = MagicMock()
+        self.auditor = Auditor(limiter=MagicMock(max_concurrency=1), model=self.model)
+        self.auditor.limiter.call.side_effect = lambda fn, **kwargs: fn(**kwargs)
+
+    def respond(self, reviews):
+        self.model.generate_content.return_value.text = json.dumps({"reviews": reviews})
+
+    def test_one_request_routes_reviews_by_symbol_and_filters_lines(self):
+        self.respond([
+            {"symbol_id": "S1", "line": 3, "issue": "a"},
+            {"symbol_id": "S2", "line": 12, "issue": "b"},
+            {"symbol_id": "S2", "line": 3, "issue": "valid for S1 only"},
+        ])
+        items = [
+            ("+ a", symbol("a.py", 1, 5, "first"), [], [3]),
+            ("+ b", symbol("a.py", 10, 15, "second"), [], [12]),
+        ]
+
+        results = self.auditor.analyze_batch(items)
+
+        self.assertEqual(self.model.generate_content.call_count, 1)
+        self.assertEqual([[r["issue"] for r in reviews] for reviews in results], [["a"], ["b"]])
+        self.assertEqual(results[1][0], {"line": 12, "issue": "b", "file_path": "a.py"})
+
+    def test_reviews_without_symbol_id_fall_back_to_an_unambiguous_line(self):
+        self.respond([{"line": 12, "issue": "b"}, {"line": 3, "issue": "ambiguous"}])
+        items = [
+            ("+ a", symbol("a.py", 1, 5), [], [3]),
+            ("+ b", symbol("b.py", 1, 15), [], [3, 12]),
+        ]
+
+        results = self.auditor.analyze_batch(items)
+
+        self.assertEqual([[r["issue"] for r in reviews] for reviews in results], [[], ["b"]])
+
+    def test_shared_context_is_packed_once_without_batch_symbols(self):
+        self.respond([])
+        self.auditor.packer = ContextPacker()
+        neighbour = {"id": "c.py::g", "file_path": "c.py", "start_line": 1, "end_line": 2,
+                     "snippet": "def neighbour(): pass", "distance": 0.2}
+        inside = {"id": "a.py::f", "file_path": "a.py", "start_line": 10, "end_line": 15,
+                  "snippet": "def second(): pass", "distance": 0.1}
+        items = [
+            ("+ a", symbol("a.py", 1, 5), [neighbour], [3]),
+            ("+ b", symbol("a.py", 10, 15), [neighbour, inside], [12]),
+        ]
+
+        self.auditor.analyze_batch(items)
+
+        prompt = self.model.generate_content.call_args.kwargs["contents"][0]["parts"][1]
+        self.assertEqual(prompt.count("def neighbour(): pass"), 1)
+        self.assertNotIn("def second(): pass", prompt)
+
+    def test_single_item_uses_the_per_symbol_prompt(self):
+        self.respond([{"line": 3, "issue": "a"}])
+
+        results = self.auditor.analyze_batch([("+ a", symbol("a.py", 1, 5), [], [3])])
+
+        prompt = self.model.generate_content.call_args.kwargs["contents"][0]["parts"][1]
+        self.assertNotIn("## SYMBOL", prompt)
+        self.assertEqual([r["issue"] for r in results[0]], ["a"])
+
+    def test_failed_request_returns_empty_reviews_per_symbol(self):
+        self.model.generate_content.return_value.text = "not json"
+        items = [("+ a", symbol("a.py", 1, 5), [], [3]), ("+ b", symbol("a.py", 10, 15), [], [12])]
+
+        self.assertEqual(self.auditor.analyze_batch(items), [[], []])
+
+if __name__ == '__main__':
+    unittest.main()
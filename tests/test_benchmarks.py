@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from benchmarks.compare import compare
+from benchmarks.e2e_bench import build_parser, run_benchmark
+from benchmarks.stubs import StubModel
+from benchmarks.synthetic import generate_diff, generate_repo
+from src.ai.auditor import Auditor
+from src.git.diff_parser import DiffParser
+
+class TestSyntheticWorkload(unittest.TestCase):
+    def test_diff_matches_the_generated_repo(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = generate_repo(root, files=8, symbols_per_file=12, nesting=2, java_ratio=0.5, seed=3)
+            diff = generate_diff(root, paths, changed_files=4, hunks_per_file=2, lines_per_hunk=3, seed=3)
+            hunks = DiffParser().parse(diff)
+
+            self.assertEqual(len({h.file_path for h in hunks}), 4)
+            for hunk in hunks:
+                with open(os.path.join(root, hunk.file_path)) as f:
+                    lines = f.read().split("\n")
+                added = [l[1:] for l in hunk.lines if l.startswith("+")]
+                self.assertEqual([lines[n - 1] for n in hunk.changed_lines], added)
+
+    def test_stub_model_reviews_a_valid_line(self):
+        auditor = Auditor(model=StubModel(review_every=1))
+        reviews = auditor.analyze("diff", {"file_path": "a.py", "snippet": "def f(): pass"}, [], [7, 8])
+
+        self.assertEqual([r["line"] for r in reviews], [7])
+
+    def test_benchmark_runs_the_shipped_audit_path(self):
+        args = build_parser().parse_args(["--files", "6", "--symbols", "4", "--changed-files", "3",
+                                          "--workers", "1", "--store", "flat", "--batch-symbols", "4"])
+        metrics = run_benchmark(args)
+
+        self.assertGreater(metrics["hunks"], 0)
+        self.assertGreater(metrics["audited_symbols"], 0)
+        self.assertGreater(metrics["audit_requests"], 0)
+        self.assertGreater(metrics["review_comments"], 0)
+
+class TestCompare(unittest.TestCase):
+    def test_direction_aware_regressions(self):
+        base = {"metrics": {"index_s": 10.0, "index_files_per_s": 100.0, "hunks": 10}}
+        head = {"metrics": {"index_s": 10.5, "index_files_per_s": 80.0, "hunks": 20}}
+
+        rows = {row[0]: row[4] for row in compare(base, head, threshold=10.0)}
+        self.assertEqual(rows, {"index_s": False, "index_files_per_s": True, "hunks": False})
+
+if __name__ == '__main__':
+    unittest.main()
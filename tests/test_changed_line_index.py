@@ -0,0 +1,44 @@
+import random
+import unittest
+from src.models.diffhunk import DiffHunk
+from src.orchestrator.changed_line_index import ChangedLineIndex
+
+class TestDiffHunkRanges(unittest.TestCase):
+    def test_changed_lines_are_stored_as_runs(self):
+        hunk = DiffHunk(file_path="a.py", start_line=1, changed_lines=[7, 3, 4, 5, 9, 8])
+
+        self.assertEqual(hunk.changed_ranges, [(3, 5), (7, 9)])
+        self.assertEqual(hunk.changed_lines, [3, 4, 5, 7, 8, 9])
+
+    def test_add_changed_line_extends_the_last_run(self):
+        hunk = DiffHunk(file_path="a.py", start_line=10)
+        for line in [10, 11, 12, 20, 2]:
+            hunk.add_changed_line(line)
+
+        self.assertEqual(hunk.changed_ranges, [(2, 2), (10, 12), (20, 20)])
+
+class TestChangedLineIndex(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(11)
+        lines = {rng.randint(1, 2000) for _ in range(600)}
+        hunks = [
+            DiffHunk(file_path="a.py", start_line=1, changed_lines=[l for l in lines if l % 3 == k])
+            for k in range(3)
+        ]
+        index = ChangedLineIndex.by_file(hunks)["a.py"]
+
+        for _ in range(300):
+            start = rng.randint(1, 2100)
+            end = start + rng.randint(0, 120)
+            expected = sorted(l for l in lines if start <= l <= end)
+            self.assertEqual(index.lines_in(start, end), expected)
+            self.assertEqual(index.any_in(start, end), bool(expected))
+
+    def test_ranges_are_clipped_to_the_query(self):
+        index = ChangedLineIndex([(10, 20), (30, 40)])
+
+        self.assertEqual(index.ranges_in(15, 35), [(15, 20), (30, 35)])
+        self.assertEqual(index.ranges_in(21, 29), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from src.orchestrator.context_packer import ELISION, ContextPacker, estimate_tokens
+
+def snippet(file_path, start, end, text, distance):
+    return {"file_path": file_path, "start_line": start, "end_line": end, "snippet": text, "distance": distance}
+
+class TestContextPacker(unittest.TestCase):
+    def test_ranks_by_distance_and_drops_nested_and_duplicate_snippets(self):
+        snippets = [
+            snippet("a.py", 1, 40, "class Cart:\n    pass", 0.4),
+            snippet("a.py", 10, 12, "def add(self): pass", 0.1),
+            snippet("b.py", 1, 2, "def add(self): pass", 0.2), # same text, other file
+            snippet("c.py", 5, 6, "def total(): pass", 0.3),
+        ]
+
+        packed = ContextPacker().pack(snippets)
+
+        self.assertEqual([(s["file_path"], s["start_line"]) for s in packed], [("a.py", 10), ("c.py", 5)])
+
+    def test_snippets_overlapping_the_audited_symbol_are_dropped(self):
+        symbol = {"file_path": "a.py", "start_line": 10, "end_line": 12}
+        snippets = [snippet("a.py", 1, 40, "class Cart:\n    pass", 0.1), snippet("b.py", 1, 2, "x = 1", 0.2)]
+
+        packed = ContextPacker().pack(snippets, symbol)
+
+        self.assertEqual([s["file_path"] for s in packed], ["b.py"])
+
+    def test_large_snippet_keeps_signature_and_relevant_region(self):
+        body = [f"    filler_{i} = {i}" for i in range(200)]
+        body[150] = "    discount = apply_coupon(price)"
+        text = "def checkout(price):\n    '''Doc'''\n" + "\n".join(body)
+
+        packed = ContextPacker(max_snippet_tokens=60).pack(
+            [snippet("a.py", 1, 202, text, 0.1)], focus="+    total = apply_coupon(price)"
+        )[0]
+
+        self.assertTrue(packed["trimmed"])
+        self.assertTrue(packed["snippet"].startswith("def checkout(price):"))
+        self.assertIn("apply_coupon(price)", packed["snippet"])
+        self.assertIn(ELISION, packed["snippet"])
+        self.assertLessEqual(estimate_tokens(packed["snippet"]), 60)
+
+    def test_total_context_respects_the_budget(self):
+        snippets = [snippet(f"f{i}.py", 1, 50, "\n".join(f"line_{j} = {j}" for j in range(50)), i / 10)
+                    for i in range(10)]
+
+        packed = ContextPacker(max_tokens=500, max_snippet_tokens=200).pack(snippets)
+
+        self.assertLessEqual(sum(estimate_tokens(s["snippet"]) for s in packed), 500)
+        self.assertEqual(packed[0]["file_path"], "f0.py")
+
+if __name__ == '__main__':
+    unittest.main()
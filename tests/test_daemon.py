@@ -0,0 +1,206 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from src.server.daemon import Daemon, ReadWriteLock, execute_job, make_server, write_token
+
+class InlineWorker:
+    '''Runs jobs on a thread pool in this process instead of a spawned worker.'''
+
+    def __init__(self, repo_dir, max_jobs, workers, options, on_event):
+        self.on_event = on_event
+        self.lock = ReadWriteLock()
+        self.pool = ThreadPoolExecutor(max_workers=max_jobs)
+
+    def submit(self, job):
+        def run():
+            self.on_event("started", job["id"], None)
+            self.on_event("done", job["id"], execute_job(job, "workspace", self.lock))
+        self.pool.submit(run)
+
+    def stop(self):
+        self.pool.shutdown()
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.daemon = Daemon(default_repo=self.tmp.name, worker_factory=InlineWorker)
+        self.server = make_server(self.daemon, port=0, auth_token="s3cret")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.daemon.stop()
+        self.tmp.cleanup()
+
+    def call(self, path, body=None, headers=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json", "Authorization": "Bearer s3cret", **(headers or {})}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + path, data=data, headers=headers)) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_jobs_run_on_warm_components_and_report_latency(self):
+        seen = {}
+        def fake_audit(workspace, diff_path, repo, pr, token, **options):
+            with open(diff_path) as f:
+                seen.update(workspace=workspace, diff=f.read(), options=options, path=diff_path)
+            return [{"line": 3}]
+
+        with patch("src.main.run_indexer", return_value={"files": 2}) as run_indexer, \
+             patch("src.main.audit_diff", side_effect=fake_audit):
+            status, index = self.call("/jobs?wait=5", {"kind": "index"})
+            _, audit = self.call("/jobs?wait=5", {"kind": "audit", "diff_text": "+x", "batch_symbols": 1,
+                                                  "token": "secret"})
+
+        self.assertEqual((status, index["status"], index["result"]), (200, "done", {"files": 2}))
+        self.assertEqual(run_indexer.call_args.kwargs["workspace"], "workspace")
+        self.assertEqual(run_indexer.call_args.kwargs["start_method"], "spawn")
+        self.assertEqual(audit["result"], {"reviews": [{"line": 3}]})
+        self.assertNotIn("token", audit)
+        self.assertEqual((seen["workspace"], seen["diff"], seen["options"]), ("workspace", "+x", {"batch_symbols": 1}))
+        self.assertFalse(os.path.exists(seen["path"]))
+
+        _, stats = self.call("/stats")
+        self.assertEqual(stats["jobs"]["index"]["jobs"], 1)
+        self.assertIn("p95", stats["jobs"]["audit"]["run_s"])
+        self.assertEqual(list(stats["by_repo"]), [os.path.realpath(self.tmp.name)])
+        self.assertEqual(self.call(f"/jobs/{audit['id']}")[1]["status"], "done")
+
+    def test_failures_are_reported_without_stopping_the_worker(self):
+        with patch("src.main.audit_diff", side_effect=SystemExit(0)):
+            _, failed = self.call("/jobs?wait=5", {"kind": "audit", "diff": "missing.diff"})
+
+        self.assertEqual((failed["status"], failed["error"]), ("failed", "SystemExit: 0"))
+        self.assertEqual(self.daemon.stats()["jobs"]["audit"]["failed"], 1)
+
+    def test_serve_audit_options_are_job_defaults(self):
+        from src.main import parse_args, serve_options
+        kwargs = serve_options(parse_args(["serve", "--batch-symbols", "3", "--diff-budget", "900"]))
+        daemon = Daemon(default_repo=self.tmp.name, worker_factory=InlineWorker,
+                        audit_defaults=kwargs["audit_defaults"])
+        self.addCleanup(daemon.stop)
+        seen = []
+        with patch("src.main.audit_diff", side_effect=lambda *args, **options: seen.append(options) or []):
+            for request in ({"kind": "audit", "diff_text": "+x"},
+                            {"kind": "audit", "diff_text": "+x", "batch_symbols": 1}):
+                self.assertEqual(daemon.get(daemon.submit(request)["id"], wait=5)["status"], "done")
+
+        self.assertEqual(seen[0]["batch_symbols"], 3)
+        self.assertEqual(seen[0]["diff_budget"], 900)
+        self.assertEqual(seen[1]["batch_symbols"], 1)
+
+    def test_every_serve_option_reaches_the_daemon(self):
+        from src.main import parse_args, serve_options
+        args = parse_args(["serve"])
+        read = set()
+
+        class Recorder:
+            def __getattr__(self, name):
+                read.add(name)
+                return getattr(args, name)
+
+        serve_options(Recorder())
+        # main() itself handles these before the daemon starts
+        handled = {"command", "trace", "profile_startup"}
+        self.assertEqual(set(vars(args)) - handled - read, set())
+
+    def test_bad_requests(self):
+        self.assertEqual(self.call("/jobs", {"kind": "deploy"})[0], 400)
+        self.assertEqual(self.call("/jobs", {"kind": "audit"})[0], 400)
+        self.assertEqual(self.call("/jobs", {"kind": "index", "repo_dir": "/no/such/dir"})[0], 400)
+        self.assertEqual(self.call("/jobs/404")[0], 404)
+
+    def test_requests_are_limited_to_allowed_checkouts(self):
+        other = tempfile.TemporaryDirectory()
+        self.addCleanup(other.cleanup)
+        os.symlink(other.name, os.path.join(self.tmp.name, "link"))
+
+        self.assertEqual(self.call("/jobs", {"kind": "index", "repo_dir": other.name})[0], 400)
+        self.assertEqual(self.call("/jobs", {"kind": "index", "repo_dir": os.path.join(self.tmp.name, "link")})[0], 400)
+        self.assertEqual(self.call("/jobs", {"kind": "audit", "diff": "/etc/passwd"})[0], 400)
+        self.assertEqual(self.call("/jobs", {"kind": "audit", "diff": "../x.diff"})[0], 400)
+
+        self.daemon.allowed_repos.append(os.path.realpath(other.name))
+        with patch("src.main.run_indexer", return_value={}):
+            self.assertEqual(self.call("/jobs?wait=5", {"kind": "index", "repo_dir": other.name})[0], 200)
+
+    def test_requests_need_the_token_and_json(self):
+        index = {"kind": "index"}
+        self.assertEqual(self.call("/jobs", index, {"Authorization": ""})[0], 401)
+        self.assertEqual(self.call("/jobs", index, {"Authorization": "Bearer wrong"})[0], 401)
+        self.assertEqual(self.call("/stats", headers={"Authorization": ""})[0], 401)
+        self.assertEqual(self.call("/health", headers={"Authorization": ""})[0], 200)
+        # What a cross-site page can send without a preflight
+        self.assertEqual(self.call("/jobs", index, {"Content-Type": "text/plain"})[0], 415)
+        self.assertEqual(self.call("/jobs", index, {"Content-Type": "application/x-www-form-urlencoded"})[0], 415)
+        self.assertEqual(self.daemon.stats()["repos"], [])
+
+    def test_socket_and_token_file_are_private(self):
+        server = make_server(self.daemon, socket_path=os.path.join(self.tmp.name, "d.sock"))
+        self.addCleanup(server.server_close)
+        token_path = os.path.join(self.tmp.name, ".sentinel", "daemon.token")
+        token = write_token(token_path)
+
+        self.assertEqual(stat.S_IMODE(os.stat(server.server_address).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(token_path).st_mode), 0o600)
+        with open(token_path) as f:
+            self.assertEqual(f.read().strip(), token)
+
+class TestReadWriteLock(unittest.TestCase):
+    def test_writer_waits_for_readers(self):
+        lock = ReadWriteLock()
+        lock.acquire_read()
+        acquired = threading.Event()
+
+        def write():
+            lock.acquire_write()
+            acquired.set()
+            lock.release_write()
+        threading.Thread(target=write, daemon=True).start()
+
+        self.assertFalse(acquired.wait(0.1))
+        lock.release_read()
+        self.assertTrue(acquired.wait(1))
+
+    def test_queued_writer_holds_back_new_readers(self):
+        lock = ReadWriteLock()
+        lock.acquire_read()
+        order = []
+
+        def write():
+            lock.acquire_write()
+            order.append("write")
+            lock.release_write()
+
+        def read():
+            lock.acquire_read()
+            order.append("read")
+            lock.release_read()
+
+        writer = threading.Thread(target=write, daemon=True)
+        writer.start()
+        time.sleep(0.1) # the writer is queued behind the first reader
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+
+        reader.join(0.1)
+        self.assertEqual(order, []) # the new reader does not jump the queue
+        lock.release_read()
+        writer.join(1)
+        reader.join(1)
+        self.assertEqual(order, ["write", "read"])
+
+if __name__ == '__main__':
+    unittest.main()
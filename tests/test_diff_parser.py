@@ -1,5 +1,42 @@
+import io
+import os
+import tempfile
 import unittest
-from src.git.diff_parser import DiffParser
+from src.git.diff_parser import DiffParser, HunkReader
+from src.git.diff_slicer import DiffSlicer
+
+STREAM_SAMPLE = b"""diff --git a/src/app.py b/src/app.py
+index 83a..92b 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,3 +1,3 @@ def first():
+ def first():
+-    return 1
++    return 2
+diff --git a/assets/logo.png b/assets/logo.png
+index 11a..22b 100644
+Binary files a/assets/logo.png and b/assets/logo.png differ
+diff --git a/package-lock.json b/package-lock.json
+index 11a..22b 100644
+--- a/package-lock.json
++++ b/package-lock.json
+@@ -1,1 +1,1 @@
+-{}
++{"lockfileVersion": 3}
+diff --git a/src/big.py b/src/big.py
+index 11a..22b 100644
+--- a/src/big.py
++++ b/src/big.py
+@@ -1,1 +1,400 @@
+""" + b"".join(b"+x = %d\n" % i for i in range(400)) + b"""diff --git a/src/other.py b/src/other.py
+index 11a..22b 100644
+--- a/src/other.py
++++ b/src/other.py
+@@ -5,2 +5,3 @@
+ a = 1
++b = 2
+ c = 3
+"""
 
 class TestDiffParser(unittest.TestCase):
     def test_parse_simple_hunk(self):
@@ -22,5 +59,41 @@ index 83a..92b 100644
         self.assertEqual(hunks[0].start_line, 10)
         self.assertEqual(hunks[0].changed_lines, [11, 12])
 
+    def test_stream_skips_binary_excluded_and_huge_files(self):
+        parser = DiffParser(max_file_bytes=2048)
+        hunks = list(parser.parse_stream(io.BytesIO(STREAM_SAMPLE)))
+
+        self.assertEqual([h.file_path for h in hunks], ["src/app.py", "src/other.py"])
+        self.assertEqual(parser.skipped_files, ["assets/logo.png", "package-lock.json", "src/big.py"])
+        self.assertEqual(hunks[1].changed_lines, [6])
+
+    def test_stream_matches_in_memory_parse(self):
+        parser = DiffParser(max_file_bytes=2048)
+        streamed = list(parser.parse_stream(io.BytesIO(STREAM_SAMPLE)))
+        parsed = parser.parse(STREAM_SAMPLE.decode("utf-8"))
+
+        self.assertEqual(streamed, parsed)
+
+    def test_hunk_bodies_are_read_back_by_offset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pr.diff")
+            with open(path, "wb") as f:
+                f.write(STREAM_SAMPLE)
+
+            with open(path, "rb") as f:
+                lean = list(DiffParser(max_file_bytes=2048).parse_stream(f, keep_lines=False))
+            full = DiffParser(max_file_bytes=2048).parse(STREAM_SAMPLE.decode("utf-8"))
+            self.assertEqual([h.lines for h in lean], [[], []])
+
+            reader = HunkReader(path)
+            self.assertEqual([reader.lines(h) for h in lean], [h.lines for h in full])
+
+            symbol = {"file_path": "src/app.py", "start_line": 1, "end_line": 2}
+            self.assertEqual(
+                DiffSlicer(reader=reader).slice_for_symbol(lean, symbol),
+                DiffSlicer().slice_for_symbol(full, symbol)
+            )
+            reader.close()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
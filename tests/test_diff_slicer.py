@@ -0,0 +1,98 @@
+import unittest
+from src.git.diff_parser import DiffParser
+from src.git.diff_slicer import DiffSlicer, TRUNCATION_MARKER
+
+DIFF_SAMPLE = """diff --git a/src/app.py b/src/app.py
+index 83a..92b 100644
+--- a/src/app.py
++++ b/src/app.py
+@@ -1,4 +1,4 @@ import os
+ def first():
+-    return 1
++    return 2
+ 
+@@ -40,3 +40,4 @@ def second():
+ def second():
+     x = 1
++    y = 2
+     return x
+diff --git a/src/other.py b/src/other.py
+index 11a..22b 100644
+--- a/src/other.py
++++ b/src/other.py
+@@ -5,2 +5,3 @@
+ a = 1
++b = 2
+ c = 3
+"""
+
+class TestDiffSlicer(unittest.TestCase):
+    def setUp(self):
+        self.hunks = DiffParser().parse(DIFF_SAMPLE)
+
+    def test_only_overlapping_hunks_are_kept(self):
+        slicer = DiffSlicer(context_lines=0)
+        symbol = {"file_path": "src/app.py", "start_line": 40, "end_line": 43}
+
+        diff_slice = slicer.slice_for_symbol(self.hunks, symbol)
+
+        self.assertIn("+    y = 2", diff_slice)
+        self.assertNotIn("return 2", diff_slice)
+        self.assertNotIn("b = 2", diff_slice)
+        self.assertIn("@@ -40,3 +40,4 @@", diff_slice)
+
+    def test_hunk_is_trimmed_to_context_window(self):
+        slicer = DiffSlicer(context_lines=0)
+        symbol = {"file_path": "src/app.py", "start_line": 42, "end_line": 42}
+
+        diff_slice = slicer.slice_for_symbol(self.hunks, symbol)
+
+        self.assertIn("@@ -41,0 +42,1 @@", diff_slice)
+        self.assertNotIn("x = 1", diff_slice)
+
+    def test_symbol_without_changes_gets_empty_slice(self):
+        slicer = DiffSlicer(context_lines=1)
+        symbol = {"file_path": "src/app.py", "start_line": 10, "end_line": 20}
+
+        self.assertEqual(slicer.slice_for_symbol(self.hunks, symbol), "")
+
+    def test_deletion_only_hunk_inside_the_symbol_is_kept(self):
+        diff = """diff --git a/src/calc.py b/src/calc.py
+index 83a..92b 100644
+--- a/src/calc.py
++++ b/src/calc.py
+@@ -1,3 +1,4 @@ def div(x, y):
+ def div(x, y):
++    x = float(x)
+     z = 0
+     w = 1
+@@ -8,4 +9,2 @@ def div(x, y):
+     w += z
+-    if y is None:
+-        return
+     return x / y
+"""
+        hunks = DiffParser().parse(diff)
+        self.assertEqual([(h.changed_ranges, h.deleted_at) for h in hunks], [([(2, 2)], []), ([], [10])])
+
+        symbol = {"file_path": "src/calc.py", "start_line": 1, "end_line": 10}
+        diff_slice = DiffSlicer(context_lines=0).slice_for_symbol(hunks, symbol)
+
+        self.assertIn("+    x = float(x)", diff_slice)
+        self.assertIn("@@ -8,4 +9,2 @@ def div(x, y):\n     w += z\n-    if y is None:\n-        return", diff_slice)
+
+        # Anchored after the symbol's last line, outside the window
+        outside = {"file_path": "src/calc.py", "start_line": 1, "end_line": 8}
+        self.assertNotIn("if y is None", DiffSlicer(context_lines=0).slice_for_symbol(hunks, outside))
+
+    def test_size_budget_is_enforced(self):
+        slicer = DiffSlicer(context_lines=100, max_chars=60)
+        symbol = {"file_path": "src/app.py", "start_line": 1, "end_line": 50}
+
+        diff_slice = slicer.slice_for_symbol(self.hunks, symbol)
+
+        self.assertLessEqual(len(diff_slice), 60)
+        self.assertTrue(diff_slice.endswith(TRUNCATION_MARKER))
+
+if __name__ == '__main__':
+    unittest.main()
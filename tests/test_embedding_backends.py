@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+from src.ai.embedder import Embedder
+from src.ai.embedding_backends import EmbeddingBackend, OnnxBackend, make_backend, mean_pool
+from src.ai.limiter import RateLimiter
+
+class FakeEncoding:
+    def __init__(self, length, width):
+        self.ids = list(range(1, length + 1)) + [0] * (width - length)
+        self.attention_mask = [1] * length + [0] * (width - length)
+
+class TestOnnxBackend(unittest.TestCase):
+    def _backend(self):
+        # Skip model loading, only the batching and pooling are under test
+        backend = OnnxBackend.__new__(OnnxBackend)
+        backend._np = np
+        backend._inputs = {"input_ids", "attention_mask", "token_type_ids"}
+        backend.batch_size = 2
+        backend.model_id = "tiny"
+        backend.tokenizer = MagicMock()
+        backend.tokenizer.encode_batch.side_effect = lambda texts: [
+            FakeEncoding(len(t), max(len(x) for x in texts)) for t in texts
+        ]
+        backend.session = MagicMock()
+        # Token state = (length of text, token position), padding tokens are huge
+        backend.session.run.side_effect = lambda _, feeds: [np.stack([
+            np.stack([[float(mask.sum()), float(p) if m else 1e6] for p, m in enumerate(mask)])
+            for mask in feeds["attention_mask"]
+        ])]
+        return backend
+
+    def test_vectors_are_pooled_normalized_and_aligned(self):
+        backend = self._backend()
+        texts = ["aaaa", "a", "aaa", "aa", "aaaaa"]
+        vectors = backend.embed(texts)
+
+        self.assertEqual(backend.session.run.call_count, 3)
+        for text, vec in zip(texts, vectors):
+            expected = np.array([len(text), (len(text) - 1) / 2])
+            np.testing.assert_allclose(vec, expected / np.linalg.norm(expected), rtol=1e-6)
+
+        # Similar lengths share a batch
+        batches = [c.args[0] for c in backend.tokenizer.encode_batch.call_args_list]
+        self.assertEqual(batches, [["a", "aa"], ["aaa", "aaaa"], ["aaaaa"]])
+
+    def test_local_backend_skips_the_limiter(self):
+        backend = self._backend()
+        limiter = MagicMock(max_concurrency=2)
+        embedder = Embedder(limiter=limiter, backend=backend)
+
+        self.assertEqual(len(embedder.embed_batch(["x", "yy"])), 2)
+        limiter.call.assert_not_called()
+        self.assertEqual(embedder.backend_id, "onnx:tiny")
+
+    def test_mean_pool_ignores_padding(self):
+        hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+        pooled = mean_pool(np, hidden, np.array([[1, 1, 0]]))
+
+        np.testing.assert_allclose(pooled, [[1.0, 0.0]])
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            make_backend("word2vec")
+
+    def test_incomplete_backend_fails_when_created(self):
+        class NoDimension(EmbeddingBackend):
+            def embed(self, texts):
+                return []
+
+        with self.assertRaises(TypeError):
+            NoDimension()
+
+class FlakyBackend(EmbeddingBackend):
+    name = "flaky"
+    remote = True
+    max_batch_size = 3
+
+    def __init__(self, fail_times):
+        # text -> number of calls containing it that still raise
+        self.fail_times = dict(fail_times)
+        self.calls = []
+
+    @property
+    def dimension(self):
+        return 1
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        for text in texts:
+            if self.fail_times.get(text, 0) > 0:
+                self.fail_times[text] -= 1
+                raise RuntimeError("503 backend unavailable")
+        return [[float(len(t))] for t in texts]
+
+class TestEmbedderChunking(unittest.TestCase):
+    def _embedder(self, backend, retries=2):
+        return Embedder(limiter=RateLimiter(max_concurrency=2), backend=backend,
+                        chunk_retries=retries, retry_delay=0)
+
+    def test_requests_are_chunked_to_backend_limits(self):
+        backend = FlakyBackend({})
+        texts = [f"t{i}" for i in range(7)]
+        vectors = self._embedder(backend).embed_batch(texts)
+
+        self.assertEqual(sorted(len(c) for c in backend.calls), [1, 3, 3])
+        self.assertEqual(vectors, [[2.0]] * 7)
+
+    def test_only_failed_chunks_are_retried(self):
+        backend = FlakyBackend({"t4": 1})
+        texts = [f"t{i}" for i in range(7)]
+        vectors = self._embedder(backend).embed_batch(texts)
+
+        self.assertEqual(len(backend.calls), 4)
+        self.assertEqual(backend.calls[-1], ["t3", "t4", "t5"])
+        self.assertEqual(vectors, [[2.0]] * 7)
+
+    def test_permanent_failure_leaves_aligned_gaps(self):
+        backend = FlakyBackend({"bb": 10})
+        backend.max_batch_size = 1
+        vectors = self._embedder(backend, retries=1).embed_batch(["a", "bb", "ccc", "bb"])
+
+        self.assertEqual(vectors, [[1.0], None, [3.0], None])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.ai.embedder import Embedder
+from src.ai.embedding_cache import EmbeddingCache
+
+def fake_embed_content(model, content, task_type):
+    return {"embedding": [[float(len(text)), 0.5] for text in content]}
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = EmbeddingCache(path=os.path.join(self.tmp.name, "emb.sqlite"))
+        with patch.dict(os.environ, {"GEMINI_API_KEY": "test"}):
+            self.embedder = Embedder(cache=self.cache)
+
+    def tearDown(self):
+        self.cache.store.close()
+        self.tmp.cleanup()
+
+    def test_only_new_snippets_reach_the_api(self):
+        with patch("google.generativeai.embed_content", side_effect=fake_embed_content) as api:
+            first = self.embedder.embed_batch(["def a(): pass", "def bb(): pass"])
+            second = self.embedder.embed_batch(["def bb(): pass", "def ccc(): pass"])
+
+        self.assertEqual(api.call_count, 2)
+        self.assertEqual(api.call_args_list[1].kwargs["content"], ["def ccc(): pass"])
+        self.assertEqual(second[0], first[1])
+        self.assertEqual(second[1], [15.0, 0.5])
+
+    def test_fully_cached_batch_makes_no_call(self):
+        with patch("google.generativeai.embed_content", side_effect=fake_embed_content) as api:
+            self.embedder.embed_batch(["x = 1"])
+            vectors = self.embedder.embed_batch(["x = 1", "x = 1"])
+
+        self.assertEqual(api.call_count, 1)
+        self.assertEqual(vectors, [[5.0, 0.5], [5.0, 0.5]])
+        self.assertEqual(self.cache.hits, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import time
+import unittest
+from src.ai.limiter import RateLimiter
+from src.orchestrator.executor import run_ordered
+
+class TestRunOrdered(unittest.TestCase):
+    def test_results_keep_input_order(self):
+        # Later items finish first, results must still follow input order
+        def slow_identity(n):
+            time.sleep(0.01 * (5 - n))
+            return n
+
+        results = run_ordered([0, 1, 2, 3, 4], slow_identity, max_workers=5)
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+
+    def test_failure_does_not_abort_others(self):
+        def explode_on_two(n):
+            if n == 2:
+                raise RuntimeError("boom")
+            return n * 10
+
+        results = run_ordered([1, 2, 3], explode_on_two, max_workers=3)
+        self.assertEqual(results, [10, None, 30])
+
+class TestRateLimiter(unittest.TestCase):
+    def test_retries_rate_limited_calls(self):
+        limiter = RateLimiter(max_concurrency=2, base_delay=0.01, max_delay=0.02)
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RuntimeError("429 Resource exhausted")
+            return "ok"
+
+        self.assertEqual(limiter.call(flaky), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(limiter.throttled, 2)
+
+    def test_other_errors_are_not_retried(self):
+        limiter = RateLimiter(base_delay=0.01)
+
+        def broken():
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            limiter.call(broken)
+        self.assertEqual(limiter.throttled, 0)
+
+if __name__ == '__main__':
+    unittest.main()
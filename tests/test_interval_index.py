@@ -0,0 +1,31 @@
+import random
+import unittest
+from src.orchestrator.interval_index import IntervalIndex
+
+class TestIntervalIndex(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        symbols = []
+        for i in range(200):
+            start = rng.randint(1, 1000)
+            symbols.append({"id": str(i), "start_line": start, "end_line": start + rng.randint(0, 80)})
+        index = IntervalIndex(symbols)
+
+        for _ in range(300):
+            low = rng.randint(1, 1100)
+            high = low + rng.randint(0, 20)
+            expected = {s["id"] for s in symbols if s["start_line"] <= high and s["end_line"] >= low}
+            self.assertEqual({s["id"] for s in index.overlapping(low, high)}, expected)
+
+    def test_innermost_prefers_smallest_span(self):
+        index = IntervalIndex([
+            {"id": "outer", "start_line": 1, "end_line": 50},
+            {"id": "inner", "start_line": 10, "end_line": 20},
+        ])
+
+        self.assertEqual(index.innermost(15)["id"], "inner")
+        self.assertEqual(index.innermost(30)["id"], "outer")
+        self.assertIsNone(index.innermost(60))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import MagicMock
+from src.git.diff_parser import DiffParser
 from src.models.diffhunk import DiffHunk
+from src.orchestrator.changed_line_index import ChangedLineIndex
 from src.orchestrator.mapper import Mapper
 from src.storage.vector_store import VectorStore
 
@@ -10,7 +12,7 @@ class TestMapper(unittest.TestCase):
         mock_store = MagicMock(spec=VectorStore)
         
         # Setup the fake return data (The "Bucket")
-        mock_store.get_symbols_for_file.return_value = [
+        mock_store.get_symbols_for_files.return_value = {"src/main.py": [
             {
                 "id": "src/main.py::main",
                 "symbol_name": "main",
@@ -18,7 +20,7 @@ class TestMapper(unittest.TestCase):
                 "end_line": 20,
                 "file_path": "src/main.py"
             }
-        ]
+        ]}
 
         mapper = Mapper(mock_store)
 
@@ -39,7 +41,7 @@ class TestMapper(unittest.TestCase):
     def test_map_misses_correctly(self):
         # 1. Mock Store
         mock_store = MagicMock(spec=VectorStore)
-        mock_store.get_symbols_for_file.return_value = [
+        mock_store.get_symbols_for_files.return_value = {"src/main.py": [
             {
                 "id": "src/main.py::main",
                 "symbol_name": "main",
@@ -47,7 +49,7 @@ class TestMapper(unittest.TestCase):
                 "end_line": 20, # Function ends at 20
                 "file_path": "src/main.py"
             }
-        ]
+        ]}
         mapper = Mapper(mock_store)
 
         # 2. Input (Line 25 is OUTSIDE the function)
@@ -63,5 +65,60 @@ class TestMapper(unittest.TestCase):
         # 4. Verify
         self.assertEqual(len(result), 0)
 
+    def test_innermost_and_enclosing_are_split(self):
+        mock_store = MagicMock(spec=VectorStore)
+        mock_store.get_symbols_for_files.return_value = {"src/shop.py": [
+            {"id": "src/shop.py::Cart", "symbol_name": "Cart", "start_line": "1", "end_line": "30", "file_path": "src/shop.py"},
+            {"id": "src/shop.py::add", "symbol_name": "add", "start_line": 5, "end_line": 10, "file_path": "src/shop.py"},
+            {"id": "src/shop.py::total", "symbol_name": "total", "start_line": 12, "end_line": 20, "file_path": "src/shop.py"},
+        ]}
+        mapper = Mapper(mock_store)
+
+        hunks = [
+            DiffHunk(file_path="src/shop.py", start_line=6, changed_lines=[6, 7]),
+            DiffHunk(file_path="src/shop.py", start_line=15, changed_lines=[15]),
+        ]
+        innermost, enclosing = mapper.map_diffs_to_scopes(hunks)
+
+        self.assertEqual([s["symbol_name"] for s in innermost], ["add", "total"])
+        self.assertEqual([s["symbol_name"] for s in enclosing], ["Cart"])
+        mock_store.get_symbols_for_files.assert_called_once_with(["src/shop.py"])
+
+        # The flat view still reports every affected symbol once
+        names = [s["symbol_name"] for s in mapper.map_diffs_to_symbols(hunks)]
+        self.assertEqual(names, ["Cart", "add", "total"])
+
+    def test_deletion_only_hunk_selects_the_enclosing_function(self):
+        mock_store = MagicMock(spec=VectorStore)
+        mock_store.get_symbols_for_files.return_value = {"src/calc.py": [
+            {"id": "src/calc.py::Calc", "symbol_name": "Calc", "start_line": 1, "end_line": 30, "file_path": "src/calc.py"},
+            {"id": "src/calc.py::div", "symbol_name": "div", "start_line": 5, "end_line": 12, "file_path": "src/calc.py"},
+            {"id": "src/calc.py::mul", "symbol_name": "mul", "start_line": 13, "end_line": 20, "file_path": "src/calc.py"},
+        ]}
+        mapper = Mapper(mock_store)
+
+        # "if y is None: return" removed from the middle of div(), nothing added
+        hunks = DiffParser().parse(
+            "diff --git a/src/calc.py b/src/calc.py\n"
+            "--- a/src/calc.py\n"
+            "+++ b/src/calc.py\n"
+            "@@ -7,5 +7,3 @@\n"
+            "     z = 0\n"
+            "-    if y is None:\n"
+            "-        return\n"
+            "     w = 1\n"
+            "     return x / y\n"
+        )
+        self.assertEqual([(h.changed_ranges, h.deleted_at) for h in hunks], [([], [8])])
+
+        innermost, enclosing = mapper.map_diffs_to_scopes(hunks)
+        self.assertEqual([s["symbol_name"] for s in innermost], ["div"])
+        self.assertEqual([s["symbol_name"] for s in enclosing], ["Calc"])
+
+        # The line after the removal is where a review of it can be posted
+        changed = ChangedLineIndex.by_file(hunks, with_deletions=True)["src/calc.py"]
+        self.assertEqual(changed.lines_in(5, 12), [8])
+        self.assertEqual(ChangedLineIndex.by_file(hunks)["src/calc.py"].lines_in(5, 12), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
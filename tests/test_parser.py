@@ -32,5 +32,52 @@ def hello_world():
         self.assertEqual(symbols[0].name, "hello_world")
         self.assertEqual(symbols[0].type, "function")
 
+    def test_query_and_cursor_engines_agree(self):
+        """Both engines return the same symbols in the same order."""
+        code = """
+class Outer:
+    def method_one(self):
+        def inner():
+            pass
+        return inner
+
+    class Nested:
+        def method_two(self):
+            pass
+
+@decorator
+def top_level_func():
+    pass
+"""
+        tree = self.parser.parse("python", code)
+        language = self.parser.languages["python"]
+
+        query_symbols = SymbolExtractor(code, language=language).extract(tree.root_node, "a.py")
+        cursor_symbols = SymbolExtractor(code, language=language, engine="cursor").extract(tree.root_node, "a.py")
+
+        self.assertEqual(query_symbols, cursor_symbols)
+        self.assertEqual(
+            [s.name for s in query_symbols],
+            ["Outer", "method_one", "inner", "Nested", "method_two", "top_level_func"]
+        )
+
+    def test_java_query_extraction(self):
+        """Methods and classes come out of Java sources too."""
+        code = "class Shop {\n  int total(int a) { return a; }\n}\n"
+        tree = self.parser.parse("java", code)
+        symbols = SymbolExtractor(code, language=self.parser.languages["java"]).extract(tree.root_node, "Shop.java")
+
+        self.assertEqual([(s.name, s.type) for s in symbols], [("Shop", "class"), ("total", "function")])
+        self.assertEqual((symbols[1].start_line, symbols[1].end_line), (2, 2))
+
+    def test_deep_nesting_does_not_recurse(self):
+        """Nesting deeper than the recursion limit still extracts every symbol."""
+        depth = sys.getrecursionlimit()
+        code = "".join(f"class C{i} {{ " for i in range(depth)) + "}" * depth
+        tree = self.parser.parse("java", code)
+
+        symbols = SymbolExtractor(code).extract(tree.root_node, "Deep.java")
+        self.assertEqual(len(symbols), depth)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,188 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.indexer import manifest as manifest_module
+from src.indexer.manifest import SymbolManifest
+from src.indexer.pipeline import IndexPipeline, build_records
+from src.indexer.scanner import Scanner
+from src.models.symbol import Symbol
+from src.storage.vector_store import VectorStore
+
+class FakeEmbedder:
+    def __init__(self, fail_on=None, partial=False):
+        self.calls = []
+        self.fail_on = fail_on
+        self.partial = partial
+
+    def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.partial:
+            # Like Embedder after retries: only the failed texts are None
+            return [None if self.fail_on in t else [float(len(t)), 1.0] for t in texts]
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            return []
+        return [[float(len(t)), 1.0] for t in texts]
+
+class TestIndexPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for i in range(6):
+            path = os.path.join(self.tmp.name, f"mod{i}.py")
+            with open(path, "w") as f:
+                f.write(f"def func_{i}():\n    return {i}\n\nclass Klass{i}:\n    pass\n")
+            self.files.append(path)
+
+        self.scanner = MagicMock(spec=Scanner)
+        self.store = MagicMock(spec=VectorStore)
+        self.store.get_symbols_for_files.return_value = {}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, embedder, workers=1, batch_size=5, manifest_path=None, start_method=None):
+        pipeline = IndexPipeline(self.scanner, self.store, embedder, workers=workers,
+                                 embed_batch_size=batch_size, embed_in_flight=2, progress_interval=0,
+                                 manifest_path=manifest_path, start_method=start_method)
+        return pipeline.run(self.files)
+
+    def test_symbols_from_many_files_share_embedding_batches(self):
+        embedder = FakeEmbedder()
+        stats = self._run(embedder)
+
+        # 12 symbols in batches of 5 -> 3 requests instead of 6 (one per file)
+        self.assertEqual([len(c) for c in embedder.calls], [5, 5, 2])
+        self.assertEqual(self.store.upsert.call_count, 3)
+        self.assertEqual(stats["indexed"], 6)
+        self.assertEqual(stats["symbols"], 12)
+        self.assertEqual(self.scanner.update_state.call_count, 6)
+
+    def test_files_in_a_failed_batch_are_not_marked_indexed(self):
+        embedder = FakeEmbedder(fail_on="func_5")
+        stats = self._run(embedder, batch_size=4)
+
+        marked = {c.args[0] for c in self.scanner.update_state.call_args_list}
+        self.assertNotIn(self.files[5], marked)
+        self.assertIn(self.files[0], marked)
+        self.assertEqual(stats["failed"], 2) # mod4 shares the failed batch with mod5
+
+    def test_partial_embedding_failure_only_fails_that_file(self):
+        stats = self._run(FakeEmbedder(fail_on="func_5", partial=True), batch_size=4)
+
+        marked = {c.args[0] for c in self.scanner.update_state.call_args_list}
+        self.assertEqual(marked, set(self.files[:5]))
+        stored = [i for c in self.store.upsert.call_args_list for i in c.kwargs["ids"]]
+        self.assertEqual(len(stored), 11)
+        self.assertNotIn(f"{self.files[5]}::func_5", stored)
+        self.assertEqual((stats["failed"], stats["symbols"]), (1, 11))
+
+    def test_process_pool_gives_the_same_result(self):
+        for start_method in (None, "spawn"):
+            self.store.reset_mock()
+            stats = self._run(FakeEmbedder(), workers=2, batch_size=100, start_method=start_method)
+
+            self.assertEqual(stats["indexed"], 6)
+            ids = self.store.upsert.call_args.kwargs["ids"]
+            self.assertEqual(len(ids), 12)
+
+    def test_only_changed_symbols_are_reembedded(self):
+        embedder = FakeEmbedder()
+        self._run(embedder)
+        stored = {}
+        for call in self.store.upsert.call_args_list:
+            for meta in call.kwargs["metadata"]:
+                stored.setdefault(meta["file_path"], []).append(dict(meta))
+
+        # mod0: func_0 body changes, Klass0 vanishes, a new symbol appears
+        with open(self.files[0], "w") as f:
+            f.write("def func_0():\n    return 'changed'\n\ndef added():\n    pass\n")
+        # mod1: a blank line on top shifts both symbols without changing them
+        with open(self.files[1]) as f:
+            shifted = "\n" + f.read()
+        with open(self.files[1], "w") as f:
+            f.write(shifted)
+
+        self.store.reset_mock()
+        self.store.get_symbols_for_files.return_value = stored
+        embedder = FakeEmbedder()
+        stats = self._run(embedder, batch_size=100)
+
+        self.assertEqual(embedder.calls, [["def func_0():\n    return 'changed'", "def added():\n    pass"]])
+        self.store.delete_ids.assert_called_once_with([f"{self.files[0]}::Klass0"])
+        moved_ids = self.store.update_metadata.call_args.args[0]
+        self.assertEqual(moved_ids, [f"{self.files[1]}::func_1", f"{self.files[1]}::Klass1"])
+        self.assertEqual((stats["unchanged"], stats["moved"], stats["deleted"]), (8, 2, 1))
+        self.assertEqual(stats["indexed"], 6)
+
+    def test_manifest_serves_unchanged_sources_without_parsing(self):
+        manifest_path = os.path.join(self.tmp.name, "manifest.sqlite")
+        first = self._run(FakeEmbedder(), manifest_path=manifest_path)
+        parsed = [dict(m) for c in self.store.upsert.call_args_list for m in c.kwargs["metadata"]]
+        self.assertEqual(first["manifest_hits"], 0)
+
+        self.store.reset_mock()
+        self.store.get_symbols_for_files.return_value = {}
+        with patch("src.indexer.pipeline.SymbolExtractor") as extractor:
+            second = self._run(FakeEmbedder(), manifest_path=manifest_path)
+            extractor.assert_not_called()
+
+        cached = [dict(m) for c in self.store.upsert.call_args_list for m in c.kwargs["metadata"]]
+        self.assertEqual(second["manifest_hits"], 6)
+        by_id = lambda m: m["id"]
+        self.assertEqual(sorted(cached, key=by_id), sorted(parsed, key=by_id))
+
+    def test_workers_sharing_the_manifest_never_fail_a_file(self):
+        for i in range(6, 400):
+            path = os.path.join(self.tmp.name, f"mod{i}.py")
+            with open(path, "w") as f:
+                f.write(f"def func_{i}():\n    return {i}\n")
+            self.files.append(path)
+
+        manifest_path = os.path.join(self.tmp.name, "manifest.sqlite")
+        stats = self._run(FakeEmbedder(), workers=8, batch_size=100, manifest_path=manifest_path)
+
+        self.assertEqual((stats["failed"], stats["indexed"]), (0, 400))
+        self.assertEqual(len(SymbolManifest(manifest_path).store), 400)
+
+class TestSymbolManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "manifest.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_slices_content_from_source(self):
+        source = "class Ä:\n    def f(self):\n        pass\n".encode("utf-8")
+        start = source.index(b"def")
+        symbols = [
+            Symbol("Ä", "class", source.decode("utf-8").rstrip("\n"), 1, 3, "a.py", 0, len(source) - 1),
+            Symbol("f", "function", source[start:-1].decode("utf-8"), 2, 3, "a.py", start, len(source) - 1),
+        ]
+
+        decoded = SymbolManifest.decode(SymbolManifest.encode(symbols), source, "a.py")
+        self.assertEqual(decoded, symbols)
+
+    def test_grammar_upgrade_changes_the_key(self):
+        manifest = SymbolManifest(self.path)
+        key = manifest.make_key("python", b"x = 1\n")
+
+        with patch.object(manifest_module, "EXTRACTOR_VERSION", "2"):
+            upgraded = SymbolManifest(self.path)
+        self.assertNotEqual(upgraded.make_key("python", b"x = 1\n"), key)
+        self.assertNotEqual(manifest.make_key("java", b"x = 1\n"), key)
+
+class TestBuildRecords(unittest.TestCase):
+    def test_duplicate_names_get_unique_ids(self):
+        symbols = [
+            Symbol("__init__", "function", "def __init__(self): pass", 2, 2, "a.py"),
+            Symbol("__init__", "function", "def __init__(self): pass", 6, 6, "a.py"),
+        ]
+        ids, metadata = build_records(symbols)
+
+        self.assertEqual(ids, ["a.py::__init__", "a.py::__init__@6"])
+        self.assertEqual(metadata[1]["id"], "a.py::__init__@6")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.ai.auditor import Auditor
+from src.ai.response_cache import ResponseCache
+from src.storage.disk_cache import DiskCache
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_values_persist_across_instances(self):
+        cache = DiskCache(self.path)
+        cache.set("a", b"1")
+        cache.close()
+
+        reopened = DiskCache(self.path)
+        self.assertEqual(reopened.get("a"), b"1")
+        self.assertEqual(reopened.hits, 1)
+        reopened.close()
+
+    def test_least_recently_used_is_evicted(self):
+        cache = DiskCache(self.path, max_bytes=None, max_entries=2)
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        cache.get("a") # 'b' is now the least recently used
+        cache.set("c", b"3")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"1")
+        self.assertEqual(cache.get("c"), b"3")
+        cache.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = DiskCache(self.path, ttl_seconds=-1)
+        cache.set("a", b"1")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+class TestAuditorCache(unittest.TestCase):
+    def test_identical_prompt_skips_the_model(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {"GEMINI_API_KEY": "test"}):
+            cache = ResponseCache(path=os.path.join(tmp, "llm.sqlite"))
+            auditor = Auditor(cache=cache)
+            auditor.model = MagicMock()
+            auditor.model.generate_content.return_value.text = json.dumps(
+                {"reviews": [{"line": 3, "issue": "Bug", "severity": "HIGH", "suggestion": "Fix"}]}
+            )
+
+            symbol = {"snippet": "def f():\n    return 1", "file_path": "src/f.py"}
+            first = auditor.analyze("+    return 1", symbol, [], [3])
+            second = auditor.analyze("+    return 1", symbol, [], [3])
+
+            self.assertEqual(first, second)
+            self.assertEqual(auditor.model.generate_content.call_count, 1)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            cache.store.close()
+
+if __name__ == '__main__':
+    unittest.main()
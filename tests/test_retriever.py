@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import MagicMock
+from src.ai.embedder import Embedder
+from src.orchestrator.retriever import ContextRetriever
+from src.storage.vector_store import VectorStore
+
+class TestBulkRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.store = MagicMock(spec=VectorStore)
+        self.embedder = MagicMock(spec=Embedder)
+        self.retriever = ContextRetriever(self.store, self.embedder)
+
+    def test_stored_vectors_are_reused_and_queried_once(self):
+        self.store.get_embeddings.return_value = {"a.py::f": [1.0, 0.0], "b.py::g": [0.0, 1.0]}
+        self.store.search_many.return_value = [
+            [{"id": "a.py::f"}, {"id": "c.py::h"}],
+            [{"id": "c.py::h"}, {"id": "b.py::g"}],
+        ]
+        symbols = [
+            {"id": "a.py::f", "snippet": "def f(): pass"},
+            {"id": "b.py::g", "snippet": "def g(): pass"},
+        ]
+
+        contexts = self.retriever.retrieve_context_bulk(symbols, limit=3)
+
+        self.embedder.embed_batch.assert_not_called()
+        self.store.search_many.assert_called_once_with([[1.0, 0.0], [0.0, 1.0]], limit=4)
+        self.assertEqual(contexts, [[{"id": "c.py::h"}], [{"id": "c.py::h"}]])
+
+    def test_only_unknown_ids_are_embedded(self):
+        self.store.get_embeddings.return_value = {"a.py::f": [1.0, 0.0]}
+        self.embedder.embed_batch.return_value = [[0.5, 0.5]]
+        self.store.search_many.return_value = [[], []]
+        symbols = [
+            {"id": "a.py::f", "snippet": "def f(): pass"},
+            {"id": "new.py::n", "snippet": "def n(): pass"},
+        ]
+
+        self.retriever.retrieve_context_bulk(symbols)
+
+        self.embedder.embed_batch.assert_called_once_with(["def n(): pass"])
+        self.store.search_many.assert_called_once_with([[1.0, 0.0], [0.5, 0.5]], limit=4)
+
+if __name__ == '__main__':
+    unittest.main()
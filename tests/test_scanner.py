@@ -0,0 +1,219 @@
+import json
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from src.indexer import scanner as scanner_module
+from src.indexer.hasher import calculate_hash
+from src.indexer.scanner import Scanner
+from src.indexer.state_store import StateStore
+
+class TestScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.state_path = os.path.join(self.root, ".sentinel", "state.db")
+        self.legacy_path = os.path.join(self.root, ".sentinel", "hashes.json")
+        self.file_a = os.path.join(self.root, "a.py")
+        self.file_b = os.path.join(self.root, "b.java")
+        self._write(self.file_a, "def a():\n    pass\n")
+        self._write(self.file_b, "class B {}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def _scanner(self, **kwargs):
+        scanner = Scanner(self.state_path, legacy_state_path=self.legacy_path, **kwargs)
+        self.addCleanup(scanner.close)
+        return scanner
+
+    def _index_all(self, scanner):
+        for path in scanner.scan(self.root):
+            scanner.update_state(path)
+        scanner.save_state()
+
+    def test_unchanged_files_are_not_read(self):
+        self._index_all(self._scanner())
+
+        with patch.object(scanner_module, "calculate_hash", wraps=calculate_hash) as hasher:
+            changed = self._scanner().scan(self.root)
+
+        self.assertEqual(changed, [])
+        hasher.assert_not_called()
+
+    def test_modified_file_is_detected(self):
+        self._index_all(self._scanner())
+        self._write(self.file_a, "def a():\n    return 1\n")
+
+        changed = self._scanner().scan(self.root)
+        self.assertEqual(changed, [os.path.normpath(self.file_a)])
+
+    def test_touched_file_is_hashed_once_then_skipped(self):
+        self._index_all(self._scanner())
+        future = time.time() + 10
+        os.utime(self.file_b, (future, future))
+
+        scanner = self._scanner()
+        self.assertEqual(scanner.scan(self.root), [])
+        scanner.save_state()
+
+        with patch.object(scanner_module, "calculate_hash", wraps=calculate_hash) as hasher:
+            self._scanner().scan(self.root)
+        hasher.assert_not_called()
+
+    def test_deleted_files_are_kept_until_forgotten(self):
+        self._index_all(self._scanner())
+        os.remove(self.file_b)
+
+        scanner = self._scanner()
+        scanner.scan(self.root)
+        scanner.save_state()
+        self.assertEqual(scanner.deleted_files, [os.path.normpath(self.file_b)])
+
+        # Not forgotten yet, e.g. crashed before the vectors were purged
+        scanner = self._scanner()
+        scanner.scan(self.root)
+        self.assertEqual(scanner.deleted_files, [os.path.normpath(self.file_b)])
+        scanner.forget_deleted()
+        scanner.save_state()
+
+        scanner = self._scanner()
+        scanner.scan(self.root)
+        self.assertEqual(scanner.deleted_files, [])
+
+    def test_legacy_json_state_is_migrated(self):
+        os.makedirs(os.path.dirname(self.legacy_path))
+        legacy = {os.path.normpath(p): calculate_hash(p) for p in (self.file_a, self.file_b)}
+        with open(self.legacy_path, "w") as f:
+            json.dump(legacy, f)
+
+        self.assertEqual(self._scanner().scan(self.root), [])
+        self.assertEqual(StateStore(self.state_path, legacy_json_path=None).load().keys(), legacy.keys())
+
+    def test_truncated_legacy_json_forces_reindex_instead_of_crashing(self):
+        os.makedirs(os.path.dirname(self.legacy_path))
+        with open(self.legacy_path, "w") as f:
+            f.write('{"a.py": "abc')
+
+        self.assertEqual(len(self._scanner().scan(self.root)), 2)
+
+    def test_committed_batches_survive_without_close(self):
+        scanner = Scanner(self.state_path, legacy_state_path=None, batch_size=1)
+        for path in scanner.scan(self.root):
+            scanner.update_state(path)
+        # Simulate a crash: the connection is never closed or flushed
+
+        self.assertEqual(self._scanner().scan(self.root), [])
+
+    def test_fast_hash_option(self):
+        scanner = self._scanner(hash_algorithm="blake2b")
+        self._index_all(scanner)
+
+        self.assertEqual(self._scanner(hash_algorithm="blake2b").scan(self.root), [])
+        # Digests from another algorithm cannot be compared, so everything is re-indexed
+        self.assertEqual(len(self._scanner().scan(self.root)), 2)
+
+class TestGitScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.state_path = os.path.join(self.root, ".sentinel", "state.db")
+        self._git("init", "-q")
+        self._write("a.py", "def a():\n    pass\n")
+        self._write("b.java", "class B {}\n")
+        self._write("pkg/c.py", "def c():\n    pass\n")
+        self._write("notes.txt", "not indexed\n")
+        self._commit()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _git(self, *args):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                       cwd=self.root, check=True, capture_output=True)
+
+    def _commit(self):
+        self._git("add", "-A")
+        self._git("commit", "-q", "-m", "change")
+
+    def _path(self, name):
+        return os.path.normpath(os.path.join(self.root, name))
+
+    def _write(self, name, text):
+        os.makedirs(os.path.dirname(self._path(name)), exist_ok=True)
+        with open(self._path(name), "w") as f:
+            f.write(text)
+
+    def _scan(self, use_git=True):
+        # Scans, indexes everything that changed and closes, like one indexer run
+        scanner = Scanner(self.state_path, legacy_state_path=None, use_git=use_git)
+        with patch.object(scanner_module, "calculate_hash", wraps=calculate_hash) as hasher:
+            changed = scanner.scan(self.root)
+        result = (changed, scanner.last_scan.get("mode"), sorted(c.args[0] for c in hasher.call_args_list))
+        for path in changed:
+            scanner.update_state(path)
+        scanner.forget_deleted()
+        scanner.close()
+        return result
+
+    def test_tracked_files_are_keyed_by_blob_id_without_reading_them(self):
+        changed, mode, hashed = self._scan()
+
+        self.assertEqual(changed, [self._path("a.py"), self._path("b.java"), self._path("pkg/c.py")])
+        self.assertEqual((mode, hashed), ("git-index", []))
+        state = StateStore(self.state_path, legacy_json_path=None)
+        self.assertEqual(state.load()[self._path("a.py")]["hash"], calculate_hash(self._path("a.py"), "git"))
+        state.close()
+        self.assertEqual(self._scan(), ([], "git-diff", []))
+
+    def test_only_paths_changed_since_the_last_indexed_commit_are_looked_at(self):
+        self._scan()
+        self._write("a.py", "def a():\n    return 1\n")
+        self._git("rm", "-q", "b.java")
+        self._commit()
+        self._write("d.py", "def d(): pass\n") # untracked, hashed like in walk mode
+
+        scanner = Scanner(self.state_path, legacy_state_path=None, use_git=True)
+        changed = scanner.scan(self.root)
+
+        self.assertEqual(changed, [self._path("a.py"), self._path("d.py")])
+        self.assertEqual(scanner.deleted_files, [self._path("b.java")])
+        self.assertEqual((scanner.last_scan["mode"], scanner.last_scan["hashed"]), ("git-diff", 1))
+        scanner.close()
+
+    def test_uncommitted_edits_are_rechecked_after_they_are_reverted(self):
+        self._scan()
+        self._write("a.py", "def a():\n    return 2\n")
+        self.assertEqual(self._scan()[0], [self._path("a.py")])
+
+        self._git("checkout", "--", "a.py")
+        self.assertEqual(self._scan()[0], [self._path("a.py")])
+        self.assertEqual(self._scan()[0], [])
+
+    def test_switching_from_walk_mode_does_not_reindex(self):
+        self._scan(use_git=False)
+
+        changed, mode, _ = self._scan()
+
+        self.assertEqual((changed, mode), ([], "git-index"))
+        state = StateStore(self.state_path, legacy_json_path=None)
+        self.assertEqual({e["algo"] for e in state.load().values()}, {"git"})
+        state.close()
+
+    def test_outside_a_work_tree_falls_back_to_walking(self):
+        with tempfile.TemporaryDirectory() as plain:
+            with open(os.path.join(plain, "x.py"), "w") as f:
+                f.write("x = 1\n")
+            scanner = Scanner(os.path.join(plain, ".sentinel", "state.db"), legacy_state_path=None, use_git=True)
+            self.assertEqual(scanner.scan(plain), [os.path.join(plain, "x.py")])
+            self.assertNotIn("mode", scanner.last_scan)
+            scanner.close()
+
+if __name__ == '__main__':
+    unittest.main()
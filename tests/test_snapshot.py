@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import unittest
+from src.indexer.scanner import Scanner
+from src.indexer.snapshot import SnapshotError, export_snapshot, import_snapshot
+from src.storage.flat_store import FlatVectorStore
+
+def git(*args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], check=True, capture_output=True)
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+        git("init", "-q")
+        for name in ("a.py", "b.py", "c.py"):
+            write(name, f"def {name[0]}(): pass\n")
+        git("add", ".")
+        git("commit", "-q", "-m", "init")
+
+        scanner = Scanner()
+        for path in scanner.scan("."):
+            scanner.update_state(path)
+        scanner.close()
+
+        store = FlatVectorStore()
+        store.bind_embedder("stub:test", 2)
+        store.upsert(
+            ids=["a.py::a", "b.py::b", "c.py::c"],
+            vectors=[[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]],
+            metadata=[{"id": f"{n}.py::{n}", "file_path": f"{n}.py", "symbol_name": n, "type": "function",
+                       "start_line": 1, "end_line": 1} for n in "abc"]
+        )
+        self.manifest = export_snapshot("snap.tar.gz", store, "flat")
+        store.close()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_restore_only_reindexes_what_differs_from_the_commit(self):
+        # A fresh runner: no .sentinel, every file has a new mtime, one was edited
+        shutil.rmtree(".sentinel")
+        write("a.py", "def a(): pass\n")
+        write("b.py", "def b(): return 1\n")
+
+        manifest = import_snapshot("snap.tar.gz", backend_id="stub:test", store_name="flat")
+
+        self.assertEqual((manifest["commit"], manifest["trusted_files"]), (self.manifest["commit"], 2))
+        store = FlatVectorStore()
+        self.assertEqual((store.count(), store.embedding_backend()), (3, ("stub:test", 2)))
+        store.close()
+
+        scanner = Scanner()
+        self.assertEqual(scanner.scan("."), ["b.py"])
+        self.assertEqual(scanner.last_scan["hashed"], 1)
+        scanner.close()
+
+    def test_bad_snapshots_leave_the_index_alone(self):
+        with self.assertRaises(SnapshotError):
+            import_snapshot("snap.tar.gz", backend_id="gemini:models/text-embedding-004")
+
+        # Same layout, one checksum no longer matches
+        with tarfile.open("snap.tar.gz") as tar:
+            members = [(m, tar.extractfile(m).read()) for m in tar.getmembers()]
+        manifest = json.loads(members[0][1])
+        manifest["files"]["state.db"]["sha256"] = "0" * 64
+        members[0] = (members[0][0], json.dumps(manifest).encode("utf-8"))
+        with tarfile.open("bad.tar.gz", "w:gz") as tar:
+            for member, data in members:
+                member.size = len(data)
+                tar.addfile(member, io.BytesIO(data))
+
+        with self.assertRaisesRegex(SnapshotError, "Checksum mismatch for state.db"):
+            import_snapshot("bad.tar.gz")
+        with self.assertRaises(SnapshotError):
+            import_snapshot("missing.tar.gz")
+
+        store = FlatVectorStore()
+        self.assertEqual(store.count(), 3)
+        store.close()
+        self.assertEqual([name for name in os.listdir(".sentinel") if name.startswith(".snapshot-")], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.main import parse_args
+from src.telemetry.startup import format_report, parse_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each of these takes tens to hundreds of milliseconds to import
+HEAVY_MODULES = ("chromadb", "google.generativeai", "requests", "numpy", "tree_sitter")
+
+# Generous on purpose, the point is to catch a heavy import creeping back in
+IMPORT_BUDGET_MS = float(os.getenv("SENTINEL_IMPORT_BUDGET_MS", "150"))
+
+def run_python(code, cwd=ROOT, env=None):
+    env = dict(os.environ, PYTHONPATH=ROOT, **(env or {}))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout, parse_importtime(result.stderr.splitlines())
+
+LOADED = "import json, sys; print(json.dumps([m for m in %r if m in sys.modules]))" % (HEAVY_MODULES,)
+
+class TestStartup(unittest.TestCase):
+    def test_cli_import_stays_within_budget(self):
+        stdout, records = run_python("import src.main; " + LOADED)
+
+        self.assertEqual(json.loads(stdout), [])
+        main = next(r for r in records if r["module"] == "src.main")
+        self.assertLess(main["cumulative_us"] / 1000, IMPORT_BUDGET_MS)
+
+    def test_index_with_nothing_to_do_skips_the_heavy_clients(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stdout, _ = run_python("from src.main import run_indexer; run_indexer(); " + LOADED,
+                                   cwd=tmp, env={"SENTINEL_VECTOR_STORE": "flat"})
+
+        self.assertIn("No files changed", stdout)
+        self.assertEqual(json.loads(stdout.splitlines()[-1]), [])
+
+    def test_parse_importtime(self):
+        records = parse_importtime([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   _json",
+            "import time:       900 |       1020 | json",
+            "unrelated output"
+        ])
+
+        self.assertEqual([(r["module"], r["depth"]) for r in records], [("_json", 1), ("json", 0)])
+        self.assertIn("1.0ms over 2 modules", format_report(records))
+
+class TestCommands(unittest.TestCase):
+    def test_subcommands_and_legacy_flags(self):
+        self.assertEqual(parse_args(["audit", "pr.diff", "--pr", "3"]).diff, "pr.diff")
+        self.assertEqual(parse_args(["stats", "--json"]).command, "stats")
+        self.assertEqual(parse_args(["--diff", "pr.diff"]).command, "audit")
+        self.assertEqual(parse_args(["--serve", "--port", "0"]).command, "serve")
+        self.assertEqual(parse_args([]).command, "index")
+
+    def test_bad_environment_defaults_are_usage_errors(self):
+        with patch.dict(os.environ, {"SENTINEL_DIFF_CONTEXT": "three", "SENTINEL_INDEX_WORKERS": "8"}):
+            self.assertEqual(parse_args(["index"]).workers, 8)
+            with self.assertRaises(SystemExit) as exit:
+                parse_args(["audit", "pr.diff"])
+            self.assertEqual(exit.exception.code, 2)
+
+        env = dict(os.environ, PYTHONPATH=ROOT, SENTINEL_CONCURRENCY="lots")
+        result = subprocess.run([sys.executable, "src/main.py", "--help"], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+from src.telemetry.tracer import Tracer
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer()
+
+    def test_spans_nest_and_summarize(self):
+        with self.tracer.span("embed_batch", texts=2) as outer:
+            with self.tracer.span("embed_request", bytes=40, tokens_in=10):
+                pass
+            with self.tracer.span("embed_request", bytes=60, tokens_in=15):
+                pass
+            outer.set(cache_hits=1)
+
+        request, _, batch = self.tracer.spans
+        self.assertEqual(request["parent"], batch["id"])
+        self.assertEqual(batch["attrs"], {"texts": 2, "cache_hits": 1})
+        stats = self.tracer.summary["embed_request"]
+        self.assertEqual((stats["calls"], stats["bytes"], stats["tokens_in"]), (2, 100, 25))
+
+    def test_errors_are_recorded_and_reraised(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.span("analyze"):
+                raise ValueError("boom")
+
+        self.assertEqual(self.tracer.spans[0]["error"], "ValueError")
+        self.assertEqual(self.tracer.summary["analyze"]["errors"], 1)
+
+    def test_worker_spans_are_absorbed(self):
+        worker = Tracer()
+        with worker.span("parse", bytes=10):
+            pass
+        worker.count("files", 3)
+
+        self.tracer.absorb(worker.drain())
+        self.assertEqual(self.tracer.summary["parse"]["bytes"], 10)
+        self.assertEqual(self.tracer.counters, {"files": 3})
+        self.assertEqual(worker.spans, [])
+
+    def test_exports_trace_file_and_step_summary(self):
+        with self.tracer.span("scan", files=3):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            trace_path = os.path.join(tmp, "trace.json")
+            summary_path = os.path.join(tmp, "summary.md")
+            self.tracer.write_json(trace_path)
+            self.tracer.write_step_summary("SentinelPR indexer", path=summary_path)
+
+            with open(trace_path) as f:
+                trace = json.load(f)
+            with open(summary_path) as f:
+                summary = f.read()
+
+        self.assertEqual(trace["traceEvents"][0]["name"], "scan")
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+        self.assertIn("### SentinelPR indexer", summary)
+        self.assertIn("| scan | 1 |", summary)
+
+    def test_span_limit_keeps_counting(self):
+        tracer = Tracer(max_spans=2)
+        for _ in range(5):
+            with tracer.span("extract", symbols=1):
+                pass
+
+        self.assertEqual(len(tracer.spans), 2)
+        self.assertEqual(tracer.summary["extract"]["symbols"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from src.storage.flat_store import FlatVectorStore
+from src.storage.vector_store import (COLLECTION_NAME, COMPACTING_NAME, EmbeddingMismatchError, VectorStore,
+                                      make_store)
+
+def _meta(file_path, name, line):
+    return {"id": f"{file_path}::{name}", "file_path": file_path, "symbol_name": name,
+            "type": "function", "start_line": line, "end_line": line + 1, "snippet": f"def {name}(): pass"}
+
+class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = VectorStore(self.tmp.name)
+        metadata = [_meta("a.py", "f", 1), _meta("a.py", "g", 5), _meta("b.py", "h", 1), _meta("c.py", "k", 1)]
+        self.store.upsert(
+            ids=[m["id"] for m in metadata],
+            vectors=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.5, 0.5]],
+            metadata=metadata
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bulk_lookup_by_file(self):
+        symbols = self.store.get_symbols_for_files(["a.py", "b.py", "missing.py"])
+
+        self.assertEqual(sorted(s["id"] for s in symbols["a.py"]), ["a.py::f", "a.py::g"])
+        self.assertEqual([s["id"] for s in symbols["b.py"]], ["b.py::h"])
+        self.assertEqual(symbols["missing.py"], [])
+
+    def test_deleting_files_and_ids(self):
+        self.store.delete_files(["a.py", "b.py"])
+        self.store.delete_ids(["c.py::k"])
+
+        self.assertEqual(self.store.collection.count(), 0)
+
+    def test_compaction_keeps_live_records(self):
+        self.store.delete_ids(["a.py::g"])
+        self.store.compact()
+
+        self.assertEqual(self.store.collection.count(), 3)
+        self.assertEqual(self.store.list_file_paths(), {"a.py", "b.py", "c.py"})
+        self.assertEqual(self.store.get_embeddings(["b.py::h"]), {"b.py::h": [0.0, 1.0]})
+
+    def test_interrupted_compaction_keeps_the_index(self):
+        self.store.delete_ids(["a.py::g"])
+        fresh_modify = []
+
+        # Crash right after the old collection was parked, before the copy takes its name
+        original = type(self.store.collection).modify
+        def modify(collection, name=None, **kwargs):
+            if name == COLLECTION_NAME:
+                fresh_modify.append(name)
+                raise RuntimeError("killed")
+            return original(collection, name=name, **kwargs)
+
+        with patch.object(type(self.store.collection), "modify", modify):
+            with self.assertRaises(RuntimeError):
+                self.store.compact()
+        self.assertEqual(fresh_modify, [COLLECTION_NAME])
+
+        reopened = VectorStore(self.tmp.name)
+        self.assertEqual(reopened.count(), 3)
+        self.assertEqual([c.name for c in reopened.client.list_collections()], [COLLECTION_NAME])
+
+    def test_finished_copy_is_restored_when_the_index_is_gone(self):
+        # What an older compaction left behind when it died between delete and rename
+        copy = self.store.client.create_collection(COMPACTING_NAME)
+        page = self.store.collection.get(include=["embeddings", "metadatas", "documents"])
+        copy.add(ids=page["ids"], embeddings=page["embeddings"], metadatas=page["metadatas"],
+                 documents=page["documents"])
+        self.store.client.delete_collection(COLLECTION_NAME)
+
+        reopened = VectorStore(self.tmp.name)
+        self.assertEqual(reopened.count(), 4)
+        self.assertEqual(reopened.get_embeddings(["b.py::h"]), {"b.py::h": [0.0, 1.0]})
+
+    def test_index_rejects_a_different_embedder(self):
+        # The store in setUp predates backend stamps, so it counts as a Gemini index
+        self.store.bind_embedder("gemini:models/text-embedding-004", 768)
+        with self.assertRaises(EmbeddingMismatchError):
+            self.store.bind_embedder("onnx:all-MiniLM-L6-v2", 384)
+
+        reopened = VectorStore(self.tmp.name)
+        self.assertEqual(reopened.collection.metadata["embedding_backend"], "gemini:models/text-embedding-004")
+
+        reopened.compact()
+        with self.assertRaises(EmbeddingMismatchError):
+            reopened.bind_embedder("gemini:models/text-embedding-004", 384)
+
+class TestFlatVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FlatVectorStore(self.tmp.name)
+        metadata = [_meta("a.py", "f", 1), _meta("a.py", "g", 5), _meta("b.py", "h", 1), _meta("c.py", "k", 1)]
+        self.store.upsert(
+            ids=[m["id"] for m in metadata],
+            vectors=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.5, 0.5]],
+            metadata=metadata
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_bulk_lookup_by_file(self):
+        symbols = self.store.get_symbols_for_files(["a.py", "b.py", "missing.py"])
+
+        self.assertEqual(sorted(s["id"] for s in symbols["a.py"]), ["a.py::f", "a.py::g"])
+        self.assertEqual(symbols["b.py"], [_meta("b.py", "h", 1)])
+        self.assertEqual(symbols["missing.py"], [])
+
+    def test_search_matches_brute_force_and_skips_deleted_rows(self):
+        self.store.delete_ids(["a.py::f"])
+        # Replacing a symbol appends a row, the old one must not come back
+        self.store.upsert(["c.py::k"], [[0.0, 2.0]], [_meta("c.py", "k", 1)])
+
+        results = self.store.search_many([[1.0, 0.0], [0.0, 1.0]], limit=2)
+
+        self.assertEqual([[m["id"] for m in r] for r in results], [["a.py::g", "b.py::h"], ["b.py::h", "c.py::k"]])
+        self.assertAlmostEqual(results[0][0]["distance"], 0.02, places=5)
+        self.assertEqual(results[1][1]["distance"], 1.0)
+        self.assertEqual(self.store.count(), 3)
+
+    def test_many_queries_over_many_rows(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((3000, 8)).astype(np.float32)
+        ids = [f"d.py::s{i}" for i in range(3000)]
+        store = FlatVectorStore(os.path.join(self.tmp.name, "wide"))
+        store.upsert(ids, vectors.tolist(), [_meta("d.py", f"s{i}", i) for i in range(3000)])
+        queries = rng.standard_normal((100, 8)).astype(np.float32)
+
+        with patch("src.storage.flat_store.ROW_BLOCK", 512), patch("src.storage.flat_store.QUERY_BLOCK", 16):
+            results = store.search_many(queries.tolist(), limit=5)
+        store.close()
+
+        expected = np.argsort(((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2), axis=1)[:, :5]
+        self.assertEqual([[m["id"] for m in r] for r in results], [[ids[i] for i in row] for row in expected])
+
+    def test_concurrent_first_searches_and_deletes(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((4000, 8)).astype(np.float32)
+        ids = [f"d.py::s{i}" for i in range(4000)]
+        path = os.path.join(self.tmp.name, "shared")
+        store = FlatVectorStore(path)
+        # Far away from every query, deleting them never changes a result
+        far = [[100.0] * 8] * 200
+        store.upsert(ids + [f"far.py::s{i}" for i in range(200)], vectors.tolist() + far,
+                     [_meta("d.py", f"s{i}", i) for i in range(4000)] + [_meta("far.py", f"s{i}", i) for i in range(200)])
+        queries = rng.standard_normal((20, 8)).astype(np.float32).tolist()
+        expected = [[m["id"] for m in r] for r in store.search_many(queries, limit=5)]
+        store.close()
+
+        # Reopened, the search caches are built by whichever search comes first
+        store = FlatVectorStore(path)
+        barrier = threading.Barrier(9)
+        def search():
+            barrier.wait()
+            return [[m["id"] for m in r] for r in store.search_many(queries, limit=5)]
+        def delete():
+            barrier.wait()
+            for i in range(200):
+                store.delete_ids([f"far.py::s{i}"])
+
+        # Small blocks stretch the cache build over many steps
+        with patch("src.storage.flat_store.ROW_BLOCK", 64), ThreadPoolExecutor(max_workers=9) as pool:
+            searches = [pool.submit(search) for _ in range(8)]
+            deleting = pool.submit(delete)
+            results = [f.result() for f in searches]
+            deleting.result()
+        store.close()
+
+        self.assertEqual(results, [expected] * 8)
+
+    def test_metadata_updates_keep_vectors_and_survive_reopening(self):
+        moved = dict(_meta("a.py", "g", 5), start_line=9, end_line=10)
+        self.store.update_metadata(["a.py::g"], [moved])
+        self.store.close()
+
+        self.store = FlatVectorStore(self.tmp.name)
+        self.assertEqual(self.store.get_symbols_for_file("a.py")[1]["start_line"], 9)
+        self.assertEqual(self.store.get_embeddings(["a.py::g", "nope"]), {"a.py::g": [float(np.float32(0.9)), float(np.float32(0.1))]})
+
+    def test_compaction_keeps_live_records(self):
+        self.store.delete_files(["a.py"])
+        self.store.compact()
+
+        self.assertEqual(self.store.list_file_paths(), {"b.py", "c.py"})
+        self.assertEqual(self.store.get_embeddings(["b.py::h"]), {"b.py::h": [0.0, 1.0]})
+        self.assertEqual([m["id"] for m in self.store.search([1.0, 0.0], limit=5)], ["c.py::k", "b.py::h"])
+        self.assertEqual(sorted(f for f in os.listdir(self.tmp.name) if f.endswith(".f32")), ["flat-1.f32"])
+
+        # Appending after compaction grows the smaller matrix
+        self.store.upsert(["e.py::e"], [[1.0, 0.0]], [_meta("e.py", "e", 1)])
+        self.assertEqual(self.store.search([1.0, 0.0], limit=1)[0]["id"], "e.py::e")
+
+    def test_index_rejects_a_different_embedder(self):
+        self.store.bind_embedder("gemini:models/text-embedding-004", 768)
+        with self.assertRaises(EmbeddingMismatchError):
+            self.store.bind_embedder("onnx:all-MiniLM-L6-v2", 384)
+
+    def test_backend_is_picked_from_the_environment(self):
+        with patch.dict(os.environ, {"SENTINEL_VECTOR_STORE": "flat"}):
+            store = make_store(persist_dir=self.tmp.name)
+        self.assertIsInstance(store, FlatVectorStore)
+        self.assertEqual(store.count(), 4)
+        store.close()
+        with self.assertRaises(ValueError):
+            make_store("faiss", persist_dir=self.tmp.name)
+
+if __name__ == '__main__':
+    unittest.main()